@@ -9,9 +9,29 @@ from .models import *
 def create_app():
     app = Flask(__name__)
     app.config.from_object(Config)
+    if Config.TRUSTED_PROXY_HOPS:
+        # Only the entries our own proxies appended to X-Forwarded-For; anything before them is client-supplied
+        from werkzeug.middleware.proxy_fix import ProxyFix
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=Config.TRUSTED_PROXY_HOPS)
+
+    from .services.json_provider import JSONProvider
+    app.json = JSONProvider(app)
 
     db.init_app(app)
 
+    # Importing a worker module registers it as a per-process background worker
+    from .services.invalidation import invalidation_listener
+    from .services.mailer import outbox_worker
+    from .services.otp_store import otp_sweeper
+    from .services.reservation_expiry import reservation_expiry_worker
+    from .services.overdue import overdue_sweeper
+    from .middlewares.rate_limit import rate_limit_pruner
+    from .services.workers import init_workers
+    init_workers(app)
+
+    from .cli import register_commands
+    register_commands(app)
+
     @app.route('/')
     def index():
         return redirect(url_for('docs.index'))
@@ -36,11 +56,12 @@ def create_app():
     from .blueprints.members import members_bp
     from .blueprints.librarians import librarians_bp
     from .blueprints.admin import admin_bp
-    # from .blueprints.borrowing import borrowing_bp
+    from .blueprints.borrowing import borrowing_bp
     # from .blueprints.fines import fine_bp
-    # from .blueprints.reservations import reservation_bp
+    from .blueprints.reservations import reservation_bp
     # from .blueprints.tickets import ticket_bp
     from .blueprints.wishlist import wishlist_bp
+    from .blueprints.cron import cron_bp
 
     app.register_blueprint(docs_bp)
     app.register_blueprint(auth_bp)
@@ -50,10 +71,11 @@ def create_app():
     app.register_blueprint(members_bp)
     app.register_blueprint(librarians_bp)
     app.register_blueprint(admin_bp)
-    # app.register_blueprint(borrowing_bp)
+    app.register_blueprint(borrowing_bp)
     # app.register_blueprint(fine_bp)
-    # app.register_blueprint(reservation_bp)
+    app.register_blueprint(reservation_bp)
     # app.register_blueprint(ticket_bp)
     app.register_blueprint(wishlist_bp)
+    app.register_blueprint(cron_bp)
 
     return app
\ No newline at end of file
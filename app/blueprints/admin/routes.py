@@ -8,6 +8,12 @@ from ...models.borrow_transactions import BorrowTransaction
 from ...models.fines import Fine
 from ...models.libraries import Library
 from ...utils.role_manager import role_required
+from ...services.identity import identity_cache
+from ...services.mailer import outbox_worker
+from ...services.counts import count_cache
+from ...services.response_cache import response_cache_stats
+from ...services.reservation_expiry import reservation_expiry_worker
+from ...services.overdue import overdue_sweeper
 from sqlalchemy import func
 from datetime import datetime
 
@@ -73,4 +79,16 @@ def update_settings():
         return jsonify({"message": "Settings updated successfully"}), 200
     except Exception as e:
         db.session.rollback()
-        return jsonify({"error": f"Failed to update settings: {str(e)}"}), 500
\ No newline at end of file
+        return jsonify({"error": f"Failed to update settings: {str(e)}"}), 500
+
+@admin_bp.route('/metrics', methods=['GET'])
+@role_required(['Admin'])
+def metrics():
+    return jsonify({
+        "identity_cache": identity_cache.stats(),
+        "email_outbox": outbox_worker.stats(),
+        "count_cache": count_cache.stats(),
+        "response_cache": response_cache_stats(),
+        "reservation_expiry": reservation_expiry_worker.stats(),
+        "overdue_sweep": overdue_sweeper.stats()
+    }), 200
@@ -4,9 +4,7 @@ from wtforms import StringField, PasswordField, SubmitField, IntegerField, Field
 from wtforms.validators import DataRequired, Email, Length, Regexp, ValidationError, Optional, UUID
 from ...models.users import User
 from ...models.libraries import Library
-from ...models.otp_verifications import OTPVerification
 import uuid
-from datetime import datetime, timedelta, timezone  # Added timezone import
 
 class SignupForm(FlaskForm):
     email = StringField('Email', validators=[DataRequired(), Email()])
@@ -49,19 +47,6 @@ class OTPForm(FlaskForm):
         if not user:
             raise ValidationError('User not found.')
 
-    def validate_otp(self, otp):
-        user = User.query.filter_by(user_id=self.user_id.data).first()
-        if not user:
-            return
-
-        # Check attempt count
-        recent_attempts = OTPVerification.query.filter(
-            OTPVerification.user_id == self.user_id.data,
-            OTPVerification.created_at >= datetime.now(timezone.utc) - timedelta(minutes=15)  # Updated
-        ).count()
-        if recent_attempts >= 3:
-            raise ValidationError('Too many failed OTP attempts. Please try again after 15 minutes.')
-
 class ProfileForm(FlaskForm):
     name = StringField('Name', validators=[Length(min=2, max=100)])
     email = StringField('Email', validators=[Email()])
@@ -4,23 +4,25 @@ from .forms import SignupForm, LoginForm, ProfileForm, ResetPasswordForm, Refres
 from ... import db
 from ...models.users import User
 from ...models.libraries import Library
-from ...models.otp_verifications import OTPVerification
+from ...models.genres import Genre
 from ...config import Config
-from supabase import create_client, Client
 from ...utils.role_manager import role_required
-from ...utils.email_utils import generate_otp, send_otp_email
+from ...services.supabase_client import create_auth_client, get_supabase_admin
+from ...services.images import ingest_image
+from ...services.references import resolve_references
+from ...middlewares.rate_limit import rate_limit
+from ...services.invalidation import notify
+from ...utils.email_utils import queue_email
+from ...services.otp_store import otp_store
 from datetime import datetime, timedelta, timezone  # Added timezone import
 from ...utils import generate_random_password
 
-# Initialize Supabase client
-supabase: Client = create_client(Config.SUPABASE_PROJECT_URL, Config.SUPABASE_ANON_PUBLIC_KEY)
-supabase_admin: Client = create_client(Config.SUPABASE_PROJECT_URL, Config.SUPABASE_SERVICE_KEY)
-
 def allowed_file(filename):
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg'}
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 @auth_bp.route('/admin/register', methods=['POST'])
+@rate_limit('5/hour', key='ip')
 def admin_register():
     form = AdminRegisterForm()
     if not form.validate_on_submit():
@@ -32,16 +34,10 @@ def admin_register():
         if 'user_image' in request.files:
             file = request.files['user_image']
             if file and allowed_file(file.filename):
-                filename = f"{datetime.now(timezone.utc).timestamp()}_{file.filename}"  # Updated
-                supabase.storage.from_('user_images').upload(
-                    path=filename,
-                    file=file.stream,
-                    file_options={"content-type": file.content_type}
-                )
-                user_image_url = supabase.storage.from_('user_images').get_public_url(filename)
+                user_image_url = ingest_image(file, 'user_images')
 
         # Create user in auth.users
-        auth_response = supabase.auth.sign_up({
+        auth_response = create_auth_client().auth.sign_up({
             "email": form.email.data,
             "password": form.password.data,
             "options": {"data": {"role": "Admin"}}
@@ -88,7 +84,7 @@ def admin_register():
             db.session.commit()
         except Exception as e:
             try:
-                supabase_admin.auth.admin.delete_user(user_id)
+                get_supabase_admin().auth.admin.delete_user(user_id)
             except Exception as delete_error:
                 pass
             db.session.rollback()
@@ -123,19 +119,13 @@ def librarian_register():
         if 'user_image' in request.files:
             file = request.files['user_image']
             if file and allowed_file(file.filename):
-                filename = f"{datetime.now(timezone.utc).timestamp()}_{file.filename}"
-                supabase.storage.from_('user_images').upload(
-                    path=filename,
-                    file=file.stream,
-                    file_options={"content-type": file.content_type}
-                )
-                user_image_url = supabase.storage.from_('user_images').get_public_url(filename)
+                user_image_url = ingest_image(file, 'user_images')
 
         # Generate random password
         generated_password = generate_random_password()
 
         # Create user in auth.users
-        auth_response = supabase.auth.sign_up({
+        auth_response = create_auth_client().auth.sign_up({
             "email": form.email.data,
             "password": generated_password,
             "options": {"data": {"role": "Librarian"}}
@@ -156,35 +146,29 @@ def librarian_register():
                 updated_at=datetime.now(timezone.utc)
             )
             db.session.add(new_user)
+
+            # Queue email with temporary password in the same transaction as the user
+            email_subject = "Your Librarian Account Credentials"
+            email_body = (
+                f"Dear {form.name.data},\n\n"
+                f"Your librarian account has been created.\n"
+                f"Email: {form.email.data}\n"
+                f"Temporary Password: {generated_password}\n\n"
+                f"Please log in using these credentials and reset your password immediately using the 'Reset Password' option.\n"
+                f"If you have any issues, contact your library administrator.\n\n"
+                f"Best regards,\nLibrary Management System"
+            )
+            queue_email(form.email.data, email_body, subject=email_subject, is_otp=False)
+            notify('counts', admin.library_id)
             db.session.commit()
         except Exception as e:
             try:
-                supabase_admin.auth.admin.delete_user(user_id)
+                get_supabase_admin().auth.admin.delete_user(user_id)
             except Exception as delete_error:
                 pass
             db.session.rollback()
             return jsonify({"error": f"Failed to create librarian: {str(e)}"}), 500
 
-        # Send email with temporary password
-        email_subject = "Your Librarian Account Credentials"
-        email_body = (
-            f"Dear {form.name.data},\n\n"
-            f"Your librarian account has been created.\n"
-            f"Email: {form.email.data}\n"
-            f"Temporary Password: {generated_password}\n\n"
-            f"Please log in using these credentials and reset your password immediately using the 'Reset Password' option.\n"
-            f"If you have any issues, contact your library administrator.\n\n"
-            f"Best regards,\nLibrary Management System"
-        )
-        if not send_otp_email(form.email.data, email_body, subject=email_subject):
-            try:
-                supabase_admin.auth.admin.delete_user(user_id)
-                db.session.delete(new_user)
-                db.session.commit()
-            except:
-                db.session.rollback()
-            return jsonify({"error": "Failed to send credentials email"}), 500
-
         return jsonify({
             "message": "Librarian registered successfully. Credentials have been sent to their email.",
             "user_id": str(user_id)
@@ -195,6 +179,8 @@ def librarian_register():
         return jsonify({"error": f"Registration failed: {str(e)}"}), 500
 
 @auth_bp.route('/signup', methods=['POST'])
+@rate_limit('10/hour', key='ip')
+@rate_limit('3/hour', key='email')
 def signup():
     form = SignupForm()
     if not form.validate_on_submit():
@@ -212,15 +198,9 @@ def signup():
         if 'user_image' in request.files:
             file = request.files['user_image']
             if file and allowed_file(file.filename):
-                filename = f"{datetime.now(timezone.utc).timestamp()}_{file.filename}"
-                supabase.storage.from_('user_images').upload(
-                    path=filename,
-                    file=file.stream,
-                    file_options={"content-type": file.content_type}
-                )
-                user_image_url = supabase.storage.from_('user_images').get_public_url(filename)
-
-        auth_response = supabase.auth.sign_up({
+                user_image_url = ingest_image(file, 'user_images')
+
+        auth_response = create_auth_client().auth.sign_up({
             "email": form.email.data,
             "password": form.password.data,
             "options": {"data": {"role": "Member"}}
@@ -230,13 +210,9 @@ def signup():
         try:
             # Validate preferred_genre_ids if provided
             if form.preferred_genre_ids.data:
-                from ...models.genres import Genre
-                provided_genre_ids = form.preferred_genre_ids.data  # List of UUID strings
-                existing_count = db.session.query(db.func.count(Genre.genre_id)).filter(
-                    Genre.genre_id.in_(provided_genre_ids)
-                ).scalar()
-                if existing_count != len(provided_genre_ids):
-                    return jsonify({"error": "One or more genre IDs are invalid"}), 400
+                genres = resolve_references(Genre, form.preferred_genre_ids.data, load=False)
+                if genres.missing:
+                    return jsonify({"error": "One or more genre IDs are invalid", "missing_genre_ids": genres.missing}), 400
 
             # Create new user with preferred_genre_ids
             new_user = User(
@@ -255,28 +231,12 @@ def signup():
             db.session.flush()
 
             # Generate and store OTP
-            otp = generate_otp(6)
-            expires_at = datetime.now(timezone.utc) + timedelta(minutes=5)
-            otp_verification = OTPVerification(
-                user_id=user_id,
-                email=form.email.data,
-                otp=otp,
-                expires_at=expires_at,
-                created_at=datetime.now(timezone.utc)
-            )
-            db.session.add(otp_verification)
-            db.session.commit()
+            otp = otp_store.issue(user_id, form.email.data)
 
-            # Send OTP email
-            if not send_otp_email(form.email.data, otp):
-                try:
-                    supabase_admin.auth.admin.delete_user(user_id)
-                    db.session.delete(new_user)
-                    db.session.delete(otp_verification)
-                    db.session.commit()
-                except:
-                    db.session.rollback()
-                return jsonify({"error": "Failed to send OTP email"}), 500
+            # Queue OTP email; it is delivered by the outbox mailer after commit
+            queue_email(form.email.data, otp)
+            notify('counts', form.library_id.data)
+            db.session.commit()
 
             return jsonify({
                 "message": "User registered successfully. Please verify OTP sent to your email.",
@@ -285,7 +245,7 @@ def signup():
 
         except Exception as e:
             try:
-                supabase_admin.auth.admin.delete_user(user_id)
+                get_supabase_admin().auth.admin.delete_user(user_id)
             except Exception as delete_error:
                 pass
             db.session.rollback()
@@ -296,13 +256,15 @@ def signup():
         return jsonify({"error": f"Registration failed: {str(e)}"}), 500
 
 @auth_bp.route('/signin', methods=['POST'])
+@rate_limit('20/minute', key='ip')
+@rate_limit('5/15minutes', key='email')
 def signin():
     form = LoginForm()
     if not form.validate_on_submit():
         return jsonify({"error": form.errors}), 400
 
     try:
-        response = supabase.auth.sign_in_with_password({
+        response = create_auth_client().auth.sign_in_with_password({
             "email": form.email.data,
             "password": form.password.data
         })
@@ -317,25 +279,16 @@ def signin():
                 return jsonify({"error": "Account not activated. Please verify OTP from signup."}), 403
 
             # Generate and store OTP with session tokens
-            otp = generate_otp(6)
-            expires_at = datetime.now(timezone.utc) + timedelta(minutes=5)
-            otp_verification = OTPVerification(
-                user_id=user_id,
-                email=user.email,
-                otp=otp,
-                access_token=response.session.access_token,  # Store tokens
-                refresh_token=response.session.refresh_token,  # Store tokens
-                expires_at=expires_at,
-                created_at=datetime.now(timezone.utc)
+            otp = otp_store.issue(
+                user_id,
+                user.email,
+                access_token=response.session.access_token,
+                refresh_token=response.session.refresh_token
             )
-            db.session.add(otp_verification)
-            db.session.commit()
 
-            # Send OTP email
-            if not send_otp_email(user.email, otp):
-                db.session.delete(otp_verification)
-                db.session.commit()
-                return jsonify({"error": "Failed to send OTP email"}), 500
+            # Queue OTP email; it is delivered by the outbox mailer after commit
+            queue_email(user.email, otp)
+            db.session.commit()
 
             return jsonify({
                 "message": "Please verify OTP sent to your email to complete login.",
@@ -363,40 +316,27 @@ def signin():
         return jsonify({"error": "Invalid credentials or server error"}), 401
 
 @auth_bp.route('/verify-otp', methods=['POST'])
+@rate_limit('30/minute', key='ip')
+@rate_limit('3/15minutes', key='user_id', only_failures=True)
 def verify_otp():
     form = OTPForm()
     if not form.validate_on_submit():
         return jsonify({"error": form.errors}), 400
 
     try:
-        # Clean up expired OTPs
-        OTPVerification.query.filter(OTPVerification.expires_at < datetime.now(timezone.utc)).delete()
-        db.session.commit()
-
-        # Validate OTP
-        otp_verification = OTPVerification.query.filter_by(
-            user_id=form.user_id.data,
-            otp=form.otp.data
-        ).first()
-
+        # Validate and consume OTP; expired OTPs are removed by the sweeper
+        otp_verification = otp_store.consume(form.user_id.data, form.otp.data)
         if not otp_verification:
             return jsonify({"error": "Invalid or expired OTP"}), 400
 
-        if otp_verification.expires_at < datetime.now(timezone.utc):
-            db.session.delete(otp_verification)
-            db.session.commit()
-            return jsonify({"error": "OTP has expired"}), 400
-
         user = User.query.filter_by(user_id=form.user_id.data).first()
         if not user:
-            db.session.delete(otp_verification)
             db.session.commit()
             return jsonify({"error": "User not found"}), 404
 
         # For signup: Activate account
         if not user.is_active and user.role == 'Member':
             user.is_active = True
-            db.session.delete(otp_verification)
             db.session.commit()
             return jsonify({
                 "message": "OTP verified successfully. Account activated. You can now sign in."
@@ -406,15 +346,11 @@ def verify_otp():
         if user.role == 'Member':
             access_token = otp_verification.access_token
             refresh_token = otp_verification.refresh_token
+            db.session.commit()
 
             if not access_token or not refresh_token:
-                db.session.delete(otp_verification)
-                db.session.commit()
                 return jsonify({"error": "Session tokens not found. Please sign in again."}), 400
 
-            db.session.delete(otp_verification)
-            db.session.commit()
-
             return jsonify({
                 "message": "OTP verified successfully. Signed in successfully.",
                 "access_token": access_token,
@@ -428,6 +364,7 @@ def verify_otp():
                 }
             }), 200
 
+        db.session.commit()
         return jsonify({"error": "OTP verification not required for this user"}), 400
 
     except Exception as e:
@@ -441,7 +378,7 @@ def refresh():
         return jsonify({"error": form.errors}), 400
 
     try:
-        response = supabase.auth.refresh_session(form.refresh_token.data)
+        response = create_auth_client().auth.refresh_session(form.refresh_token.data)
         access_token = response.session.access_token
         new_refresh_token = response.session.refresh_token
 
@@ -469,7 +406,9 @@ def refresh():
 @role_required(['Member', 'Librarian', 'Admin'])
 def signout():
     try:
-        supabase.auth.sign_out()
+        # Revoke the caller's own session rather than whatever a shared client last held
+        token = request.headers['Authorization'].split(" ")[1]
+        get_supabase_admin().auth.admin.sign_out(token)
         return jsonify({"message": "Logged out successfully"}), 200
     except Exception as e:
         return jsonify({"error": f"Logout failed: {str(e)}"}), 500
@@ -502,33 +441,25 @@ def profile():
             if 'user_image' in request.files:
                 file = request.files['user_image']
                 if file and allowed_file(file.filename):
-                    filename = f"{datetime.now(timezone.utc).timestamp()}_{file.filename}"
-                    supabase.storage.from_('user_images').upload(
-                        path=filename,
-                        file=file.stream,
-                        file_options={"content-type": file.content_type}
-                    )
-                    user_image_url = supabase.storage.from_('user_images').get_public_url(filename)
+                    user_image_url = ingest_image(file, 'user_images')
 
             if form.name.data:
                 user.name = form.name.data
             if user_image_url and user_image_url != user.user_image:
                 user.user_image = user_image_url
             if form.preferred_genre_ids.data:
-                from ...models.genres import Genre
-                provided_genre_ids = form.preferred_genre_ids.data
-                existing_count = db.session.query(db.func.count(Genre.genre_id)).filter(
-                    Genre.genre_id.in_(provided_genre_ids)
-                ).scalar()
-                if existing_count != len(provided_genre_ids):
-                    return jsonify({"error": "One or more genre IDs are invalid"}), 400
+                genres = resolve_references(Genre, form.preferred_genre_ids.data, load=False)
+                if genres.missing:
+                    return jsonify({"error": "One or more genre IDs are invalid", "missing_genre_ids": genres.missing}), 400
                 user.preferred_genre_ids = form.preferred_genre_ids.data
             user.updated_at = datetime.now(timezone.utc)
+            notify('user', user.user_id)
             db.session.commit()
 
             if form.email.data and form.email.data != user.email:
-                supabase.auth.update_user({"email": form.email.data})
+                get_supabase_admin().auth.admin.update_user_by_id(str(user.user_id), {"email": form.email.data})
                 user.email = form.email.data
+                notify('user', user.user_id)
                 db.session.commit()
 
             return jsonify({
@@ -548,13 +479,15 @@ def profile():
             return jsonify({"error": f"Profile update failed: {str(e)}"}), 400
 
 @auth_bp.route('/reset-password', methods=['POST'])
+@rate_limit('10/hour', key='ip')
+@rate_limit('3/hour', key='email')
 def reset_password():
     form = ResetPasswordForm()
     if not form.validate_on_submit():
         return jsonify({"error": form.errors}), 400
 
     try:
-        supabase.auth.reset_password_for_email(form.email.data)
+        create_auth_client().auth.reset_password_for_email(form.email.data)
         return jsonify({"message": "Password reset email sent"}), 200
     except Exception as e:
         return jsonify({"error": f"Password reset failed: {str(e)}"}), 400
\ No newline at end of file
@@ -1,8 +1,12 @@
 from flask_wtf import FlaskForm
 from wtforms import StringField, TextAreaField, FileField
 from wtforms.validators import DataRequired, Length, Optional
+from ..books.forms import UUIDListField
 
 class AuthorForm(FlaskForm):
     name = StringField('Name', validators=[DataRequired(), Length(min=1, max=255)])
     bio = TextAreaField('Bio', validators=[Optional(), Length(max=1000)])
-    author_image = FileField('Author Image', validators=[Optional()])
\ No newline at end of file
+    author_image = FileField('Author Image', validators=[Optional()])
+
+class AuthorBulkDeleteForm(FlaskForm):
+    author_ids = UUIDListField('Author IDs', validators=[DataRequired()])
\ No newline at end of file
@@ -1,16 +1,29 @@
 from flask import request, jsonify, current_app
 from . import authors_bp
-from .forms import AuthorForm
+from .forms import AuthorForm, AuthorBulkDeleteForm
 from ... import db
 from ...models.authors import Author
-from ...models.books import Book
 from ...models.libraries import Library
 from ...utils.role_manager import role_required
+from ...services.search import fuzzy_match, match_threshold
+from ...services.pagination import paginate
+from ...services.serializers import author_serializer
+from ...services.expansions import AUTHOR_EXPANSIONS, requested_expansions, parse_expand, id_fields, expand_related
+from ...services.invalidation import notify
+from ...services.counts import ALL_SCOPES, GLOBAL_SCOPE
+from ...services.images import ingest_image, variant_urls
+from ...services.cascades import delete_authors
+from ...services.conditional import conditional_get
+from ...services.response_cache import cached_response
 from ...config import Config
-from supabase import create_client, Client
 from datetime import datetime
 
-supabase: Client = create_client(Config.SUPABASE_PROJECT_URL, Config.SUPABASE_ANON_PUBLIC_KEY)
+# get_author renders everything but list-only fields unless ?fields= says otherwise
+AUTHOR_DETAIL_FIELDS = [name for name in author_serializer.fields if name != 'author_image_thumbnail']
+
+def expands_books():
+    # expand=books embeds books from the caller's library, so validators and cache entries are per library
+    return 'books' in requested_expansions()
 
 def allowed_file(filename):
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg'}
@@ -34,13 +47,7 @@ def create_author():
         if 'author_image' in request.files:
             file = request.files['author_image']
             if file and allowed_file(file.filename):
-                filename = f"author_{datetime.utcnow().timestamp()}_{file.filename}"
-                supabase.storage.from_('author_images').upload(
-                    path=filename,
-                    file=file.stream,
-                    file_options={"content-type": file.content_type}
-                )
-                author_image_url = supabase.storage.from_('author_images').get_public_url(filename)
+                author_image_url = ingest_image(file, 'author_images')
 
         new_author = Author(
             name=form.name.data,
@@ -50,6 +57,8 @@ def create_author():
             updated_at=datetime.utcnow()
         )
         db.session.add(new_author)
+        notify('responses', 'authors')
+        notify('counts', GLOBAL_SCOPE)
         db.session.commit()
         return jsonify({"message": "Author created successfully", "author_id": str(new_author.author_id)}), 201
 
@@ -59,55 +68,53 @@ def create_author():
 
 @authors_bp.route('', methods=['GET'])
 @role_required(['Librarian', 'Member'])
+@conditional_get()
+@cached_response('authors')
 def list_authors():
     try:
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 10, type=int)
-        query = Author.query
+        fields = author_serializer.parse_fields(request.args.get('fields'))
+        query = Author.query.options(author_serializer.load_only(fields))
+        sort = [(Author.name, False), (Author.author_id, False)]
 
         name = request.args.get('name')
-        if name:
+        if name and request.args.get('match') == 'fuzzy':
+            condition, score = fuzzy_match(name, Author.name, threshold=match_threshold(request.args.get('threshold')))
+            query = query.filter(condition)
+            sort = [(score, True)] + sort
+        elif name:
             query = query.filter(Author.name.ilike(f'%{name}%'))
 
-        authors = query.paginate(page=page, per_page=per_page, error_out=False)
+        authors, page_meta = paginate(query, sort, default_per_page=10)
+        thumbnails = variant_urls(author.author_image for author in authors) if 'author_image_thumbnail' in fields else {}
         return jsonify({
-            "authors": [{
-                "author_id": str(author.author_id),
-                "name": author.name,
-                "bio": author.bio,
-                "author_image": author.author_image,
-                "book_ids": [str(bid) for bid in (author.book_ids or [])],
-                "created_at": author.created_at.isoformat(),
-                "updated_at": author.updated_at.isoformat()
-            } for author in authors.items],
-            "total": authors.total,
-            "pages": authors.pages,
-            "page": page
+            "authors": author_serializer.dump_many(authors, fields, thumbnails=thumbnails),
+            **page_meta
         }), 200
 
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": f"Failed to list authors: {str(e)}"}), 500
 
 @authors_bp.route('/<author_id>', methods=['GET'])
 @role_required(['Librarian', 'Member'])
+@conditional_get(per_library=expands_books)
+@cached_response('authors', per_library=expands_books)
 def get_author(author_id):
     try:
-        author = Author.query.filter_by(author_id=author_id).first()
+        fields = author_serializer.parse_fields(request.args.get('fields'), default=AUTHOR_DETAIL_FIELDS)
+        expand = parse_expand(request.args.get('expand'), AUTHOR_EXPANSIONS)
+        author = Author.query.options(author_serializer.load_only(fields + id_fields(expand, AUTHOR_EXPANSIONS))) \
+            .filter_by(author_id=author_id).first()
         if not author:
             return jsonify({"error": "Author not found"}), 404
 
-        return jsonify({
-            "author": {
-                "author_id": str(author.author_id),
-                "name": author.name,
-                "bio": author.bio,
-                "author_image": author.author_image,
-                "book_ids": [str(bid) for bid in (author.book_ids or [])],
-                "created_at": author.created_at.isoformat(),
-                "updated_at": author.updated_at.isoformat()
-            }
-        }), 200
+        thumbnails = variant_urls([author.author_image]) if 'author_image_thumbnail' in fields else {}
+        embed = expand_related([author], expand, AUTHOR_EXPANSIONS, library_id=request.current_user.library_id)
+        return jsonify({"author": {**author_serializer.dump(author, fields, thumbnails=thumbnails), **embed(author)}}), 200
 
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": f"Failed to get author: {str(e)}"}), 500
 
@@ -133,19 +140,16 @@ def update_author(author_id):
         if 'author_image' in request.files:
             file = request.files['author_image']
             if file and allowed_file(file.filename):
-                filename = f"author_{datetime.utcnow().timestamp()}_{file.filename}"
-                supabase.storage.from_('author_images').upload(
-                    path=filename,
-                    file=file.stream,
-                    file_options={"content-type": file.content_type}
-                )
-                author_image_url = supabase.storage.from_('author_images').get_public_url(filename)
+                author_image_url = ingest_image(file, 'author_images')
 
         author.name = form.name.data or author.name
         author.bio = form.bio.data if form.bio.data is not None else author.bio
         author.author_image = author_image_url
         author.updated_at = datetime.utcnow()
 
+        notify('responses', 'authors')
+        # A rename changes which books match full-text searches in every library
+        notify('counts', ALL_SCOPES)
         db.session.commit()
         return jsonify({"message": "Author updated successfully", "author_id": str(author.author_id)}), 200
 
@@ -157,21 +161,41 @@ def update_author(author_id):
 @role_required(['Librarian'])
 def delete_author(author_id):
     try:
-        author = Author.query.filter_by(author_id=author_id).first()
-        if not author:
+        deleted, libraries = delete_authors([author_id])
+        if deleted.missing:
             return jsonify({"error": "Author not found"}), 404
 
-        # Update books by removing author_id
-        books = Book.query.filter(Book.author_ids.contains([author.author_id])).all()
-        for book in books:
-            book.author_ids = [aid for aid in (book.author_ids or []) if aid != author.author_id]
-            book.updated_at = datetime.utcnow()
-            db.session.add(book)
-
-        db.session.delete(author)
+        notify_authors_deleted(libraries)
         db.session.commit()
         return jsonify({"message": "Author deleted successfully"}), 200
 
     except Exception as e:
         db.session.rollback()
-        return jsonify({"error": f"Failed to delete author: {str(e)}"}), 500
\ No newline at end of file
+        return jsonify({"error": f"Failed to delete author: {str(e)}"}), 500
+
+@authors_bp.route('/bulk-delete', methods=['POST'])
+@role_required(['Librarian'])
+def bulk_delete_authors():
+    form = AuthorBulkDeleteForm()
+    if not form.validate_on_submit():
+        return jsonify({"error": form.errors}), 400
+
+    try:
+        deleted, libraries = delete_authors(form.author_ids.data)
+        if deleted.missing:
+            return jsonify({"error": "Some authors were not found; nothing was deleted", "missing_author_ids": deleted.missing}), 404
+
+        notify_authors_deleted(libraries)
+        db.session.commit()
+        return jsonify({"message": "Authors deleted successfully", "deleted": len(deleted.found)}), 200
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": f"Failed to delete authors: {str(e)}"}), 500
+
+def notify_authors_deleted(libraries):
+    notify('responses', 'authors')
+    notify('counts', GLOBAL_SCOPE)
+    # Author-filtered and full-text book counts change in every library that had their books
+    for library_id in libraries:
+        notify('counts', library_id)
\ No newline at end of file
@@ -1,4 +1,4 @@
-from flask import request, jsonify, current_app
+from flask import request, jsonify, current_app, Response, stream_with_context
 from . import books_bp
 from .forms import BookForm, BookUpdateForm
 from ... import db
@@ -7,14 +7,24 @@ from ...models.authors import Author
 from ...models.genres import Genre
 from ...models.libraries import Library
 from ...utils.role_manager import role_required
+from ...services.images import ingest_image, variant_urls
+from ...services.references import resolve_references
+from ...services.cascades import remove_from_arrays
+from ...services.catalog_import import IMPORT_FORMATS, import_catalog
+from ...services.catalog_export import EXPORT_FORMATS, export_catalog
+from ...services.search import match_books, book_rank, book_headline
+from ...services.pagination import paginate
+from ...services.invalidation import notify
+from ...services.serializers import book_serializer
+from ...services.expansions import BOOK_EXPANSIONS, parse_expand, id_fields, expand_related
+from ...services.conditional import conditional_get
 from ...config import Config
-from supabase import create_client, Client
 from datetime import datetime
 from uuid import UUID
 import re
 
-# Initialize Supabase client
-supabase: Client = create_client(Config.SUPABASE_PROJECT_URL, Config.SUPABASE_ANON_PUBLIC_KEY)
+# get_book renders everything but list-only fields unless ?fields= says otherwise
+BOOK_DETAIL_FIELDS = [name for name in book_serializer.fields if name != 'book_image_thumbnail']
 
 def allowed_file(filename):
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg'}
@@ -33,26 +43,22 @@ def create_book():
         if not library:
             return jsonify({"error": "Librarian's library not found"}), 404
 
-        # Validate author_ids and genre_ids
+        # Validate author_ids and genre_ids (one query per entity type)
         author_ids = form.author_ids.data or []
         genre_ids = form.genre_ids.data or []
-        if author_ids and not all(Author.query.filter_by(author_id=aid).first() for aid in author_ids):
-            return jsonify({"error": "One or more author_ids are invalid"}), 400
-        if genre_ids and not all(Genre.query.filter_by(genre_id=gid).first() for gid in genre_ids):
-            return jsonify({"error": "One or more genre_ids are invalid"}), 400
+        authors = resolve_references(Author, author_ids)
+        if authors.missing:
+            return jsonify({"error": "One or more author_ids are invalid", "missing_author_ids": authors.missing}), 400
+        genres = resolve_references(Genre, genre_ids, load=False)
+        if genres.missing:
+            return jsonify({"error": "One or more genre_ids are invalid", "missing_genre_ids": genres.missing}), 400
 
         # Handle book_image upload
         book_image_url = None
         if 'book_image' in request.files:
             file = request.files['book_image']
             if file and allowed_file(file.filename):
-                filename = f"book_{datetime.utcnow().timestamp()}_{file.filename}"
-                supabase.storage.from_('book_images').upload(
-                    path=filename,
-                    file=file.stream,
-                    file_options={"content-type": file.content_type}
-                )
-                book_image_url = supabase.storage.from_('book_images').get_public_url(filename)
+                book_image_url = ingest_image(file, 'book_images')
 
         # Parse published_date
         published_date = None
@@ -80,13 +86,13 @@ def create_book():
         db.session.flush()
 
         # Update authors' book_ids
-        for author_id in author_ids:
-            author = Author.query.filter_by(author_id=author_id).first()
-            if author:
-                author.book_ids = list(set(author.book_ids or []) | {new_book.book_id})
-                author.updated_at = datetime.utcnow()
-                db.session.add(author)
+        for author in authors.found.values():
+            author.book_ids = list(set(author.book_ids or []) | {new_book.book_id})
+            author.updated_at = datetime.utcnow()
 
+        # Authors list their book_ids
+        notify('responses', 'authors')
+        notify('counts', librarian.library_id)
         db.session.commit()
         return jsonify({"message": "Book created successfully", "book_id": str(new_book.book_id)}), 201
 
@@ -94,80 +100,133 @@ def create_book():
         db.session.rollback()
         return jsonify({"error": f"Failed to create book: {str(e)}"}), 500
 
+def filter_books(query):
+    """Apply the q, title, author_id and genre_id query-string filters shared by list and export."""
+    q = request.args.get('q')
+    title = request.args.get('title')
+    author_id = request.args.get('author_id')
+    genre_id = request.args.get('genre_id')
+    if q:
+        query = query.filter(match_books(q))
+    if title:
+        query = query.filter(Book.title.ilike(f'%{title}%'))
+    if author_id:
+        query = query.filter(Book.author_ids.contains([UUID(author_id)]))
+    if genre_id:
+        query = query.filter(Book.genre_ids.contains([UUID(genre_id)]))
+    return query
+
+@books_bp.route('/import', methods=['POST'])
+@role_required(['Librarian'])
+def import_books():
+    """Bulk-import a CSV or JSONL catalog file (multipart field 'file')."""
+    file = request.files.get('file')
+    if not file or not file.filename:
+        return jsonify({"error": "A CSV or JSONL file is required"}), 400
+    fmt = (request.form.get('format') or file.filename.rsplit('.', 1)[-1]).lower()
+    if fmt == 'ndjson':
+        fmt = 'jsonl'
+    if fmt not in IMPORT_FORMATS:
+        return jsonify({"error": f"Unsupported format; use one of {', '.join(IMPORT_FORMATS)}"}), 400
+
+    try:
+        librarian = request.current_user
+        library = Library.query.filter_by(library_id=librarian.library_id).first()
+        if not library:
+            return jsonify({"error": "Librarian's library not found"}), 404
+
+        report = import_catalog(file.stream, fmt, librarian.library_id)
+        return jsonify({"message": "Import finished", **report}), 200
+
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": f"Failed to import books: {str(e)}"}), 500
+
 @books_bp.route('', methods=['GET'])
 @role_required(['Librarian', 'Member'])
+@conditional_get(per_library=True)
 def list_books():
     try:
         user = request.current_user
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 20, type=int)
-        query = Book.query.filter_by(library_id=user.library_id)
-
-        # Apply filters
-        title = request.args.get('title')
-        author_id = request.args.get('author_id')
-        genre_id = request.args.get('genre_id')
-        if title:
-            query = query.filter(Book.title.ilike(f'%{title}%'))
-        if author_id:
-            query = query.filter(Book.author_ids.contains([UUID(author_id)]))
-        if genre_id:
-            query = query.filter(Book.genre_ids.contains([UUID(genre_id)]))
-
-        books = query.paginate(page=page, per_page=per_page, error_out=False)
+        fields = book_serializer.parse_fields(request.args.get('fields'))
+        expand = parse_expand(request.args.get('expand'), BOOK_EXPANSIONS)
+        query = filter_books(Book.query.filter_by(library_id=user.library_id)) \
+            .options(book_serializer.load_only(fields + id_fields(expand, BOOK_EXPANSIONS)))
+        sort = [(Book.title, False), (Book.book_id, False)]
+
+        # Full-text search: most relevant first, with highlighted snippets
+        q = request.args.get('q')
+        if q:
+            rank = book_rank(q)
+            query = query.add_columns(rank.label('rank'), book_headline(q).label('snippet'))
+            sort = [(rank, True), (Book.book_id, False)]
+
+        books, page_meta = paginate(query, sort, default_per_page=20, count_scope=user.library_id)
+        rows = books if q else [(book, None, None) for book in books]
+        thumbnails = variant_urls(book.book_image for book, _, _ in rows) if 'book_image_thumbnail' in fields else {}
+        render = book_serializer.compile(fields)
+        context = {"thumbnails": thumbnails}
+        # Authors and genres for the whole page, one query each
+        embed = expand_related((book for book, _, _ in rows), expand, BOOK_EXPANSIONS)
         return jsonify({
             "books": [{
-                "book_id": str(book.book_id),
-                "title": book.title,
-                "isbn": book.isbn,
-                "description": book.description,
-                "publisher_name": book.publisher_name,
-                "total_copies": book.total_copies,
-                "available_copies": book.available_copies,
-                "reserved_copies": book.reserved_copies,
-                "book_image": book.book_image,
-                "author_ids": [str(aid) for aid in (book.author_ids or [])],
-                "genre_ids": [str(gid) for gid in (book.genre_ids or [])],
-                "published_date": book.published_date.isoformat() if book.published_date else None,
-                "added_on": book.added_on.isoformat(),
-                "updated_at": book.updated_at.isoformat()
-            } for book in books.items],
-            "total": books.total,
-            "pages": books.pages,
-            "page": page
+                **render(book, context),
+                **embed(book),
+                **({"rank": rank, "snippet": snippet} if q else {})
+            } for book, rank, snippet in rows],
+            **page_meta
         }), 200
 
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": f"Failed to list books: {str(e)}"}), 500
 
+@books_bp.route('/export', methods=['GET'])
+@role_required(['Librarian'])
+def export_books():
+    """Stream the library's catalog as NDJSON or CSV, optionally gzip-compressed."""
+    fmt = request.args.get('format', 'ndjson').lower()
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({"error": f"Unsupported format; use one of {', '.join(EXPORT_FORMATS)}"}), 400
+    compress = request.args.get('gzip', 'false').lower() == 'true'
+
+    try:
+        librarian = request.current_user
+        query = filter_books(Book.query.filter_by(library_id=librarian.library_id))
+    except ValueError as e:
+        return jsonify({"error": f"Invalid filter: {str(e)}"}), 400
+
+    filename = f"books.{fmt}" + ('.gz' if compress else '')
+    response = Response(
+        stream_with_context(export_catalog(query, fmt, compress)),
+        mimetype='application/gzip' if compress else EXPORT_FORMATS[fmt]
+    )
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
 @books_bp.route('/<book_id>', methods=['GET'])
 @role_required(['Librarian', 'Member'])
+@conditional_get(per_library=True)
 def get_book(book_id):
     try:
         user = request.current_user
-        book = Book.query.filter_by(book_id=book_id, library_id=user.library_id).first()
+        fields = book_serializer.parse_fields(request.args.get('fields'), default=BOOK_DETAIL_FIELDS)
+        expand = parse_expand(request.args.get('expand'), BOOK_EXPANSIONS)
+        book = Book.query.options(book_serializer.load_only(fields + id_fields(expand, BOOK_EXPANSIONS))) \
+            .filter_by(book_id=book_id, library_id=user.library_id).first()
         if not book:
             return jsonify({"error": "Book not found"}), 404
 
-        return jsonify({
-            "book": {
-                "book_id": str(book.book_id),
-                "title": book.title,
-                "isbn": book.isbn,
-                "description": book.description,
-                "publisher_name": book.publisher_name,
-                "total_copies": book.total_copies,
-                "available_copies": book.available_copies,
-                "reserved_copies": book.reserved_copies,
-                "book_image": book.book_image,
-                "author_ids": [str(aid) for aid in (book.author_ids or [])],
-                "genre_ids": [str(gid) for gid in (book.genre_ids or [])],
-                "published_date": book.published_date.isoformat() if book.published_date else None,
-                "added_on": book.added_on.isoformat(),
-                "updated_at": book.updated_at.isoformat()
-            }
-        }), 200
+        thumbnails = variant_urls([book.book_image]) if 'book_image_thumbnail' in fields else {}
+        embed = expand_related([book], expand, BOOK_EXPANSIONS)
+        return jsonify({"book": {**book_serializer.dump(book, fields, thumbnails=thumbnails), **embed(book)}}), 200
 
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": f"Failed to get book: {str(e)}"}), 500
 
@@ -184,26 +243,25 @@ def update_book(book_id):
         if not book:
             return jsonify({"error": "Book not found"}), 404
 
-        # Validate author_ids and genre_ids
-        author_ids = form.author_ids.data if form.author_ids.data is not None else book.author_ids
-        genre_ids = form.genre_ids.data if form.genre_ids.data is not None else book.genre_ids
-        if author_ids and not all(Author.query.filter_by(author_id=aid).first() for aid in author_ids):
-            return jsonify({"error": "One or more author_ids are invalid"}), 400
-        if genre_ids and not all(Genre.query.filter_by(genre_id=gid).first() for gid in genre_ids):
-            return jsonify({"error": "One or more genre_ids are invalid"}), 400
+        # Validate author_ids and genre_ids; current authors are loaded in the same query for the book_ids update
+        author_ids = form.author_ids.data if form.author_ids.data is not None else (book.author_ids or [])
+        genre_ids = form.genre_ids.data if form.genre_ids.data is not None else (book.genre_ids or [])
+        old_author_ids = set(book.author_ids or [])
+        new_author_ids = set(author_ids)
+        authors = resolve_references(Author, list(new_author_ids | old_author_ids))
+        missing_author_ids = [str(aid) for aid in author_ids if aid not in authors.found]
+        if missing_author_ids:
+            return jsonify({"error": "One or more author_ids are invalid", "missing_author_ids": missing_author_ids}), 400
+        genres = resolve_references(Genre, genre_ids, load=False)
+        if genres.missing:
+            return jsonify({"error": "One or more genre_ids are invalid", "missing_genre_ids": genres.missing}), 400
 
         # Handle book_image upload
         book_image_url = book.book_image
         if 'book_image' in request.files:
             file = request.files['book_image']
             if file and allowed_file(file.filename):
-                filename = f"book_{datetime.utcnow().timestamp()}_{file.filename}"
-                supabase.storage.from_('book_images').upload(
-                    path=filename,
-                    file=file.stream,
-                    file_options={"content-type": file.content_type}
-                )
-                book_image_url = supabase.storage.from_('book_images').get_public_url(filename)
+                book_image_url = ingest_image(file, 'book_images')
 
         # Update book fields
         book.title = form.title.data or book.title
@@ -222,21 +280,19 @@ def update_book(book_id):
         book.updated_at = datetime.utcnow()
 
         # Update authors' book_ids
-        old_author_ids = set(book.author_ids or [])
-        new_author_ids = set(author_ids)
         for author_id in old_author_ids - new_author_ids:
-            author = Author.query.filter_by(author_id=author_id).first()
+            author = authors.found.get(author_id)
             if author:
                 author.book_ids = list(set(author.book_ids or []) - {book.book_id})
                 author.updated_at = datetime.utcnow()
-                db.session.add(author)
         for author_id in new_author_ids - old_author_ids:
-            author = Author.query.filter_by(author_id=author_id).first()
-            if author:
-                author.book_ids = list(set(author.book_ids or []) | {book.book_id})
-                author.updated_at = datetime.utcnow()
-                db.session.add(author)
+            author = authors.found[author_id]
+            author.book_ids = list(set(author.book_ids or []) | {book.book_id})
+            author.updated_at = datetime.utcnow()
 
+        # Authors list their book_ids
+        notify('responses', 'authors')
+        notify('counts', librarian.library_id)
         db.session.commit()
         return jsonify({"message": "Book updated successfully", "book_id": str(book.book_id)}), 200
 
@@ -254,14 +310,12 @@ def delete_book(book_id):
             return jsonify({"error": "Book not found"}), 404
 
         # Update authors' book_ids
-        for author_id in book.author_ids or []:
-            author = Author.query.filter_by(author_id=author_id).first()
-            if author:
-                author.book_ids = list(set(author.book_ids or []) - {book.book_id})
-                author.updated_at = datetime.utcnow()
-                db.session.add(author)
+        remove_from_arrays('authors', 'book_ids', [book.book_id])
 
         db.session.delete(book)
+        # Authors list their book_ids
+        notify('responses', 'authors')
+        notify('counts', librarian.library_id)
         db.session.commit()
         return jsonify({"message": "Book deleted successfully"}), 200
 
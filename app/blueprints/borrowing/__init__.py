@@ -1,3 +1,5 @@
 from flask import Blueprint
 
 borrowing_bp = Blueprint('borrowing', __name__, url_prefix='/borrow')
+
+from . import routes
\ No newline at end of file
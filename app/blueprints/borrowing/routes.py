@@ -3,13 +3,15 @@ from . import borrowing_bp
 from datetime import datetime, timedelta
 from .forms import BorrowForm, ReturnForm
 from ... import db
-from ...models.books import Book
 from ...models.borrow_transactions import BorrowTransaction
-from ...models.fines import Fine
 from ...models.policies import Policy
 from ...models.reservations import Reservation
 from ...models.users import User
 from ...utils.role_manager import role_required
+from ...services.inventory import checkout_reserved_copy, return_copy, add_book_id, remove_book_id
+from ...services.invalidation import notify
+from ...services.overdue import accrue_overdue_fine
+from ...services.waitlist import promote_next
 
 @borrowing_bp.route('', methods=['POST'])
 @role_required(['Librarian'])
@@ -21,12 +23,25 @@ def borrow_book():
     if not reservation:
         return jsonify({"error": "Confirmed reservation not found"}), 404
     member = User.query.filter_by(user_id=reservation.user_id).first()
-    book = Book.query.filter_by(book_id=reservation.book_id).first()
     policy = Policy.query.filter_by(library_id=member.library_id).first()
     if not policy:
         return jsonify({"error": "Library policy not found"}), 404
-    if len(member.borrowed_book_ids) >= policy.max_books_per_user:
+
+    # Claim the reservation first so two desks cannot lend against the same one
+    claimed = Reservation.query.filter_by(reservation_id=reservation.reservation_id, status='confirmed') \
+        .delete(synchronize_session=False)
+    if not claimed:
+        db.session.rollback()
+        return jsonify({"error": "Reservation was already used"}), 409
+    if not add_book_id(member.user_id, 'borrowed_book_ids', reservation.book_id, limit=policy.max_books_per_user):
+        db.session.rollback()
         return jsonify({"error": "Maximum borrow limit reached"}), 400
+    inventory = checkout_reserved_copy(reservation.book_id)
+    if not inventory.ok:
+        db.session.rollback()
+        return jsonify({"error": "No reserved copy available to lend", "reason": inventory.reason}), 409
+    remove_book_id(member.user_id, 'reserved_book_ids', reservation.book_id)
+
     borrow = BorrowTransaction(
         user_id=reservation.user_id,
         book_id=reservation.book_id,
@@ -35,12 +50,8 @@ def borrow_book():
         due_date=datetime.now() + timedelta(days=policy.max_borrow_days),
         status='borrowed'
     )
-    book.available_copies -= 1
-    book.reserved_copies -= 1
-    member.borrowed_book_ids.append(reservation.book_id)
-    member.reserved_book_ids.remove(reservation.book_id)
-    db.session.delete(reservation)
     db.session.add(borrow)
+    notify('user', member.user_id)
     db.session.commit()
     return jsonify({"message": "Book borrowed", "borrow_id": str(borrow.borrow_id)}), 201
 
@@ -51,28 +62,32 @@ def return_book(borrow_id):
     if not form.validate_on_submit():
         return jsonify({"error": form.errors}), 400
     borrow = BorrowTransaction.query.filter_by(borrow_id=borrow_id).first()
-    if not borrow or borrow.status != 'borrowed':
+    # Open loans are 'borrowed', or 'overdue' once the overdue sweep has passed them
+    if not borrow or borrow.return_date is not None:
         return jsonify({"error": "Invalid borrow transaction"}), 404
     policy = Policy.query.filter_by(library_id=borrow.library_id).first()
     if not policy:
         return jsonify({"error": "Library policy not found"}), 404
-    borrow.return_date = datetime.now()
-    borrow.status = 'returned' if borrow.return_date <= borrow.due_date else 'overdue'
-    book = Book.query.filter_by(book_id=borrow.book_id).first()
-    book.available_copies += 1
-    member = User.query.filter_by(user_id=borrow.user_id).first()
-    member.borrowed_book_ids.remove(borrow.book_id)
+    return_date = datetime.now()
+    status = 'returned' if return_date <= borrow.due_date else 'overdue'
+    # Only one return can close the transaction
+    claimed = BorrowTransaction.query.filter_by(borrow_id=borrow.borrow_id, return_date=None) \
+        .update({"status": status, "return_date": return_date}, synchronize_session=False)
+    if not claimed:
+        db.session.rollback()
+        return jsonify({"error": "Book was already returned"}), 409
+    db.session.refresh(borrow)
+    inventory = return_copy(borrow.book_id)
+    if not inventory.ok:
+        db.session.rollback()
+        return jsonify({"error": "Cannot return more copies than the library owns", "reason": inventory.reason}), 409
+    remove_book_id(borrow.user_id, 'borrowed_book_ids', borrow.book_id)
+    notify('user', borrow.user_id)
+    # The returned copy goes to the first member waiting for it, in this transaction
+    promote_next(borrow.book_id)
     if borrow.status == 'overdue':
         days_late = (borrow.return_date - borrow.due_date).days
-        fine_amount = days_late * policy.fine_per_day
-        fine = Fine(
-            borrow_id=borrow.borrow_id,
-            user_id=borrow.user_id,
-            book_id=borrow.book_id,
-            library_id=member.library_id,
-            amount=fine_amount,
-            reason='Overdue book return'
-        )
-        db.session.add(fine)
+        # Settles the fine the sweep may already have accrued for this loan
+        accrue_overdue_fine(borrow, days_late * policy.fine_per_day)
     db.session.commit()
     return jsonify({"message": "Book returned"}), 200
\ No newline at end of file
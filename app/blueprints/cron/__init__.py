@@ -0,0 +1,5 @@
+from flask import Blueprint
+
+cron_bp = Blueprint('cron', __name__, url_prefix='/cron')
+
+from . import routes
\ No newline at end of file
@@ -0,0 +1,35 @@
+from flask import request, jsonify, current_app
+import hmac
+from . import cron_bp
+from ... import db
+from ...config import Config
+from ...services.overdue import overdue_sweeper
+from ...services.reservation_expiry import reservation_expiry_worker
+
+@cron_bp.before_request
+def require_cron_secret():
+    # Vercel Cron sends "Authorization: Bearer $CRON_SECRET"; without a secret the jobs are not exposed
+    if not Config.CRON_SECRET:
+        return jsonify({"error": "Not found"}), 404
+    if not hmac.compare_digest(request.headers.get('Authorization', ''), f"Bearer {Config.CRON_SECRET}"):
+        return jsonify({"error": "Unauthorized"}), 401
+
+@cron_bp.route('/expire-reservations', methods=['GET'])
+def expire_reservations():
+    """Scheduled by vercel.json; same job as 'flask expire-reservations'."""
+    try:
+        return jsonify(reservation_expiry_worker.run_once()), 200
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.exception("Scheduled reservation expiry failed")
+        return jsonify({"error": f"Failed to expire reservations: {str(e)}"}), 500
+
+@cron_bp.route('/sweep-overdue', methods=['GET'])
+def sweep_overdue():
+    """Scheduled nightly by vercel.json; same job as 'flask sweep-overdue'."""
+    try:
+        return jsonify(overdue_sweeper.run_once()), 200
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.exception("Scheduled overdue sweep failed")
+        return jsonify({"error": f"Failed to sweep overdue loans: {str(e)}"}), 500
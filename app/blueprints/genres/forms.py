@@ -1,7 +1,11 @@
 from flask_wtf import FlaskForm
 from wtforms import StringField, TextAreaField
 from wtforms.validators import DataRequired, Length, Optional
+from ..books.forms import UUIDListField
 
 class GenreForm(FlaskForm):
     name = StringField('Name', validators=[DataRequired(), Length(min=1, max=100)])
-    description = TextAreaField('Description', validators=[Optional(), Length(max=500)])
\ No newline at end of file
+    description = TextAreaField('Description', validators=[Optional(), Length(max=500)])
+
+class GenreBulkDeleteForm(FlaskForm):
+    genre_ids = UUIDListField('Genre IDs', validators=[DataRequired()])
\ No newline at end of file
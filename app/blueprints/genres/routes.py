@@ -1,11 +1,18 @@
 from flask import request, jsonify, current_app
 from . import genres_bp
-from .forms import GenreForm
+from .forms import GenreForm, GenreBulkDeleteForm
 from ... import db
 from ...models.genres import Genre
-from ...models.books import Book
 from ...models.libraries import Library
 from ...utils.role_manager import role_required
+from ...services.search import fuzzy_match, match_threshold
+from ...services.pagination import paginate
+from ...services.serializers import genre_serializer
+from ...services.invalidation import notify
+from ...services.counts import GLOBAL_SCOPE
+from ...services.cascades import delete_genres
+from ...services.conditional import conditional_get
+from ...services.response_cache import cached_response
 from datetime import datetime
 
 @genres_bp.route('', methods=['POST'])
@@ -31,6 +38,8 @@ def create_genre():
             updated_at=datetime.utcnow()
         )
         db.session.add(new_genre)
+        notify('responses', 'genres')
+        notify('counts', GLOBAL_SCOPE)
         db.session.commit()
         return jsonify({"message": "Genre created successfully", "genre_id": str(new_genre.genre_id)}), 201
 
@@ -40,51 +49,48 @@ def create_genre():
 
 @genres_bp.route('', methods=['GET'])
 @role_required(['Librarian', 'Member'])
+@conditional_get()
+@cached_response('genres')
 def list_genres():
     try:
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 10, type=int)
-        query = Genre.query
+        fields = genre_serializer.parse_fields(request.args.get('fields'))
+        query = Genre.query.options(genre_serializer.load_only(fields))
+        sort = [(Genre.name, False), (Genre.genre_id, False)]
 
         name = request.args.get('name')
-        if name:
+        if name and request.args.get('match') == 'fuzzy':
+            condition, score = fuzzy_match(name, Genre.name, threshold=match_threshold(request.args.get('threshold')))
+            query = query.filter(condition)
+            sort = [(score, True)] + sort
+        elif name:
             query = query.filter(Genre.name.ilike(f'%{name}%'))
 
-        genres = query.paginate(page=page, per_page=per_page, error_out=False)
+        genres, page_meta = paginate(query, sort, default_per_page=10)
         return jsonify({
-            "genres": [{
-                "genre_id": str(genre.genre_id),
-                "name": genre.name,
-                "description": genre.description,
-                "created_at": genre.created_at.isoformat(),
-                "updated_at": genre.updated_at.isoformat()
-            } for genre in genres.items],
-            "total": genres.total,
-            "pages": genres.pages,
-            "page": page
+            "genres": genre_serializer.dump_many(genres, fields),
+            **page_meta
         }), 200
 
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": f"Failed to list genres: {str(e)}"}), 500
 
 @genres_bp.route('/<genre_id>', methods=['GET'])
 @role_required(['Librarian', 'Member'])
+@conditional_get()
+@cached_response('genres')
 def get_genre(genre_id):
     try:
-        genre = Genre.query.filter_by(genre_id=genre_id).first()
+        fields = genre_serializer.parse_fields(request.args.get('fields'))
+        genre = Genre.query.options(genre_serializer.load_only(fields)).filter_by(genre_id=genre_id).first()
         if not genre:
             return jsonify({"error": "Genre not found"}), 404
 
-        return jsonify({
-            "genre": {
-                "genre_id": str(genre.genre_id),
-                "name": genre.name,
-                "description": genre.description,
-                "created_at": genre.created_at.isoformat(),
-                "updated_at": genre.updated_at.isoformat()
-            }
-        }), 200
+        return jsonify({"genre": genre_serializer.dump(genre, fields)}), 200
 
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": f"Failed to get genre: {str(e)}"}), 500
 
@@ -112,6 +118,8 @@ def update_genre(genre_id):
         genre.description = form.description.data if form.description.data is not None else genre.description
         genre.updated_at = datetime.utcnow()
 
+        notify('responses', 'genres')
+        notify('counts', GLOBAL_SCOPE)
         db.session.commit()
         return jsonify({"message": "Genre updated successfully", "genre_id": str(genre.genre_id)}), 200
 
@@ -123,21 +131,41 @@ def update_genre(genre_id):
 @role_required(['Librarian'])
 def delete_genre(genre_id):
     try:
-        genre = Genre.query.filter_by(genre_id=genre_id).first()
-        if not genre:
+        deleted, libraries = delete_genres([genre_id])
+        if deleted.missing:
             return jsonify({"error": "Genre not found"}), 404
 
-        # Update books by removing genre_id
-        books = Book.query.filter(Book.genre_ids.contains([genre.genre_id])).all()
-        for book in books:
-            book.genre_ids = [gid for gid in (book.genre_ids or []) if gid != genre.genre_id]
-            book.updated_at = datetime.utcnow()
-            db.session.add(book)
-
-        db.session.delete(genre)
+        notify_genres_deleted(libraries)
         db.session.commit()
         return jsonify({"message": "Genre deleted successfully"}), 200
 
     except Exception as e:
         db.session.rollback()
-        return jsonify({"error": f"Failed to delete genre: {str(e)}"}), 500
\ No newline at end of file
+        return jsonify({"error": f"Failed to delete genre: {str(e)}"}), 500
+
+@genres_bp.route('/bulk-delete', methods=['POST'])
+@role_required(['Librarian'])
+def bulk_delete_genres():
+    form = GenreBulkDeleteForm()
+    if not form.validate_on_submit():
+        return jsonify({"error": form.errors}), 400
+
+    try:
+        deleted, libraries = delete_genres(form.genre_ids.data)
+        if deleted.missing:
+            return jsonify({"error": "Some genres were not found; nothing was deleted", "missing_genre_ids": deleted.missing}), 404
+
+        notify_genres_deleted(libraries)
+        db.session.commit()
+        return jsonify({"message": "Genres deleted successfully", "deleted": len(deleted.found)}), 200
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": f"Failed to delete genres: {str(e)}"}), 500
+
+def notify_genres_deleted(libraries):
+    notify('responses', 'genres')
+    notify('counts', GLOBAL_SCOPE)
+    # Genre-filtered book counts change in every library that had books in these genres
+    for library_id in libraries:
+        notify('counts', library_id)
\ No newline at end of file
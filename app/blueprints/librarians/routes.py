@@ -4,6 +4,8 @@ from .forms import LibrarianUpdateForm
 from ... import db
 from ...models.users import User
 from ...utils.role_manager import role_required
+from ...services.invalidation import notify
+from ...services.pagination import paginate
 from datetime import datetime
 
 @librarians_bp.route('', methods=['GET'])
@@ -11,20 +13,19 @@ from datetime import datetime
 def list_librarians():
     try:
         admin = request.current_user
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 10, type=int)
-        librarians = User.query.filter_by(library_id=admin.library_id, role='Librarian').paginate(page=page, per_page=per_page, error_out=False)
+        query = User.query.filter_by(library_id=admin.library_id, role='Librarian')
+        librarians, page_meta = paginate(query, [(User.name, False), (User.user_id, False)], default_per_page=10, count_scope=admin.library_id)
         return jsonify({
             "librarians": [{
                 "user_id": str(librarian.user_id),
                 "name": librarian.name,
                 "email": librarian.email,
                 "is_active": librarian.is_active
-            } for librarian in librarians.items],
-            "total": librarians.total,
-            "pages": librarians.pages,
-            "page": page
+            } for librarian in librarians],
+            **page_meta
         }), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": f"Failed to list librarians: {str(e)}"}), 500
 
@@ -66,6 +67,8 @@ def update_librarian(librarian_id):
             librarian.is_active = form.is_active.data
         librarian.updated_at = datetime.utcnow()
 
+        notify('user', librarian.user_id)
+        notify('counts', librarian.library_id)
         db.session.commit()
         return jsonify({"message": "Librarian updated successfully"}), 200
     except Exception as e:
@@ -81,6 +84,8 @@ def delete_librarian(librarian_id):
         if not librarian:
             return jsonify({"error": "Librarian not found"}), 404
 
+        notify('user', librarian.user_id)
+        notify('counts', librarian.library_id)
         db.session.delete(librarian)
         db.session.commit()
         return jsonify({"message": "Librarian deleted successfully"}), 200
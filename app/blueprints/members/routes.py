@@ -4,6 +4,11 @@ from .forms import MemberUpdateForm
 from ... import db
 from ...models.users import User
 from ...utils.role_manager import role_required
+from ...services.invalidation import notify
+from ...services.search import fuzzy_match, match_threshold
+from ...services.pagination import paginate
+from ...services.serializers import member_serializer
+from sqlalchemy import or_
 from datetime import datetime
 
 @members_bp.route('', methods=['GET'])
@@ -11,20 +16,26 @@ from datetime import datetime
 def list_members():
     try:
         user = request.current_user
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 10, type=int)
-        members = User.query.filter_by(library_id=user.library_id, role='Member').paginate(page=page, per_page=per_page, error_out=False)
+        fields = member_serializer.parse_fields(request.args.get('fields'))
+        query = User.query.options(member_serializer.load_only(fields)).filter_by(library_id=user.library_id, role='Member')
+        sort = [(User.name, False), (User.user_id, False)]
+
+        # Search by name or email; match=fuzzy tolerates typos and ranks by similarity
+        q = request.args.get('q')
+        if q and request.args.get('match') == 'fuzzy':
+            condition, score = fuzzy_match(q, User.name, User.email, threshold=match_threshold(request.args.get('threshold')))
+            query = query.filter(condition)
+            sort = [(score, True)] + sort
+        elif q:
+            query = query.filter(or_(User.name.ilike(f'%{q}%'), User.email.ilike(f'%{q}%')))
+
+        members, page_meta = paginate(query, sort, default_per_page=10, count_scope=user.library_id)
         return jsonify({
-            "members": [{
-                "user_id": str(member.user_id),
-                "name": member.name,
-                "email": member.email,
-                "is_active": member.is_active
-            } for member in members.items],
-            "total": members.total,
-            "pages": members.pages,
-            "page": page
+            "members": member_serializer.dump_many(members, fields),
+            **page_meta
         }), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": f"Failed to list members: {str(e)}"}), 500
 
@@ -33,15 +44,13 @@ def list_members():
 def get_member(member_id):
     try:
         user = request.current_user
-        member = User.query.filter_by(user_id=member_id, library_id=user.library_id, role='Member').first()
+        fields = member_serializer.parse_fields(request.args.get('fields'))
+        member = User.query.options(member_serializer.load_only(fields)).filter_by(user_id=member_id, library_id=user.library_id, role='Member').first()
         if not member:
             return jsonify({"error": "Member not found"}), 404
-        return jsonify({
-            "user_id": str(member.user_id),
-            "name": member.name,
-            "email": member.email,
-            "is_active": member.is_active
-        }), 200
+        return jsonify(member_serializer.dump(member, fields)), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": f"Failed to get member: {str(e)}"}), 500
 
@@ -66,6 +75,8 @@ def update_member(member_id):
             member.is_active = form.is_active.data
         member.updated_at = datetime.utcnow()
 
+        notify('user', member.user_id)
+        notify('counts', member.library_id)
         db.session.commit()
         return jsonify({"message": "Member updated successfully"}), 200
     except Exception as e:
@@ -81,6 +92,8 @@ def delete_member(member_id):
         if not member:
             return jsonify({"error": "Member not found"}), 404
 
+        notify('user', member.user_id)
+        notify('counts', member.library_id)
         db.session.delete(member)
         db.session.commit()
         return jsonify({"message": "Member deleted successfully"}), 200
@@ -1,3 +1,5 @@
 from flask import Blueprint
 
 reservation_bp = Blueprint('reservation', __name__, url_prefix='/reservations')
+
+from . import routes
\ No newline at end of file
@@ -1,13 +1,16 @@
 from flask import request, jsonify
 from . import reservation_bp
 from datetime import datetime, timedelta
+from uuid import UUID
 from .forms import ReservationForm, ReservationUpdateForm
 from ... import db
-from ...models.users import User
 from ...models.books import Book
 from ...models.reservations import Reservation
 from ...models.policies import Policy
 from ...utils.role_manager import role_required
+from ...services.inventory import reserve_copy, release_copy, add_book_id, remove_book_id
+from ...services.invalidation import notify
+from ...services.waitlist import enqueue, leave_queue, queue_position, others_waiting, promote_next
 
 @reservation_bp.route('', methods=['POST'])
 @role_required(['Member'])
@@ -16,25 +19,41 @@ def create_reservation():
     if not form.validate_on_submit():
         return jsonify({"error": form.errors}), 400
     member = request.current_user
-    book = Book.query.filter_by(book_id=form.book_id.data, library_id=member.library_id).first()
-    if not book or book.available_copies <= 0:
-        return jsonify({"error": "Book not available"}), 400
+    book_id = UUID(form.book_id.data)
     policy = Policy.query.filter_by(library_id=member.library_id).first()
     if not policy:
         return jsonify({"error": "Library policy not found"}), 404
-    existing_reservation = Reservation.query.filter_by(user_id=member.user_id, book_id=book.book_id, status='pending').first()
+    existing_reservation = Reservation.query.filter_by(user_id=member.user_id, book_id=book_id, status='pending').first()
     if existing_reservation:
         return jsonify({"error": "You already have a pending reservation for this book"}), 400
+    # A copy on the shelf belongs to the waitlist first; newcomers queue behind it
+    if others_waiting(member.user_id, book_id):
+        if not Book.query.filter_by(book_id=book_id, library_id=member.library_id).first():
+            return jsonify({"error": "Book not found"}), 404
+        position = enqueue(member.user_id, book_id, member.library_id)
+        db.session.commit()
+        return jsonify({"message": "Others are waiting for this book; added to the waitlist", "queue_position": position}), 202
+    inventory = reserve_copy(book_id, library_id=member.library_id)
+    if inventory.reason == 'unavailable':
+        # Every copy is out or held: join the waitlist instead of making the member poll
+        position = enqueue(member.user_id, book_id, member.library_id)
+        db.session.commit()
+        return jsonify({"message": "No copy available; added to the waitlist", "queue_position": position}), 202
+    if not inventory.ok:
+        db.session.rollback()
+        return jsonify({"error": "Book not found"}), 404
+    leave_queue(member.user_id, book_id)
     reservation = Reservation(
         user_id=member.user_id,
-        book_id=book.book_id,
+        book_id=inventory.book_id,
+        library_id=member.library_id,
         reserved_at=datetime.now(),
         expires_at=datetime.now() + timedelta(hours=policy.reservation_expiry_hours or 24),
         status='pending'
     )
-    book.reserved_copies += 1
-    member.reserved_book_ids.append(book.book_id)
+    add_book_id(member.user_id, 'reserved_book_ids', inventory.book_id)
     db.session.add(reservation)
+    notify('user', member.user_id)
     db.session.commit()
     return jsonify({"message": "Reservation created", "reservation_id": str(reservation.reservation_id)}), 201
 
@@ -68,18 +87,53 @@ def update_reservation(reservation_id):
     reservation = Reservation.query.filter_by(reservation_id=reservation_id).first()
     if not reservation:
         return jsonify({"error": "Reservation not found"}), 404
-    book = Book.query.filter_by(book_id=reservation.book_id).first()
-    if reservation.expires_at < datetime.now():
-        reservation.status = 'expired'
-        book.reserved_copies -= 1
-        db.session.commit()
+
+    expired = reservation.expires_at is not None and reservation.expires_at < datetime.now()
+    status = 'expired' if expired else form.status.data
+    changes = {"status": status}
+    if status == 'confirmed':
+        changes["confirmed_at"] = datetime.now()
+    # Confirming needs a pending reservation; releasing its copy is allowed once, from pending or confirmed
+    allowed = ['pending'] if status == 'confirmed' else ['pending', 'confirmed']
+    claimed = Reservation.query.filter(
+        Reservation.reservation_id == reservation.reservation_id,
+        Reservation.status.in_(allowed)
+    ).update(changes, synchronize_session=False)
+    if not claimed:
+        db.session.rollback()
+        return jsonify({"error": f"Reservation is already {reservation.status}"}), 409
+
+    if status in ('expired', 'rejected'):
+        release_copy(reservation.book_id)
+        remove_book_id(reservation.user_id, 'reserved_book_ids', reservation.book_id)
+        notify('user', reservation.user_id)
+        promote_next(reservation.book_id)
+    db.session.commit()
+    if expired:
         return jsonify({"error": "Reservation expired"}), 400
-    reservation.status = form.status.data
-    if form.status.data == 'confirmed':
-        reservation.confirmed_at = datetime.now()
-    elif form.status.data == 'rejected':
-        book.reserved_copies -= 1
-        user = User.query.filter_by(user_id=reservation.user_id).first()
-        user.reserved_book_ids.remove(book.book_id)
+    return jsonify({"message": "Reservation updated"}), 200
+
+@reservation_bp.route('/queue/<book_id>', methods=['GET'])
+@role_required(['Member'])
+def get_queue_position(book_id):
+    member = request.current_user
+    try:
+        position = queue_position(member.user_id, UUID(book_id))
+    except ValueError:
+        return jsonify({"error": "Invalid book id"}), 400
+    if position is None:
+        return jsonify({"error": "You are not on the waitlist for this book"}), 404
+    return jsonify({"book_id": book_id, "queue_position": position}), 200
+
+@reservation_bp.route('/queue/<book_id>', methods=['DELETE'])
+@role_required(['Member'])
+def leave_waitlist(book_id):
+    member = request.current_user
+    try:
+        left = leave_queue(member.user_id, UUID(book_id))
+    except ValueError:
+        return jsonify({"error": "Invalid book id"}), 400
+    if not left:
+        return jsonify({"error": "You are not on the waitlist for this book"}), 404
     db.session.commit()
-    return jsonify({"message": "Reservation updated"}), 200
\ No newline at end of file
+    return jsonify({"message": "Removed from the waitlist"}), 200
\ No newline at end of file
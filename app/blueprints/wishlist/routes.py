@@ -5,6 +5,8 @@ from ... import db
 from ...models.books import Book
 from ...models.wishlists import Wishlist
 from ...utils.role_manager import role_required
+from ...services.inventory import add_book_id, remove_book_id
+from ...services.invalidation import notify
 
 @wishlist_bp.route('', methods=['POST'])
 @role_required(['Member'])
@@ -19,7 +21,9 @@ def add_to_wishlist():
     if Wishlist.query.filter_by(user_id=member.user_id, book_id=book.book_id).first():
         return jsonify({"error": "Book already in wishlist"}), 400
     new_wishlist = Wishlist(user_id=member.user_id, book_id=book.book_id)
-    member.wishlist_book_ids.append(book.book_id)
+    # current_user may be a cached snapshot: change the row in SQL and drop the cached identity
+    add_book_id(member.user_id, 'wishlist_book_ids', book.book_id)
+    notify('user', member.user_id)
     db.session.add(new_wishlist)
     db.session.commit()
     return jsonify({"message": "Book added to wishlist", "wishlist_id": str(new_wishlist.wishlist_id)}), 201
@@ -44,7 +48,8 @@ def remove_from_wishlist(wishlist_id):
     wishlist = Wishlist.query.filter_by(wishlist_id=wishlist_id, user_id=member.user_id).first()
     if not wishlist:
         return jsonify({"error": "Wishlist item not found"}), 404
-    member.wishlist_book_ids.remove(wishlist.book_id)
+    remove_book_id(member.user_id, 'wishlist_book_ids', wishlist.book_id)
+    notify('user', member.user_id)
     db.session.delete(wishlist)
     db.session.commit()
     return jsonify({"message": "Book removed from wishlist"}), 200
\ No newline at end of file
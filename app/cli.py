@@ -0,0 +1,86 @@
+import click
+from flask import current_app
+
+@click.command('send-emails')
+def send_emails():
+    """Drain the email outbox once (for deployments without background threads)."""
+    from .services.mailer import outbox_worker
+    processed = outbox_worker.run_once()
+    click.echo(f"Processed {processed} outbox emails: {outbox_worker.stats()}")
+
+@click.command('sweep-otps')
+def sweep_otps():
+    """Remove expired OTPs from the configured OTP store."""
+    from .services.otp_store import otp_store
+    click.echo(f"Removed {otp_store.sweep()} expired OTPs")
+
+@click.command('import-books')
+@click.argument('path', type=click.File('rb'))
+@click.option('--library-id', required=True, type=click.UUID, help='Library the books are added to.')
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'jsonl']), help='Defaults to the file extension.')
+@click.option('--chunk-size', type=int, default=None, help='Rows per transaction.')
+def import_books(path, library_id, fmt, chunk_size):
+    """Bulk-import a CSV or JSONL catalog file into a library."""
+    from .services.catalog_import import import_catalog
+    fmt = fmt or ('csv' if path.name.lower().endswith('.csv') else 'jsonl')
+
+    def progress(report):
+        click.echo(f"{report['processed']} rows, {report['imported']} imported, {report['rows_per_second']} rows/s", err=True)
+
+    report = import_catalog(path, fmt, library_id, chunk_size=chunk_size, progress=progress)
+    for error in report['errors']:
+        click.echo(f"line {error['line']}: {error['error']}", err=True)
+    click.echo(
+        f"Imported {report['imported']} of {report['processed']} rows "
+        f"({report['skipped']} skipped, {report['failed']} failed) "
+        f"in {report['elapsed_seconds']}s, {report['rows_per_second']} rows/s"
+    )
+
+@click.command('check-query-plans')
+@click.option('--create-schema', is_flag=True, help='Create missing tables and indexes from the models first (scratch databases, e.g. CI).')
+def check_query_plans(create_schema):
+    """Fail if an array-membership filter can no longer use its GIN index."""
+    from . import db
+    from .services.query_plans import check_array_filters
+    if create_schema:
+        db.create_all()
+    failures = 0
+    for name, scanned in check_array_filters().items():
+        if scanned:
+            failures += 1
+            click.echo(f"FAIL {name}: sequential scan on {', '.join(scanned)}")
+        else:
+            click.echo(f"ok   {name}")
+    if failures:
+        raise SystemExit(1)
+
+@click.command('expire-reservations')
+@click.option('--batch-size', type=int, default=None, help='Reservations per transaction.')
+def expire_reservations(batch_size):
+    """Expire reservations past their pickup window and promote waitlisted members."""
+    from .services.reservation_expiry import reservation_expiry_worker
+    report = reservation_expiry_worker.run_once(batch_size=batch_size)
+    click.echo(
+        f"Expired {report['expired']} reservations, promoted {report['promoted']} from waitlists "
+        f"in {report['batches']} batches, {report['elapsed_seconds']}s "
+        f"(slowest batch {report['slowest_batch_seconds']}s)"
+    )
+
+@click.command('sweep-overdue')
+def sweep_overdue():
+    """Mark loans past their due date overdue and accrue their fines."""
+    from .services.overdue import overdue_sweeper
+    report = overdue_sweeper.run_once()
+    click.echo(
+        f"Marked {report['marked_overdue']} loans overdue and accrued {report['fines_accrued']} fines "
+        f"across {report['libraries']} libraries in {report['elapsed_seconds']}s "
+        f"(slowest library {report['slowest_library_seconds']}s)"
+    )
+
+def register_commands(app):
+    app.cli.add_command(send_emails)
+    app.cli.add_command(sweep_otps)
+    app.cli.add_command(import_books)
+    app.cli.add_command(check_query_plans)
+    app.cli.add_command(expire_reservations)
+    app.cli.add_command(sweep_overdue)
@@ -25,12 +25,55 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URI")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # Identity cache: the long TTL only applies while the invalidation listener's heartbeat is arriving
+    IDENTITY_CACHE_TTL = int(os.getenv("IDENTITY_CACHE_TTL", 900))
+    IDENTITY_CACHE_FALLBACK_TTL = int(os.getenv("IDENTITY_CACHE_FALLBACK_TTL", 60))
+    IDENTITY_CACHE_SIZE = int(os.getenv("IDENTITY_CACHE_SIZE", 4096))
+
+    # OTP store: "database" (otp_verifications table) or "memory" (single-node only)
+    OTP_STORE = os.getenv("OTP_STORE", "database")
+    OTP_TTL_MINUTES = int(os.getenv("OTP_TTL_MINUTES", 5))
+    OTP_SWEEP_INTERVAL = int(os.getenv("OTP_SWEEP_INTERVAL", 300))
+
+    # Rate limiting: "postgres" (shared across workers and instances) or "memory" (per process; single-worker setups only,
+    # since every process would get its own allowance)
+    RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+    RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "postgres")
+    # Reverse proxies in front of the app whose X-Forwarded-For entry is trusted; 0 uses the socket address
+    TRUSTED_PROXY_HOPS = int(os.getenv("TRUSTED_PROXY_HOPS", 1))
+
+    # Cross-worker cache invalidation (Postgres LISTEN/NOTIFY)
+    CACHE_INVALIDATION_CHANNEL = os.getenv("CACHE_INVALIDATION_CHANNEL", "cache_invalidation")
+    # Serverless instances (Vercel) are frozen between requests, so their listener thread can't keep up
+    CACHE_INVALIDATION_LISTENER = os.getenv("CACHE_INVALIDATION_LISTENER", "false" if os.getenv("VERCEL") else "true").lower() == "true"
+
     # WTForms
     WTF_CSRF_ENABLED = False
 
     # Storage
     S3_ENDPOINT = os.getenv("SUPABASE_S3_ENDPOINT")
     S3_REGION = os.getenv("SUPABASE_S3_REGION")
+    IMAGE_INGEST_WORKERS = int(os.getenv("IMAGE_INGEST_WORKERS", 4))
+    # Background uploads need a long-lived process; serverless deployments (Vercel) upload in the request
+    IMAGE_INGEST_ASYNC = os.getenv("IMAGE_INGEST_ASYNC", "false" if os.getenv("VERCEL") else "true").lower() == "true"
+    IMAGE_INGEST_RETRY_PENDING_AFTER = int(os.getenv("IMAGE_INGEST_RETRY_PENDING_AFTER", 600))
+
+    # Bulk catalog import
+    CATALOG_IMPORT_CHUNK_SIZE = int(os.getenv("CATALOG_IMPORT_CHUNK_SIZE", 500))
+
+    # Fuzzy name search: minimum pg_trgm word similarity (0-1) for a match
+    FUZZY_MATCH_THRESHOLD = float(os.getenv("FUZZY_MATCH_THRESHOLD", 0.4))
+
+    # Listing totals (count=cached / count=estimate)
+    COUNT_CACHE_TTL = int(os.getenv("COUNT_CACHE_TTL", 30))
+    COUNT_CACHE_SIZE = int(os.getenv("COUNT_CACHE_SIZE", 2048))
+    COUNT_EXACT_BELOW = int(os.getenv("COUNT_EXACT_BELOW", 1000))
+
+    # Response cache for genre/author reads: "memory" (per process), "file" (shared by workers on a host) or "none"
+    RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "memory")
+    RESPONSE_CACHE_DIR = os.getenv("RESPONSE_CACHE_DIR", "/tmp/lms-response-cache")
+    RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", 300))
+    RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", 1024))
 
     # Email configuration
     MAIL_SERVER = 'smtp.gmail.com'
@@ -38,4 +81,35 @@ class Config:
     MAIL_USE_SSL = True
     MAIL_USERNAME = os.getenv("EMAIL_ID")
     MAIL_PASSWORD = os.getenv("EMAIl_APP_PASSWORD")
-    MAIL_DEFAULT_SENDER = os.getenv("EMAIL_ID")
\ No newline at end of file
+    MAIL_DEFAULT_SENDER = os.getenv("EMAIL_ID")
+
+    # SMTP delivery (used by the outbox mailer)
+    SMTP_SERVER = os.getenv("SMTP_SERVER", "smtp.gmail.com")
+    SMTP_PORT = int(os.getenv("SMTP_PORT", 587))
+    SMTP_TIMEOUT = int(os.getenv("SMTP_TIMEOUT", 30))
+    SMTP_SENDER_EMAIL = os.getenv("EMAIL_ID")
+    SMTP_SENDER_PASSWORD = os.getenv("EMAIl_APP_PASSWORD")
+
+    # Email outbox
+    EMAIL_OUTBOX_WORKER = os.getenv("EMAIL_OUTBOX_WORKER", "true").lower() == "true"
+    # Send a request's emails right after it commits; serverless instances (Vercel) freeze the worker thread
+    EMAIL_OUTBOX_INLINE = os.getenv(
+        "EMAIL_OUTBOX_INLINE", "true" if os.getenv("VERCEL") or not EMAIL_OUTBOX_WORKER else "false"
+    ).lower() == "true"
+    EMAIL_OUTBOX_POLL_INTERVAL = int(os.getenv("EMAIL_OUTBOX_POLL_INTERVAL", 10))
+    EMAIL_OUTBOX_BATCH_SIZE = int(os.getenv("EMAIL_OUTBOX_BATCH_SIZE", 50))
+    EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv("EMAIL_OUTBOX_MAX_ATTEMPTS", 8))
+    EMAIL_OUTBOX_SMTP_CONNECTIONS = int(os.getenv("EMAIL_OUTBOX_SMTP_CONNECTIONS", 2))
+
+    # Scheduled jobs: /cron/* answer only requests carrying "Authorization: Bearer <CRON_SECRET>" (Vercel Cron sends it)
+    CRON_SECRET = os.getenv("CRON_SECRET")
+
+    # Reservation expiry; on Vercel the cron in vercel.json runs it instead of a thread that is frozen between requests
+    RESERVATION_EXPIRY_WORKER = os.getenv("RESERVATION_EXPIRY_WORKER", "false" if os.getenv("VERCEL") else "true").lower() == "true"
+    RESERVATION_EXPIRY_INTERVAL = int(os.getenv("RESERVATION_EXPIRY_INTERVAL", 60))
+    RESERVATION_EXPIRY_BATCH_SIZE = int(os.getenv("RESERVATION_EXPIRY_BATCH_SIZE", 500))
+
+    # Overdue loans and fines; on Vercel the nightly cron in vercel.json runs it, elsewhere schedule 'flask sweep-overdue'
+    # or keep the thread (it sweeps at startup, then every interval)
+    OVERDUE_SWEEP_WORKER = os.getenv("OVERDUE_SWEEP_WORKER", "false" if os.getenv("VERCEL") else "true").lower() == "true"
+    OVERDUE_SWEEP_INTERVAL = int(os.getenv("OVERDUE_SWEEP_INTERVAL", 86400))
\ No newline at end of file
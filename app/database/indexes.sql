@@ -17,4 +17,29 @@ CREATE INDEX idx_fines_user_id ON fines(user_id);
 CREATE INDEX idx_fines_borrow_id ON fines(borrow_id);
 CREATE INDEX idx_document_uploads_user_id ON document_uploads(user_id);
 CREATE INDEX idx_document_uploads_book_id ON document_uploads(book_id);
-CREATE INDEX idx_document_uploads_library_id ON document_uploads(library_id);
\ No newline at end of file
+CREATE INDEX idx_document_uploads_library_id ON document_uploads(library_id);
+CREATE INDEX idx_email_outbox_pending ON email_outbox(next_attempt_at) WHERE status = 'pending';
+CREATE INDEX idx_otp_verifications_user_otp ON otp_verifications(user_id, otp);
+CREATE INDEX idx_otp_verifications_expires_at ON otp_verifications(expires_at);
+CREATE INDEX idx_rate_limit_counters_expires_at ON rate_limit_counters(expires_at);
+CREATE INDEX idx_image_assets_original_url ON image_assets(original_url);
+CREATE INDEX idx_books_search_vector ON books USING GIN (search_vector);
+CREATE INDEX idx_authors_name_trgm ON authors USING GIN (name gin_trgm_ops);
+CREATE INDEX idx_genres_name_trgm ON genres USING GIN (name gin_trgm_ops);
+CREATE INDEX idx_users_name_trgm ON users USING GIN (name gin_trgm_ops);
+CREATE INDEX idx_users_email_trgm ON users USING GIN (email gin_trgm_ops);
+CREATE INDEX idx_books_library_title_id ON books(library_id, title, book_id);
+CREATE INDEX idx_authors_name_id ON authors(name, author_id);
+CREATE INDEX idx_genres_name_id ON genres(name, genre_id);
+CREATE INDEX idx_users_library_role_name_id ON users(library_id, role, name, user_id);
+CREATE INDEX idx_books_author_ids ON books USING GIN (author_ids);
+CREATE INDEX idx_books_genre_ids ON books USING GIN (genre_ids);
+CREATE INDEX idx_authors_book_ids ON authors USING GIN (book_ids);
+CREATE INDEX idx_users_preferred_genre_ids ON users USING GIN (preferred_genre_ids);
+CREATE INDEX idx_users_borrowed_book_ids ON users USING GIN (borrowed_book_ids);
+CREATE INDEX idx_users_reserved_book_ids ON users USING GIN (reserved_book_ids);
+CREATE INDEX idx_users_wishlist_book_ids ON users USING GIN (wishlist_book_ids);
+CREATE INDEX idx_reservation_queue_book_order ON reservation_queue(book_id, reserved_at, queue_id);
+CREATE INDEX idx_reservations_due ON reservations(expires_at) WHERE status IN ('pending', 'confirmed');
+CREATE UNIQUE INDEX idx_fines_overdue_borrow_id ON fines(borrow_id) WHERE reason = 'Overdue book return';
+CREATE INDEX idx_borrow_transactions_open_due ON borrow_transactions(library_id, due_date) WHERE return_date IS NULL;
@@ -0,0 +1,17 @@
+-- Email outbox, drained by the background mailer
+CREATE TABLE IF NOT EXISTS email_outbox (
+    email_id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    recipient TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    body TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending' CHECK (status IN ('pending', 'sent', 'failed')),
+    attempts INT NOT NULL DEFAULT 0,
+    last_error TEXT,
+    next_attempt_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
+    sent_at TIMESTAMPTZ
+);
+
+CREATE INDEX IF NOT EXISTS idx_email_outbox_pending ON email_outbox(next_attempt_at) WHERE status = 'pending';
+
+ALTER TABLE email_outbox ENABLE ROW LEVEL SECURITY;
@@ -0,0 +1,3 @@
+-- OTP lookups by (user_id, otp) and the expiry sweeper
+CREATE INDEX IF NOT EXISTS idx_otp_verifications_user_otp ON otp_verifications(user_id, otp);
+CREATE INDEX IF NOT EXISTS idx_otp_verifications_expires_at ON otp_verifications(expires_at);
@@ -0,0 +1,13 @@
+-- Sliding-window rate limit counters (RATE_LIMIT_BACKEND=postgres)
+-- UNLOGGED: counters are disposable and losing them on crash only resets the windows
+CREATE UNLOGGED TABLE IF NOT EXISTS rate_limit_counters (
+    key TEXT NOT NULL,
+    window_start BIGINT NOT NULL,
+    count INT NOT NULL DEFAULT 0,
+    expires_at TIMESTAMPTZ NOT NULL,
+    PRIMARY KEY (key, window_start)
+);
+
+CREATE INDEX IF NOT EXISTS idx_rate_limit_counters_expires_at ON rate_limit_counters(expires_at);
+
+ALTER TABLE rate_limit_counters ENABLE ROW LEVEL SECURITY;
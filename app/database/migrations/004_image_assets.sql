@@ -0,0 +1,22 @@
+-- Uploaded images, deduplicated by content hash, with their resized variants
+CREATE TABLE IF NOT EXISTS image_assets (
+    bucket TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    content_type TEXT,
+    original_url TEXT NOT NULL,
+    list_url TEXT,
+    thumbnail_url TEXT,
+    status TEXT NOT NULL DEFAULT 'pending' CHECK (status IN ('pending', 'ready', 'failed')),
+    created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (bucket, content_hash)
+);
+
+CREATE INDEX IF NOT EXISTS idx_image_assets_original_url ON image_assets(original_url);
+
+CREATE TRIGGER update_image_assets_updated_at
+BEFORE UPDATE ON image_assets
+FOR EACH ROW
+EXECUTE FUNCTION update_updated_at_column();
+
+ALTER TABLE image_assets ENABLE ROW LEVEL SECURITY;
@@ -0,0 +1,51 @@
+-- Ranked full-text search over books (title, author names, publisher, description)
+ALTER TABLE books ADD COLUMN IF NOT EXISTS search_vector TSVECTOR;
+
+-- Full-text search document for a book: title, author names, publisher, description (in weight order)
+CREATE OR REPLACE FUNCTION book_search_vector(book_title TEXT, book_description TEXT, book_publisher TEXT, book_author_ids UUID[])
+RETURNS TSVECTOR AS $$
+    SELECT setweight(to_tsvector('english', coalesce(book_title, '')), 'A') ||
+           setweight(to_tsvector('english', coalesce((SELECT string_agg(name, ' ') FROM authors WHERE author_id = ANY(book_author_ids)), '')), 'B') ||
+           setweight(to_tsvector('english', coalesce(book_publisher, '')), 'C') ||
+           setweight(to_tsvector('english', coalesce(book_description, '')), 'D');
+$$ LANGUAGE sql STABLE;
+
+-- Trigger function for keeping books.search_vector current
+CREATE OR REPLACE FUNCTION update_book_search_vector()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.search_vector = book_search_vector(NEW.title, NEW.description, NEW.publisher_name, NEW.author_ids);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Trigger function for re-indexing an author's books when the author is renamed
+CREATE OR REPLACE FUNCTION update_author_books_search_vector()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE books
+    SET search_vector = book_search_vector(title, description, publisher_name, author_ids)
+    WHERE author_ids @> ARRAY[NEW.author_id];
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Trigger for search_vector
+CREATE TRIGGER update_books_search_vector
+BEFORE INSERT OR UPDATE OF title, description, publisher_name, author_ids ON books
+FOR EACH ROW
+EXECUTE FUNCTION update_book_search_vector();
+
+-- Trigger for search_vector
+CREATE TRIGGER update_authors_books_search_vector
+AFTER UPDATE OF name ON authors
+FOR EACH ROW
+WHEN (OLD.name IS DISTINCT FROM NEW.name)
+EXECUTE FUNCTION update_author_books_search_vector();
+
+-- Backfill without bumping every book's updated_at
+ALTER TABLE books DISABLE TRIGGER update_books_updated_at;
+UPDATE books SET search_vector = book_search_vector(title, description, publisher_name, author_ids);
+ALTER TABLE books ENABLE TRIGGER update_books_updated_at;
+
+CREATE INDEX IF NOT EXISTS idx_books_search_vector ON books USING GIN (search_vector);
@@ -0,0 +1,7 @@
+-- Trigram indexes for fuzzy author, genre and member lookups (also serve ILIKE '%...%')
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS idx_authors_name_trgm ON authors USING GIN (name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_genres_name_trgm ON genres USING GIN (name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_users_name_trgm ON users USING GIN (name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_users_email_trgm ON users USING GIN (email gin_trgm_ops);
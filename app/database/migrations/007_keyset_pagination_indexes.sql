@@ -0,0 +1,5 @@
+-- Composite indexes matching the keyset pagination sort keys (sort column, primary key)
+CREATE INDEX IF NOT EXISTS idx_books_library_title_id ON books(library_id, title, book_id);
+CREATE INDEX IF NOT EXISTS idx_authors_name_id ON authors(name, author_id);
+CREATE INDEX IF NOT EXISTS idx_genres_name_id ON genres(name, genre_id);
+CREATE INDEX IF NOT EXISTS idx_users_library_role_name_id ON users(library_id, role, name, user_id);
@@ -0,0 +1,79 @@
+-- Per-library catalog versions for ETag / Last-Modified validators on catalog reads
+CREATE TABLE IF NOT EXISTS catalog_versions (
+    scope TEXT PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
+);
+ALTER TABLE catalog_versions ENABLE ROW LEVEL SECURITY;
+
+-- Bump the catalog version of each scope (a library_id, or 'global'); Last-Modified never moves backwards
+CREATE OR REPLACE FUNCTION bump_catalog_versions(scopes TEXT[])
+RETURNS VOID AS $$
+    INSERT INTO catalog_versions (scope, version, updated_at)
+    SELECT scope, 1, clock_timestamp()
+    FROM (SELECT DISTINCT unnest(scopes) AS scope) AS changed
+    WHERE scope IS NOT NULL
+    ORDER BY scope
+    ON CONFLICT (scope) DO UPDATE
+    SET version = catalog_versions.version + 1,
+        updated_at = GREATEST(catalog_versions.updated_at, EXCLUDED.updated_at);
+$$ LANGUAGE sql;
+
+-- Trigger function for bumping the version of every library whose books a statement changed
+CREATE OR REPLACE FUNCTION bump_books_catalog_version()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM bump_catalog_versions(ARRAY(SELECT library_id::TEXT FROM new_rows));
+    ELSIF TG_OP = 'UPDATE' THEN
+        PERFORM bump_catalog_versions(ARRAY(SELECT library_id::TEXT FROM new_rows UNION SELECT library_id::TEXT FROM old_rows));
+    ELSE
+        PERFORM bump_catalog_versions(ARRAY(SELECT library_id::TEXT FROM old_rows));
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Trigger function for bumping the global version (authors, genres, image variants)
+CREATE OR REPLACE FUNCTION bump_global_catalog_version()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM bump_catalog_versions(ARRAY['global']);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Triggers for catalog_versions (transition tables need one trigger per event)
+CREATE TRIGGER bump_books_catalog_version_insert
+AFTER INSERT ON books
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION bump_books_catalog_version();
+
+CREATE TRIGGER bump_books_catalog_version_update
+AFTER UPDATE ON books
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION bump_books_catalog_version();
+
+CREATE TRIGGER bump_books_catalog_version_delete
+AFTER DELETE ON books
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION bump_books_catalog_version();
+
+CREATE TRIGGER bump_authors_catalog_version
+AFTER INSERT OR UPDATE OR DELETE ON authors
+FOR EACH STATEMENT
+EXECUTE FUNCTION bump_global_catalog_version();
+
+CREATE TRIGGER bump_genres_catalog_version
+AFTER INSERT OR UPDATE OR DELETE ON genres
+FOR EACH STATEMENT
+EXECUTE FUNCTION bump_global_catalog_version();
+
+-- Thumbnails appear in listings once their variants are ready
+CREATE TRIGGER bump_image_assets_catalog_version
+AFTER UPDATE OF status ON image_assets
+FOR EACH STATEMENT
+EXECUTE FUNCTION bump_global_catalog_version();
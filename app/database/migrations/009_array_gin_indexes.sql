@@ -0,0 +1,8 @@
+-- GIN indexes for @> / && filters on the UUID array columns
+CREATE INDEX IF NOT EXISTS idx_books_author_ids ON books USING GIN (author_ids);
+CREATE INDEX IF NOT EXISTS idx_books_genre_ids ON books USING GIN (genre_ids);
+CREATE INDEX IF NOT EXISTS idx_authors_book_ids ON authors USING GIN (book_ids);
+CREATE INDEX IF NOT EXISTS idx_users_preferred_genre_ids ON users USING GIN (preferred_genre_ids);
+CREATE INDEX IF NOT EXISTS idx_users_borrowed_book_ids ON users USING GIN (borrowed_book_ids);
+CREATE INDEX IF NOT EXISTS idx_users_reserved_book_ids ON users USING GIN (reserved_book_ids);
+CREATE INDEX IF NOT EXISTS idx_users_wishlist_book_ids ON users USING GIN (wishlist_book_ids);
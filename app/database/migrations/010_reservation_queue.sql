@@ -0,0 +1,12 @@
+-- Per-book reservation waitlist, served first come first served when copies free up
+CREATE TABLE IF NOT EXISTS reservation_queue (
+    queue_id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    book_id UUID NOT NULL REFERENCES books(book_id) ON DELETE CASCADE,
+    user_id UUID NOT NULL REFERENCES users(user_id) ON DELETE CASCADE,
+    library_id UUID NOT NULL REFERENCES libraries(library_id) ON DELETE CASCADE,
+    reserved_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (book_id, user_id)
+);
+ALTER TABLE reservation_queue ENABLE ROW LEVEL SECURITY;
+
+CREATE INDEX IF NOT EXISTS idx_reservation_queue_book_order ON reservation_queue(book_id, reserved_at, queue_id);
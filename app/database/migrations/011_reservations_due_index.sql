@@ -0,0 +1,2 @@
+-- Partial index for the reservation expiry job: only live holds, ordered by expiry
+CREATE INDEX IF NOT EXISTS idx_reservations_due ON reservations(expires_at) WHERE status IN ('pending', 'confirmed');
@@ -0,0 +1,5 @@
+-- Open loans by library and due date, for the overdue sweep
+CREATE INDEX IF NOT EXISTS idx_borrow_transactions_open_due ON borrow_transactions(library_id, due_date) WHERE return_date IS NULL;
+
+-- One overdue fine per loan, so the sweep and returns can upsert it
+CREATE UNIQUE INDEX IF NOT EXISTS idx_fines_overdue_borrow_id ON fines(borrow_id) WHERE reason = 'Overdue book return';
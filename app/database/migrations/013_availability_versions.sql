@@ -0,0 +1,52 @@
+-- Copy counters (available_copies / reserved_copies) are versioned apart from the catalog, in
+-- 16 shard rows per library picked by backend pid. Loans and returns then never queue on the
+-- library's catalog_versions row, and concurrent ones rarely share a shard row.
+CREATE TABLE IF NOT EXISTS availability_versions (
+    library_id UUID NOT NULL REFERENCES libraries(library_id) ON DELETE CASCADE,
+    shard SMALLINT NOT NULL,
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (library_id, shard)
+);
+ALTER TABLE availability_versions ENABLE ROW LEVEL SECURITY;
+
+-- Bump this backend's shard of each library's availability version
+CREATE OR REPLACE FUNCTION bump_availability_versions(library_ids UUID[])
+RETURNS VOID AS $$
+    INSERT INTO availability_versions (library_id, shard, version, updated_at)
+    SELECT library_id, pg_backend_pid() % 16, 1, clock_timestamp()
+    FROM (SELECT DISTINCT unnest(library_ids) AS library_id) AS changed
+    WHERE library_id IS NOT NULL
+    ORDER BY library_id
+    ON CONFLICT (library_id, shard) DO UPDATE
+    SET version = availability_versions.version + 1,
+        updated_at = GREATEST(availability_versions.updated_at, EXCLUDED.updated_at);
+$$ LANGUAGE sql;
+
+-- Updates bump the catalog version only when something other than the copy counters changed
+CREATE OR REPLACE FUNCTION bump_books_catalog_version()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM bump_catalog_versions(ARRAY(SELECT library_id::TEXT FROM new_rows));
+    ELSIF TG_OP = 'UPDATE' THEN
+        PERFORM bump_catalog_versions(ARRAY(
+            SELECT library_id::TEXT FROM (
+                SELECT old_rows.library_id AS old_library_id, new_rows.library_id AS new_library_id
+                FROM old_rows JOIN new_rows ON new_rows.book_id = old_rows.book_id
+                WHERE to_jsonb(old_rows) - '{available_copies,reserved_copies,updated_at}'::TEXT[]
+                      IS DISTINCT FROM to_jsonb(new_rows) - '{available_copies,reserved_copies,updated_at}'::TEXT[]
+            ) AS changed, LATERAL (VALUES (old_library_id), (new_library_id)) AS libraries(library_id)
+        ));
+        PERFORM bump_availability_versions(ARRAY(
+            SELECT new_rows.library_id
+            FROM old_rows JOIN new_rows ON new_rows.book_id = old_rows.book_id
+            WHERE (old_rows.available_copies, old_rows.reserved_copies)
+                  IS DISTINCT FROM (new_rows.available_copies, new_rows.reserved_copies)
+        ));
+    ELSE
+        PERFORM bump_catalog_versions(ARRAY(SELECT library_id::TEXT FROM old_rows));
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,3 @@
+-- Outbox bodies carry OTPs and temporary passwords; the mailer now redacts them once an email is
+-- sent or given up on. Redact the rows it finished before that.
+UPDATE email_outbox SET body = '[redacted]' WHERE status IN ('sent', 'failed') AND body <> '[redacted]';
@@ -11,4 +11,10 @@ ALTER TABLE wishlists ENABLE ROW LEVEL SECURITY;
 ALTER TABLE reviews ENABLE ROW LEVEL SECURITY;
 ALTER TABLE tickets ENABLE ROW LEVEL SECURITY;
 ALTER TABLE fines ENABLE ROW LEVEL SECURITY;
-ALTER TABLE document_uploads ENABLE ROW LEVEL SECURITY;
\ No newline at end of file
+ALTER TABLE document_uploads ENABLE ROW LEVEL SECURITY;
+ALTER TABLE email_outbox ENABLE ROW LEVEL SECURITY;
+ALTER TABLE rate_limit_counters ENABLE ROW LEVEL SECURITY;
+ALTER TABLE image_assets ENABLE ROW LEVEL SECURITY;
+ALTER TABLE catalog_versions ENABLE ROW LEVEL SECURITY;
+ALTER TABLE reservation_queue ENABLE ROW LEVEL SECURITY;
+ALTER TABLE availability_versions ENABLE ROW LEVEL SECURITY;
\ No newline at end of file
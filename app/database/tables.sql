@@ -1,6 +1,9 @@
 -- Enable UUID extension
 CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
 
+-- Enable trigram matching (fuzzy name search)
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
 -- 1. LIBRARIES Table
 CREATE TABLE libraries (
     library_id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
@@ -67,6 +70,7 @@ CREATE TABLE books (
     author_ids UUID[] DEFAULT '{}',
     genre_ids UUID[] DEFAULT '{}',
     published_date TIMESTAMPTZ,
+    search_vector TSVECTOR,
     added_on TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
 );
@@ -170,4 +174,72 @@ CREATE TABLE otp_verifications (
     refresh_token TEXT NOT NULL,
     expires_at TIMESTAMP WITH TIME ZONE NOT NULL,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
-);
\ No newline at end of file
+);
+
+-- Email outbox, drained by the background mailer
+CREATE TABLE email_outbox (
+    email_id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    recipient TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    body TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending' CHECK (status IN ('pending', 'sent', 'failed')),
+    attempts INT NOT NULL DEFAULT 0,
+    last_error TEXT,
+    next_attempt_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
+    sent_at TIMESTAMPTZ
+);
+
+
+-- Sliding-window rate limit counters (RATE_LIMIT_BACKEND=postgres)
+CREATE UNLOGGED TABLE rate_limit_counters (
+    key TEXT NOT NULL,
+    window_start BIGINT NOT NULL,
+    count INT NOT NULL DEFAULT 0,
+    expires_at TIMESTAMPTZ NOT NULL,
+    PRIMARY KEY (key, window_start)
+);
+
+
+-- Uploaded images, deduplicated by content hash, with their resized variants
+CREATE TABLE image_assets (
+    bucket TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    content_type TEXT,
+    original_url TEXT NOT NULL,
+    list_url TEXT,
+    thumbnail_url TEXT,
+    status TEXT NOT NULL DEFAULT 'pending' CHECK (status IN ('pending', 'ready', 'failed')),
+    created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (bucket, content_hash)
+);
+
+
+-- Catalog change counters behind the ETag / Last-Modified validators; bumped by triggers
+CREATE TABLE catalog_versions (
+    scope TEXT PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
+);
+
+
+-- Copy counter versions, sharded by backend so loans in one library don't queue on a single row
+CREATE TABLE availability_versions (
+    library_id UUID NOT NULL REFERENCES libraries(library_id) ON DELETE CASCADE,
+    shard SMALLINT NOT NULL,
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (library_id, shard)
+);
+
+
+-- Per-book reservation waitlist, served first come first served when copies free up
+CREATE TABLE reservation_queue (
+    queue_id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    book_id UUID NOT NULL REFERENCES books(book_id) ON DELETE CASCADE,
+    user_id UUID NOT NULL REFERENCES users(user_id) ON DELETE CASCADE,
+    library_id UUID NOT NULL REFERENCES libraries(library_id) ON DELETE CASCADE,
+    reserved_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (book_id, user_id)
+);
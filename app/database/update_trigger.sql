@@ -59,4 +59,151 @@ EXECUTE FUNCTION update_updated_at_column();
 CREATE TRIGGER update_document_uploads_updated_at
 BEFORE UPDATE ON document_uploads
 FOR EACH ROW
-EXECUTE FUNCTION update_updated_at_column();
\ No newline at end of file
+EXECUTE FUNCTION update_updated_at_column();
+
+-- Trigger for updated_at
+CREATE TRIGGER update_image_assets_updated_at
+BEFORE UPDATE ON image_assets
+FOR EACH ROW
+EXECUTE FUNCTION update_updated_at_column();
+
+-- Full-text search document for a book: title, author names, publisher, description (in weight order)
+CREATE OR REPLACE FUNCTION book_search_vector(book_title TEXT, book_description TEXT, book_publisher TEXT, book_author_ids UUID[])
+RETURNS TSVECTOR AS $$
+    SELECT setweight(to_tsvector('english', coalesce(book_title, '')), 'A') ||
+           setweight(to_tsvector('english', coalesce((SELECT string_agg(name, ' ') FROM authors WHERE author_id = ANY(book_author_ids)), '')), 'B') ||
+           setweight(to_tsvector('english', coalesce(book_publisher, '')), 'C') ||
+           setweight(to_tsvector('english', coalesce(book_description, '')), 'D');
+$$ LANGUAGE sql STABLE;
+
+-- Trigger function for keeping books.search_vector current
+CREATE OR REPLACE FUNCTION update_book_search_vector()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.search_vector = book_search_vector(NEW.title, NEW.description, NEW.publisher_name, NEW.author_ids);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Trigger function for re-indexing an author's books when the author is renamed
+CREATE OR REPLACE FUNCTION update_author_books_search_vector()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE books
+    SET search_vector = book_search_vector(title, description, publisher_name, author_ids)
+    WHERE author_ids @> ARRAY[NEW.author_id];
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Trigger for search_vector
+CREATE TRIGGER update_books_search_vector
+BEFORE INSERT OR UPDATE OF title, description, publisher_name, author_ids ON books
+FOR EACH ROW
+EXECUTE FUNCTION update_book_search_vector();
+
+-- Trigger for search_vector
+CREATE TRIGGER update_authors_books_search_vector
+AFTER UPDATE OF name ON authors
+FOR EACH ROW
+WHEN (OLD.name IS DISTINCT FROM NEW.name)
+EXECUTE FUNCTION update_author_books_search_vector();
+
+-- Bump the catalog version of each scope (a library_id, or 'global'); Last-Modified never moves backwards
+CREATE OR REPLACE FUNCTION bump_catalog_versions(scopes TEXT[])
+RETURNS VOID AS $$
+    INSERT INTO catalog_versions (scope, version, updated_at)
+    SELECT scope, 1, clock_timestamp()
+    FROM (SELECT DISTINCT unnest(scopes) AS scope) AS changed
+    WHERE scope IS NOT NULL
+    ORDER BY scope
+    ON CONFLICT (scope) DO UPDATE
+    SET version = catalog_versions.version + 1,
+        updated_at = GREATEST(catalog_versions.updated_at, EXCLUDED.updated_at);
+$$ LANGUAGE sql;
+
+-- Bump this backend's shard of each library's availability version
+CREATE OR REPLACE FUNCTION bump_availability_versions(library_ids UUID[])
+RETURNS VOID AS $$
+    INSERT INTO availability_versions (library_id, shard, version, updated_at)
+    SELECT library_id, pg_backend_pid() % 16, 1, clock_timestamp()
+    FROM (SELECT DISTINCT unnest(library_ids) AS library_id) AS changed
+    WHERE library_id IS NOT NULL
+    ORDER BY library_id
+    ON CONFLICT (library_id, shard) DO UPDATE
+    SET version = availability_versions.version + 1,
+        updated_at = GREATEST(availability_versions.updated_at, EXCLUDED.updated_at);
+$$ LANGUAGE sql;
+
+-- Trigger function for bumping the version of every library whose books a statement changed;
+-- updates bump the catalog version only when something other than the copy counters changed
+CREATE OR REPLACE FUNCTION bump_books_catalog_version()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM bump_catalog_versions(ARRAY(SELECT library_id::TEXT FROM new_rows));
+    ELSIF TG_OP = 'UPDATE' THEN
+        PERFORM bump_catalog_versions(ARRAY(
+            SELECT library_id::TEXT FROM (
+                SELECT old_rows.library_id AS old_library_id, new_rows.library_id AS new_library_id
+                FROM old_rows JOIN new_rows ON new_rows.book_id = old_rows.book_id
+                WHERE to_jsonb(old_rows) - '{available_copies,reserved_copies,updated_at}'::TEXT[]
+                      IS DISTINCT FROM to_jsonb(new_rows) - '{available_copies,reserved_copies,updated_at}'::TEXT[]
+            ) AS changed, LATERAL (VALUES (old_library_id), (new_library_id)) AS libraries(library_id)
+        ));
+        PERFORM bump_availability_versions(ARRAY(
+            SELECT new_rows.library_id
+            FROM old_rows JOIN new_rows ON new_rows.book_id = old_rows.book_id
+            WHERE (old_rows.available_copies, old_rows.reserved_copies)
+                  IS DISTINCT FROM (new_rows.available_copies, new_rows.reserved_copies)
+        ));
+    ELSE
+        PERFORM bump_catalog_versions(ARRAY(SELECT library_id::TEXT FROM old_rows));
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Trigger function for bumping the global version (authors, genres, image variants)
+CREATE OR REPLACE FUNCTION bump_global_catalog_version()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM bump_catalog_versions(ARRAY['global']);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Triggers for catalog_versions (transition tables need one trigger per event)
+CREATE TRIGGER bump_books_catalog_version_insert
+AFTER INSERT ON books
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION bump_books_catalog_version();
+
+CREATE TRIGGER bump_books_catalog_version_update
+AFTER UPDATE ON books
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION bump_books_catalog_version();
+
+CREATE TRIGGER bump_books_catalog_version_delete
+AFTER DELETE ON books
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION bump_books_catalog_version();
+
+CREATE TRIGGER bump_authors_catalog_version
+AFTER INSERT OR UPDATE OR DELETE ON authors
+FOR EACH STATEMENT
+EXECUTE FUNCTION bump_global_catalog_version();
+
+CREATE TRIGGER bump_genres_catalog_version
+AFTER INSERT OR UPDATE OR DELETE ON genres
+FOR EACH STATEMENT
+EXECUTE FUNCTION bump_global_catalog_version();
+
+-- Thumbnails appear in listings once their variants are ready
+CREATE TRIGGER bump_image_assets_catalog_version
+AFTER UPDATE OF status ON image_assets
+FOR EACH STATEMENT
+EXECUTE FUNCTION bump_global_catalog_version();
@@ -0,0 +1,212 @@
+from functools import wraps
+from threading import Lock
+from flask import request, jsonify, make_response, current_app
+from sqlalchemy import text
+import math
+import re
+import time
+from .. import db
+from ..config import Config
+from ..services.workers import BackgroundWorker, register_worker
+
+_RULE_PATTERN = re.compile(r'^\s*(\d+)\s*/\s*(\d*)\s*(second|minute|hour|day)s?\s*$')
+_UNIT_SECONDS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+def parse_rule(rule):
+    """Parse '5/minute' or '5/15minutes' into (limit, window_seconds)."""
+    match = _RULE_PATTERN.match(rule)
+    if not match:
+        raise ValueError(f"Invalid rate limit rule: {rule}")
+    limit, multiplier, unit = match.groups()
+    return int(limit), int(multiplier or 1) * _UNIT_SECONDS[unit]
+
+class MemoryBackend:
+    """Per-process window counters for the sliding-window estimator; only suitable when a single worker serves the app."""
+
+    def __init__(self, prune_every=1000):
+        self._counters = {}
+        self._lock = Lock()
+        self._prune_every = prune_every
+        self._operations = 0
+
+    def increment(self, key, window_start, window):
+        with self._lock:
+            self._operations += 1
+            if self._operations % self._prune_every == 0:
+                self._prune(window_start)
+            current = self._counters.get((key, window_start), (0, 0))[0] + 1
+            self._counters[(key, window_start)] = (current, window_start + 2 * window)
+            previous = self._counters.get((key, window_start - window), (0, 0))[0]
+            return current, previous
+
+    def decrement(self, key, window_start):
+        with self._lock:
+            count, expires_at = self._counters.get((key, window_start), (0, 0))
+            if count > 0:
+                self._counters[(key, window_start)] = (count - 1, expires_at)
+
+    def _prune(self, now):
+        for counter_key, (_, expires_at) in list(self._counters.items()):
+            if expires_at <= now:
+                del self._counters[counter_key]
+
+    def prune(self):
+        with self._lock:
+            self._prune(int(time.time()))
+
+class PostgresBackend:
+    """Counters in rate_limit_counters so every worker shares the same windows."""
+
+    def increment(self, key, window_start, window):
+        # Runs on its own connection so it never joins (or waits on) the request transaction
+        with db.engine.begin() as connection:
+            row = connection.execute(text("""
+                WITH hit AS (
+                    INSERT INTO rate_limit_counters (key, window_start, count, expires_at)
+                    VALUES (:key, :window_start, 1, to_timestamp(:expires_at))
+                    ON CONFLICT (key, window_start) DO UPDATE SET count = rate_limit_counters.count + 1
+                    RETURNING count
+                )
+                SELECT (SELECT count FROM hit),
+                       COALESCE((SELECT count FROM rate_limit_counters
+                                 WHERE key = :key AND window_start = :previous_start), 0)
+            """), {
+                "key": key,
+                "window_start": window_start,
+                "previous_start": window_start - window,
+                "expires_at": window_start + 2 * window
+            }).one()
+        return row[0], row[1]
+
+    def decrement(self, key, window_start):
+        with db.engine.begin() as connection:
+            connection.execute(text("""
+                UPDATE rate_limit_counters SET count = count - 1
+                WHERE key = :key AND window_start = :window_start AND count > 0
+            """), {"key": key, "window_start": window_start})
+
+    def prune(self):
+        with db.engine.begin() as connection:
+            connection.execute(text("DELETE FROM rate_limit_counters WHERE expires_at < now()"))
+
+class SlidingWindowLimiter:
+    """Sliding-window counter: the previous window's count is weighted by how much of it still overlaps."""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    @staticmethod
+    def _estimate(current, previous, elapsed, window):
+        return previous * (window - elapsed) / window + current
+
+    @staticmethod
+    def _retry_after(current, previous, elapsed, window, limit):
+        # Seconds until one more request would fit, assuming no further traffic
+        if current < limit:
+            if not previous:
+                return 1
+            wait = window * (1 - (limit - 1 - current) / previous) - elapsed
+        else:
+            wait = (window - elapsed) + window * (1 - (limit - 1) / current)
+        return max(1, math.ceil(wait))
+
+    def _check(self, counts, now, window, limit):
+        window_start = int(now // window * window)
+        elapsed = now - window_start
+        current, previous = counts
+        if self._estimate(current, previous, elapsed, window) <= limit:
+            return True, 0
+        return False, self._retry_after(current, previous, elapsed, window, limit)
+
+    def hit(self, key, limit, window, now=None):
+        """Count a request against key; returns (allowed, retry_after_seconds)."""
+        now = now or time.time()
+        counts = self.backend.increment(key, int(now // window * window), window)
+        return self._check(counts, now, window, limit)
+
+    def refund(self, key, window, now):
+        """Take back the request hit() counted at now."""
+        self.backend.decrement(key, int(now // window * window))
+
+def create_limiter(backend):
+    if backend == 'memory':
+        return SlidingWindowLimiter(MemoryBackend())
+    if backend == 'postgres':
+        return SlidingWindowLimiter(PostgresBackend())
+    raise ValueError(f"Unknown RATE_LIMIT_BACKEND: {backend}")
+
+limiter = create_limiter(Config.RATE_LIMIT_BACKEND)
+
+def client_ip():
+    # X-Forwarded-For is only honoured through ProxyFix, for TRUSTED_PROXY_HOPS hops (see create_app)
+    return request.remote_addr
+
+def _key_value(key):
+    if key == 'ip':
+        return client_ip()
+    if key == 'email':
+        email = request.form.get('email')
+        return email.strip().lower() if email else None
+    if key == 'user_id':
+        current_user = getattr(request, 'current_user', None)
+        if current_user is not None:
+            return str(current_user.user_id)
+        user_id = request.form.get('user_id')
+        return user_id.strip().lower() if user_id else None
+    raise ValueError(f"Unknown rate limit key: {key}")
+
+def _too_many_requests(retry_after):
+    response = jsonify({"error": "Too many requests. Please try again later.", "retry_after": retry_after})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+def rate_limit(rule, key='ip', only_failures=False):
+    """Throttle a route by ip, email or user_id before the view does any DB or network work.
+
+    With only_failures=True, only responses with status >= 400 stay counted
+    (e.g. wrong OTPs). Every request is still counted before the view runs and
+    refunded if it succeeds, so parallel guesses cannot all slip past the limit.
+    """
+    limit, window = parse_rule(rule)
+
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if not Config.RATE_LIMIT_ENABLED:
+                return f(*args, **kwargs)
+            identity = _key_value(key)
+            if identity is None:
+                return f(*args, **kwargs)
+            bucket = f"{request.endpoint}:{key}:{identity}:{window}"
+
+            now = time.time()
+            try:
+                allowed, retry_after = limiter.hit(bucket, limit, window, now=now)
+            except Exception:
+                # Fail open: a limiter outage must not lock everyone out
+                current_app.logger.exception("Rate limiter unavailable")
+                return f(*args, **kwargs)
+            if not allowed:
+                return _too_many_requests(retry_after)
+
+            response = make_response(f(*args, **kwargs))
+            if only_failures and response.status_code < 400:
+                try:
+                    limiter.refund(bucket, window, now)
+                except Exception:
+                    current_app.logger.exception("Rate limiter unavailable")
+            return response
+        return decorated_function
+    return decorator
+
+class RateLimitPruner(BackgroundWorker):
+    name = 'rate-limit-pruner'
+
+    def enabled(self, app):
+        return Config.RATE_LIMIT_ENABLED
+
+    def run_once(self):
+        limiter.backend.prune()
+
+rate_limit_pruner = register_worker(RateLimitPruner(interval=600))
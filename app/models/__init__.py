@@ -10,4 +10,10 @@ from .wishlists import Wishlist
 from .reviews import Review
 from .tickets import Ticket
 from .fines import Fine
-from .documents_uploads import DocumentUpload
\ No newline at end of file
+from .documents_uploads import DocumentUpload
+from .email_outbox import EmailOutbox
+from .rate_limits import RateLimitCounter
+from .image_assets import ImageAsset
+from .catalog_versions import CatalogVersion
+from .reservation_queue import ReservationQueueEntry
+from .availability_versions import AvailabilityVersion
\ No newline at end of file
@@ -14,5 +14,9 @@ class Author(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.now)
     updated_at = db.Column(db.DateTime, default=datetime.now)
 
+    __table_args__ = (
+        db.Index('idx_authors_book_ids', 'book_ids', postgresql_using='gin'),
+    )
+
     def __repr__(self):
         return f"<Author {self.name}>"
\ No newline at end of file
@@ -0,0 +1,15 @@
+from .. import db
+from sqlalchemy.dialects.postgresql import UUID
+from datetime import datetime, timezone
+
+class AvailabilityVersion(db.Model):
+    __tablename__ = 'availability_versions'
+
+    # Copy counter changes per library, spread over shard rows picked by backend pid; the version is their sum
+    library_id = db.Column(UUID(as_uuid=True), db.ForeignKey('libraries.library_id', ondelete='CASCADE'), primary_key=True)
+    shard = db.Column(db.SmallInteger, primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+
+    def __repr__(self):
+        return f"<AvailabilityVersion library_id={self.library_id}, shard={self.shard}, version={self.version}>"
@@ -1,5 +1,6 @@
 from .. import db
-from sqlalchemy.dialects.postgresql import UUID, ARRAY
+from sqlalchemy.dialects.postgresql import UUID, ARRAY, TSVECTOR
+from sqlalchemy.orm import deferred
 from uuid import uuid4
 from datetime import datetime
 
@@ -19,6 +20,8 @@ class Book(db.Model):
     author_ids = db.Column(ARRAY(UUID(as_uuid=True)), default=list)
     genre_ids = db.Column(ARRAY(UUID(as_uuid=True)), default=list)
     published_date = db.Column(db.DateTime)
+    # Maintained by the update_books_search_vector trigger; deferred so ordinary loads don't fetch it
+    search_vector = deferred(db.Column(TSVECTOR))
     added_on = db.Column(db.DateTime, default=datetime.now)
     updated_at = db.Column(db.DateTime, default=datetime.now)
 
@@ -34,6 +37,8 @@ class Book(db.Model):
         db.CheckConstraint('total_copies >= 0', name='check_total_copies'),
         db.CheckConstraint('available_copies >= 0', name='check_available_copies'),
         db.CheckConstraint('reserved_copies >= 0', name='check_reserved_copies'),
+        db.Index('idx_books_author_ids', 'author_ids', postgresql_using='gin'),
+        db.Index('idx_books_genre_ids', 'genre_ids', postgresql_using='gin'),
     )
 
     def __repr__(self):
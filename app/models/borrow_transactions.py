@@ -18,6 +18,7 @@ class BorrowTransaction(db.Model):
 
     __table_args__ = (
         db.CheckConstraint("status IN ('borrowed', 'returned', 'overdue')", name='check_status'),
+        db.Index('idx_borrow_transactions_open_due', 'library_id', 'due_date', postgresql_where=db.text('return_date IS NULL')),
     )
 
     def __repr__(self):
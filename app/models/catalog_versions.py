@@ -0,0 +1,13 @@
+from .. import db
+from datetime import datetime, timezone
+
+class CatalogVersion(db.Model):
+    __tablename__ = 'catalog_versions'
+
+    # A library_id for its books, or 'global' for authors, genres and image variants
+    scope = db.Column(db.Text, primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+
+    def __repr__(self):
+        return f"<CatalogVersion scope={self.scope}, version={self.version}>"
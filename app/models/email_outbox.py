@@ -0,0 +1,26 @@
+from .. import db
+from sqlalchemy.dialects.postgresql import UUID
+from uuid import uuid4
+from datetime import datetime, timezone
+
+class EmailOutbox(db.Model):
+    __tablename__ = 'email_outbox'
+
+    email_id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid4)
+    recipient = db.Column(db.Text, nullable=False)
+    subject = db.Column(db.Text, nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    status = db.Column(db.Text, nullable=False, default='pending')
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.Text)
+    next_attempt_at = db.Column(db.DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
+    created_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    sent_at = db.Column(db.DateTime(timezone=True))
+
+    __table_args__ = (
+        db.CheckConstraint("status IN ('pending', 'sent', 'failed')", name='check_email_outbox_status'),
+        db.Index('idx_email_outbox_pending', 'next_attempt_at', postgresql_where=db.text("status = 'pending'")),
+    )
+
+    def __repr__(self):
+        return f"<EmailOutbox email_id={self.email_id}, recipient={self.recipient}, status={self.status}>"
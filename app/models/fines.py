@@ -19,6 +19,7 @@ class Fine(db.Model):
 
     __table_args__ = (
         db.CheckConstraint('amount >= 0', name='check_amount'),
+        db.Index('idx_fines_overdue_borrow_id', 'borrow_id', unique=True, postgresql_where=db.text("reason = 'Overdue book return'")),
     )
 
     def __repr__(self):
@@ -0,0 +1,23 @@
+from .. import db
+from datetime import datetime, timezone
+
+class ImageAsset(db.Model):
+    __tablename__ = 'image_assets'
+
+    bucket = db.Column(db.Text, primary_key=True)
+    content_hash = db.Column(db.Text, primary_key=True)  # sha256 of the uploaded bytes
+    content_type = db.Column(db.Text)
+    original_url = db.Column(db.Text, nullable=False)
+    list_url = db.Column(db.Text)
+    thumbnail_url = db.Column(db.Text)
+    status = db.Column(db.Text, nullable=False, default='pending')
+    created_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    updated_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+
+    __table_args__ = (
+        db.CheckConstraint("status IN ('pending', 'ready', 'failed')", name='check_image_asset_status'),
+        db.Index('idx_image_assets_original_url', 'original_url'),
+    )
+
+    def __repr__(self):
+        return f"<ImageAsset bucket={self.bucket}, content_hash={self.content_hash}, status={self.status}>"
@@ -14,5 +14,10 @@ class OTPVerification(db.Model):
     expires_at = db.Column(db.DateTime(timezone=True), nullable=False)
     created_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
 
+    __table_args__ = (
+        db.Index('idx_otp_verifications_user_otp', 'user_id', 'otp'),
+        db.Index('idx_otp_verifications_expires_at', 'expires_at'),
+    )
+
     def __repr__(self):
         return f"<OTPVerification user_id={self.user_id}, email={self.email}, otp={self.otp}, expires_at={self.expires_at}>"
\ No newline at end of file
@@ -0,0 +1,16 @@
+from .. import db
+
+class RateLimitCounter(db.Model):
+    __tablename__ = 'rate_limit_counters'
+
+    key = db.Column(db.Text, primary_key=True)
+    window_start = db.Column(db.BigInteger, primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    expires_at = db.Column(db.DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        db.Index('idx_rate_limit_counters_expires_at', 'expires_at'),
+    )
+
+    def __repr__(self):
+        return f"<RateLimitCounter key={self.key}, window_start={self.window_start}, count={self.count}>"
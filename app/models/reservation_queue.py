@@ -0,0 +1,22 @@
+from .. import db
+from sqlalchemy.dialects.postgresql import UUID
+from uuid import uuid4
+from datetime import datetime, timezone
+
+class ReservationQueueEntry(db.Model):
+    __tablename__ = 'reservation_queue'
+
+    queue_id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid4)
+    book_id = db.Column(UUID(as_uuid=True), db.ForeignKey('books.book_id', ondelete='CASCADE'), nullable=False)
+    user_id = db.Column(UUID(as_uuid=True), db.ForeignKey('users.user_id', ondelete='CASCADE'), nullable=False)
+    library_id = db.Column(UUID(as_uuid=True), db.ForeignKey('libraries.library_id', ondelete='CASCADE'), nullable=False)
+    reserved_at = db.Column(db.DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
+
+    __table_args__ = (
+        db.UniqueConstraint('book_id', 'user_id', name='uq_reservation_queue_book_user'),
+        # Queue order; also serves position lookups as a range scan over the entries ahead
+        db.Index('idx_reservation_queue_book_order', 'book_id', 'reserved_at', 'queue_id'),
+    )
+
+    def __repr__(self):
+        return f"<ReservationQueueEntry book_id={self.book_id}, user_id={self.user_id}>"
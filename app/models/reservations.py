@@ -16,6 +16,7 @@ class Reservation(db.Model):
 
     __table_args__ = (
         db.CheckConstraint("status IN ('pending', 'confirmed', 'rejected', 'expired')", name='check_status'),
+        db.Index('idx_reservations_due', 'expires_at', postgresql_where=db.text("status IN ('pending', 'confirmed')")),
     )
 
     def __repr__(self):
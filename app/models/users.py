@@ -31,6 +31,10 @@ class User(db.Model):
 
     __table_args__ = (
         db.CheckConstraint("role IN ('Admin', 'Librarian', 'Member')", name='check_role'),
+        db.Index('idx_users_preferred_genre_ids', 'preferred_genre_ids', postgresql_using='gin'),
+        db.Index('idx_users_borrowed_book_ids', 'borrowed_book_ids', postgresql_using='gin'),
+        db.Index('idx_users_reserved_book_ids', 'reserved_book_ids', postgresql_using='gin'),
+        db.Index('idx_users_wishlist_book_ids', 'wishlist_book_ids', postgresql_using='gin'),
     )
 
     def __repr__(self):
@@ -0,0 +1,52 @@
+from sqlalchemy import text
+from .. import db
+from ..models.authors import Author
+from ..models.genres import Genre
+from .references import resolve_references
+
+def remove_from_arrays(table, column, ids, returning=None):
+    """Remove ids from table.column in every row holding any of them, in one UPDATE.
+
+    A single id uses array_remove; several are filtered out in one pass that
+    keeps the remaining elements in order. The WHERE clause is an && overlap,
+    so the GIN index on the column finds the rows. Returns the distinct values
+    of the returning column over the changed rows (an empty set without one).
+    """
+    ids = [str(value) for value in ids]
+    if not ids:
+        return set()
+    if len(ids) == 1:
+        assignment = f"array_remove({column}, CAST(:id AS UUID))"
+    else:
+        assignment = (
+            f"ARRAY(SELECT kept.id FROM unnest({column}) WITH ORDINALITY AS kept(id, position) "
+            f"WHERE kept.id <> ALL(CAST(:ids AS UUID[])) ORDER BY kept.position)"
+        )
+    update = f"UPDATE {table} SET {column} = {assignment} WHERE {column} && CAST(:ids AS UUID[])"
+    params = {"id": ids[0], "ids": ids}
+    if returning is None:
+        db.session.execute(text(update), params)
+        return set()
+    rows = db.session.execute(text(f"WITH changed AS ({update} RETURNING {returning}) SELECT DISTINCT {returning} FROM changed"), params)
+    return {value for value, in rows}
+
+def _delete_with_cascade(model, ids, books_column):
+    resolved = resolve_references(model, ids, load=False)
+    if resolved.missing or not resolved.found:
+        return resolved, set()
+    libraries = remove_from_arrays('books', books_column, resolved.found, returning='library_id')
+    primary_key = model.__mapper__.primary_key[0]
+    model.query.filter(primary_key.in_(list(resolved.found))).delete(synchronize_session=False)
+    return resolved, libraries
+
+def delete_authors(author_ids):
+    """Delete authors and strip them from books.author_ids without loading any rows.
+
+    Nothing is deleted if any id is missing. Returns (ResolvedReferences,
+    library_ids whose books changed); the caller commits.
+    """
+    return _delete_with_cascade(Author, author_ids, 'author_ids')
+
+def delete_genres(genre_ids):
+    """Delete genres and strip them from books.genre_ids; see delete_authors."""
+    return _delete_with_cascade(Genre, genre_ids, 'genre_ids')
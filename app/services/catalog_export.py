@@ -0,0 +1,107 @@
+from io import StringIO
+import csv
+import json
+import zlib
+from flask import current_app
+from .. import db
+from ..models.books import Book
+from .catalog_import import LIST_SEPARATOR
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+EXPORT_COLUMNS = (
+    'book_id', 'title', 'isbn', 'description', 'publisher_name', 'total_copies', 'available_copies',
+    'reserved_copies', 'book_image', 'author_ids', 'genre_ids', 'published_date', 'added_on', 'updated_at'
+)
+
+# Rows fetched per round trip from the server-side cursor
+YIELD_PER = 1000
+
+# Output is buffered to roughly this many bytes per chunk so the response isn't one write per row
+CHUNK_BYTES = 64 * 1024
+
+def _export_row(row):
+    # published_date is written as YYYY-MM-DD so an export can be fed back into the importer
+    return {
+        "book_id": str(row.book_id),
+        "title": row.title,
+        "isbn": row.isbn,
+        "description": row.description,
+        "publisher_name": row.publisher_name,
+        "total_copies": row.total_copies,
+        "available_copies": row.available_copies,
+        "reserved_copies": row.reserved_copies,
+        "book_image": row.book_image,
+        "author_ids": [str(aid) for aid in (row.author_ids or [])],
+        "genre_ids": [str(gid) for gid in (row.genre_ids or [])],
+        "published_date": row.published_date.date().isoformat() if row.published_date else None,
+        "added_on": row.added_on.isoformat() if row.added_on else None,
+        "updated_at": row.updated_at.isoformat() if row.updated_at else None
+    }
+
+def _stream_rows(query):
+    # Columns rather than entities, streamed in YIELD_PER batches, keep memory flat for any catalog size
+    columns = [getattr(Book, column) for column in EXPORT_COLUMNS]
+    statement = query.with_entities(*columns).statement
+    result = db.session.execute(statement.execution_options(yield_per=YIELD_PER))
+    for row in result:
+        yield _export_row(row)
+
+def _ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + '\n'
+
+def _csv_lines(rows):
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for row in rows:
+        row = dict(row, author_ids=LIST_SEPARATOR.join(row['author_ids']), genre_ids=LIST_SEPARATOR.join(row['genre_ids']))
+        writer.writerow([row[column] for column in EXPORT_COLUMNS])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+def _chunked(lines):
+    pending, size = [], 0
+    for line in lines:
+        data = line.encode('utf-8')
+        pending.append(data)
+        size += len(data)
+        if size >= CHUNK_BYTES:
+            yield b''.join(pending)
+            pending, size = [], 0
+    if pending:
+        yield b''.join(pending)
+
+def _gzipped(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+def export_catalog(query, fmt, compress=False):
+    """Return a generator of response body chunks for the books matched by query.
+
+    The query is not run until the generator is consumed, so the caller must
+    keep the request context alive (stream_with_context).
+    """
+    rows = _stream_rows(query)
+    lines = _csv_lines(rows) if fmt == 'csv' else _ndjson_lines(rows)
+    chunks = _chunked(lines)
+    if compress:
+        chunks = _gzipped(chunks)
+
+    def generate():
+        try:
+            yield from chunks
+        except Exception:
+            # Headers are already sent; all that can be done is to stop and leave a trace
+            current_app.logger.exception("Catalog export failed mid-stream")
+            db.session.rollback()
+    return generate()
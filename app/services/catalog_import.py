@@ -0,0 +1,321 @@
+from collections import defaultdict
+from datetime import datetime
+from io import StringIO, TextIOWrapper
+from uuid import UUID, uuid4
+import csv
+import json
+import re
+import time
+from sqlalchemy import func, insert, text
+from .. import db
+from ..config import Config
+from ..models.authors import Author
+from ..models.books import Book
+from ..models.genres import Genre
+from .invalidation import notify
+from .references import resolve_references
+
+IMPORT_FORMATS = ('csv', 'jsonl')
+
+# Only the first MAX_REPORTED_ERRORS row errors are returned; the counts cover every row
+MAX_REPORTED_ERRORS = 1000
+
+# CSV cells holding several authors/genres separate them with '|' (',' is the column separator)
+LIST_SEPARATOR = '|'
+
+_ISBN_PATTERN = re.compile(r'^\d{10}(\d{3})?$')
+
+_COPY_COLUMNS = (
+    'book_id', 'library_id', 'title', 'isbn', 'description', 'publisher_name', 'total_copies',
+    'available_copies', 'reserved_copies', 'author_ids', 'genre_ids', 'published_date', 'added_on', 'updated_at'
+)
+
+_AMBIGUOUS = object()
+
+class RowError(ValueError):
+    pass
+
+def read_records(stream, fmt):
+    """Yield (line_number, record) pairs from a binary CSV or JSONL stream without loading it whole."""
+    text_stream = TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    if fmt == 'csv':
+        reader = csv.DictReader(text_stream)
+        if not reader.fieldnames or 'title' not in reader.fieldnames:
+            raise ValueError("CSV header must include a 'title' column")
+        for record in reader:
+            yield reader.line_num, record
+    elif fmt == 'jsonl':
+        for line_number, line in enumerate(text_stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield line_number, RowError(f"Invalid JSON: {e}")
+                continue
+            yield line_number, record if isinstance(record, dict) else RowError("Each line must be a JSON object")
+    else:
+        raise ValueError(f"Unsupported import format: {fmt}")
+
+def _references(record, names_key, ids_key):
+    tokens = []
+    for key in (names_key, ids_key):
+        value = record.get(key)
+        if isinstance(value, str):
+            value = value.split(LIST_SEPARATOR)
+        tokens.extend(str(token).strip() for token in value or [] if str(token).strip())
+    return tokens
+
+def _clean(value):
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+def normalize_record(record):
+    """Validate one imported record the same way BookForm does; raises RowError."""
+    if isinstance(record, RowError):
+        raise record
+    title = _clean(record.get('title'))
+    if not title or len(title) > 255:
+        raise RowError("title is required (max 255 characters)")
+
+    isbn = _clean(record.get('isbn'))
+    if isbn:
+        isbn = isbn.replace('-', '')
+        if not _ISBN_PATTERN.match(isbn):
+            raise RowError(f"Invalid ISBN: {isbn}")
+
+    description = _clean(record.get('description'))
+    if description and len(description) > 1000:
+        raise RowError("description must be at most 1000 characters")
+    publisher_name = _clean(record.get('publisher_name'))
+    if publisher_name and len(publisher_name) > 255:
+        raise RowError("publisher_name must be at most 255 characters")
+
+    total_copies = _clean(record.get('total_copies')) or 1
+    try:
+        total_copies = int(total_copies)
+    except ValueError:
+        raise RowError(f"Invalid total_copies: {total_copies}")
+    if total_copies < 1:
+        raise RowError("total_copies must be at least 1")
+
+    published_date = _clean(record.get('published_date'))
+    if published_date:
+        try:
+            published_date = datetime.strptime(published_date, '%Y-%m-%d')
+        except ValueError:
+            raise RowError(f"Invalid published_date (expected YYYY-MM-DD): {published_date}")
+
+    return {
+        "title": title,
+        "isbn": isbn,
+        "description": description,
+        "publisher_name": publisher_name,
+        "total_copies": total_copies,
+        "published_date": published_date,
+        "authors": _references(record, 'authors', 'author_ids'),
+        "genres": _references(record, 'genres', 'genre_ids')
+    }
+
+class ReferenceIndex:
+    """Resolves author/genre tokens (UUIDs or case-insensitive names) in one query per chunk, caching across chunks."""
+
+    def __init__(self, model, name_column):
+        self.model = model
+        self.name_column = name_column
+        self._resolved = {}
+
+    def load(self, tokens):
+        pending = {token for token in tokens if token not in self._resolved}
+        ids, names = {}, set()
+        for token in pending:
+            try:
+                ids[token] = UUID(token)
+            except ValueError:
+                names.add(token)
+
+        if ids:
+            found = resolve_references(self.model, ids.values(), load=False).found
+            for token, key in ids.items():
+                self._resolved[token] = key if key in found else None
+        if names:
+            primary_key = self.model.__mapper__.primary_key[0]
+            matches = defaultdict(list)
+            lowered = func.lower(self.name_column)
+            for name, key in db.session.query(lowered, primary_key).filter(lowered.in_({n.lower() for n in names})):
+                matches[name].append(key)
+            for token in names:
+                keys = matches.get(token.lower(), [])
+                self._resolved[token] = keys[0] if len(keys) == 1 else (_AMBIGUOUS if keys else None)
+
+    def resolve(self, tokens, label):
+        keys = []
+        for token in tokens:
+            key = self._resolved.get(token)
+            if key is None:
+                raise RowError(f"Unknown {label}: {token}")
+            if key is _AMBIGUOUS:
+                raise RowError(f"Ambiguous {label} name '{token}'; use its id instead")
+            if key not in keys:
+                keys.append(key)
+        return keys
+
+def _copy_value(value):
+    if value is None:
+        return None
+    if isinstance(value, list):
+        return '{' + ','.join(str(item) for item in value) + '}'
+    if isinstance(value, datetime):
+        return value.isoformat(sep=' ')
+    return value
+
+class CatalogImport:
+    """Imports books into one library in chunks; every chunk is a single transaction."""
+
+    def __init__(self, library_id, chunk_size=None):
+        self.library_id = library_id
+        self.chunk_size = chunk_size or Config.CATALOG_IMPORT_CHUNK_SIZE
+        self.authors = ReferenceIndex(Author, Author.name)
+        self.genres = ReferenceIndex(Genre, Genre.name)
+        self._seen_isbns = set()
+        self.processed = 0
+        self.imported = 0
+        self.skipped = 0
+        self.failed = 0
+        self.errors = []
+
+    def _error(self, line_number, message, duplicate=False):
+        if duplicate:
+            self.skipped += 1
+        else:
+            self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line_number, "error": message})
+
+    def run(self, records, progress=None):
+        """Import (line_number, record) pairs and return the report."""
+        started = time.perf_counter()
+        chunk = []
+        for line_number, record in records:
+            self.processed += 1
+            try:
+                row = normalize_record(record)
+            except RowError as e:
+                self._error(line_number, str(e))
+                continue
+            if row['isbn']:
+                if row['isbn'] in self._seen_isbns:
+                    self._error(line_number, f"Duplicate ISBN {row['isbn']} earlier in the file", duplicate=True)
+                    continue
+                self._seen_isbns.add(row['isbn'])
+            chunk.append((line_number, row))
+            if len(chunk) >= self.chunk_size:
+                self._load_chunk(chunk)
+                chunk = []
+                if progress:
+                    progress(self.report(time.perf_counter() - started))
+        if chunk:
+            self._load_chunk(chunk)
+        return self.report(time.perf_counter() - started)
+
+    def report(self, elapsed):
+        return {
+            "processed": self.processed,
+            "imported": self.imported,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.skipped + self.failed > len(self.errors),
+            "elapsed_seconds": round(elapsed, 3),
+            "rows_per_second": round(self.processed / elapsed, 1) if elapsed else None
+        }
+
+    def _load_chunk(self, chunk):
+        isbns = [row['isbn'] for _, row in chunk if row['isbn']]
+        existing = set()
+        if isbns:
+            existing = {isbn for isbn, in db.session.query(Book.isbn).filter(Book.isbn.in_(isbns))}
+        self.authors.load(token for _, row in chunk for token in row['authors'])
+        self.genres.load(token for _, row in chunk for token in row['genres'])
+
+        now = datetime.utcnow()
+        books, lines = [], []
+        author_books = defaultdict(list)
+        for line_number, row in chunk:
+            if row['isbn'] in existing:
+                self._error(line_number, f"ISBN {row['isbn']} is already in the catalog", duplicate=True)
+                continue
+            try:
+                author_ids = self.authors.resolve(row['authors'], 'author')
+                genre_ids = self.genres.resolve(row['genres'], 'genre')
+            except RowError as e:
+                self._error(line_number, str(e))
+                continue
+            book_id = uuid4()
+            for author_id in author_ids:
+                author_books[author_id].append(book_id)
+            lines.append(line_number)
+            books.append({
+                "book_id": book_id,
+                "library_id": self.library_id,
+                "title": row['title'],
+                "isbn": row['isbn'],
+                "description": row['description'],
+                "publisher_name": row['publisher_name'],
+                "total_copies": row['total_copies'],
+                "available_copies": row['total_copies'],
+                "reserved_copies": 0,
+                "author_ids": author_ids,
+                "genre_ids": genre_ids,
+                "published_date": row['published_date'],
+                "added_on": now,
+                "updated_at": now
+            })
+        if not books:
+            return
+
+        try:
+            self._insert_books(books)
+            if author_books:
+                # One executemany for every author touched by the chunk instead of an ORM load per author
+                db.session.execute(text("""
+                    UPDATE authors
+                    SET book_ids = COALESCE(book_ids, '{}') || CAST(:book_ids AS UUID[]), updated_at = :now
+                    WHERE author_id = :author_id
+                """), [
+                    {"author_id": str(author_id), "book_ids": [str(book_id) for book_id in book_ids], "now": now}
+                    for author_id, book_ids in author_books.items()
+                ])
+            notify('counts', self.library_id)
+            notify('responses', 'authors')
+            db.session.commit()
+        except Exception as e:
+            # e.g. an ISBN inserted concurrently; the rest of the file still gets its chance
+            db.session.rollback()
+            for line_number in lines:
+                self._error(line_number, f"Chunk failed: {e}")
+            return
+        self.imported += len(books)
+
+    def _insert_books(self, books):
+        connection = db.session.connection()
+        if connection.dialect.name != 'postgresql':
+            db.session.execute(insert(Book), books)
+            return
+        buffer = StringIO()
+        writer = csv.writer(buffer)
+        for book in books:
+            writer.writerow([_copy_value(book[column]) for column in _COPY_COLUMNS])
+        buffer.seek(0)
+        # COPY on the session's connection so the chunk and the author updates commit together
+        cursor = connection.connection.cursor()
+        try:
+            cursor.copy_expert(f"COPY books ({', '.join(_COPY_COLUMNS)}) FROM STDIN WITH (FORMAT csv)", buffer)
+        finally:
+            cursor.close()
+
+def import_catalog(stream, fmt, library_id, chunk_size=None, progress=None):
+    """Stream-import a CSV or JSONL catalog file into library_id and return the import report."""
+    return CatalogImport(library_id, chunk_size).run(read_records(stream, fmt), progress)
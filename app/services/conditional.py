@@ -0,0 +1,101 @@
+from functools import wraps
+from hashlib import sha1
+from datetime import timezone
+from flask import request, current_app
+from sqlalchemy import func
+from .. import db
+from ..models.availability_versions import AvailabilityVersion
+from ..models.catalog_versions import CatalogVersion
+from .counts import GLOBAL_SCOPE
+
+def _availability_version(library_id):
+    """Sum over the library's availability shards; every committed counter change raises it."""
+    return db.session.query(func.coalesce(func.sum(AvailabilityVersion.version), 0), func.max(AvailabilityVersion.updated_at)) \
+        .filter(AvailabilityVersion.library_id == library_id).one()
+
+def catalog_versions(scopes, availability=None):
+    """Return ({scope: version}, last_modified) for scopes; a scope never written is at version 0.
+
+    availability adds that library's copy counter version under 'availability'.
+    """
+    rows = db.session.query(CatalogVersion.scope, CatalogVersion.version, CatalogVersion.updated_at) \
+        .filter(CatalogVersion.scope.in_(scopes)).all()
+    versions = dict.fromkeys(scopes, 0)
+    if availability is not None:
+        version, updated_at = _availability_version(availability)
+        rows.append(('availability', int(version), updated_at))
+    last_modified = None
+    for scope, version, updated_at in rows:
+        versions[scope] = version
+        if updated_at is not None:
+            if updated_at.tzinfo is None:
+                updated_at = updated_at.replace(tzinfo=timezone.utc)
+            last_modified = max(last_modified or updated_at, updated_at)
+    return versions, last_modified
+
+def catalog_etag(versions):
+    """Opaque tag for the current request: endpoint, path and query arguments plus the scope versions."""
+    key = (
+        request.endpoint,
+        sorted((request.view_args or {}).items()),
+        sorted(request.args.items(multi=True)),
+        sorted(versions.items())
+    )
+    return sha1(repr(key).encode()).hexdigest()
+
+def _not_modified(etag, last_modified):
+    response = current_app.response_class(status=304)
+    return _with_validators(response, etag, last_modified)
+
+def _with_validators(response, etag, last_modified):
+    response.set_etag(etag, weak=True)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    # Clients may keep the body but must revalidate before reusing it
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+def conditional_get(per_library=False):
+    """Answer If-None-Match / If-Modified-Since with 304 before the view runs.
+
+    The validators come from catalog_versions, which triggers bump whenever
+    books (per library), authors, genres or image variants change, and from
+    availability_versions for the books' copy counters, so a revalidation
+    costs two index lookups and never loads catalog rows. per_library adds
+    the caller's library (catalog and copy counters) to the global scope; use
+    it for anything rendering books. It may also be a function deciding per request.
+    Must sit below role_required.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            scopes = [GLOBAL_SCOPE]
+            library_id = None
+            if per_library() if callable(per_library) else per_library:
+                library_id = request.current_user.library_id
+                scopes.append(str(library_id))
+
+            try:
+                versions, last_modified = catalog_versions(scopes, availability=library_id)
+            except Exception:
+                # Serve the response without validators rather than fail the read
+                db.session.rollback()
+                current_app.logger.exception("Failed to load catalog versions")
+                return f(*args, **kwargs)
+
+            etag = catalog_etag(versions)
+            if request.if_none_match:
+                if request.if_none_match.contains_weak(etag):
+                    return _not_modified(etag, last_modified)
+            elif request.if_modified_since and last_modified is not None:
+                # HTTP dates have one-second resolution
+                if last_modified.replace(microsecond=0) <= request.if_modified_since:
+                    return _not_modified(etag, last_modified)
+
+            response = current_app.make_response(f(*args, **kwargs))
+            if response.status_code == 200:
+                _with_validators(response, etag, last_modified)
+            return response
+        return decorated_function
+    return decorator
@@ -0,0 +1,76 @@
+from hashlib import sha1
+from threading import Lock
+from sqlalchemy.dialects import postgresql
+from .. import db
+from ..config import Config
+from .cache import TTLCache
+from .invalidation import subscribe
+from .query_plans import explain
+
+COUNT_STRATEGIES = ('exact', 'estimate', 'cached')
+
+# Scope for rows that belong to no library (authors, genres)
+GLOBAL_SCOPE = 'global'
+# Scope that invalidates every cached count, e.g. after a write that touches books in many libraries
+ALL_SCOPES = '*'
+
+# Per-process cache of exact counts keyed by scope generation and filter signature
+count_cache = TTLCache(maxsize=Config.COUNT_CACHE_SIZE, ttl=Config.COUNT_CACHE_TTL)
+
+_generations = {}
+_generations_lock = Lock()
+
+def _generation(scope):
+    with _generations_lock:
+        return _generations.get(scope, 0)
+
+def invalidate_counts(scope):
+    """Drop cached counts for a library id, GLOBAL_SCOPE, or everything (ALL_SCOPES / None)."""
+    if scope is None or scope == ALL_SCOPES:
+        count_cache.clear()
+        return
+    # Entries under the old generation can no longer be looked up; the LRU ages them out
+    with _generations_lock:
+        _generations[scope] = _generations.get(scope, 0) + 1
+
+subscribe('counts', invalidate_counts)
+
+def _signature(statement):
+    compiled = statement.compile(dialect=postgresql.dialect())
+    params = sorted((key, repr(value)) for key, value in compiled.params.items())
+    return sha1(f"{compiled}|{params}".encode()).hexdigest()
+
+def exact_count(query):
+    return query.order_by(None).count()
+
+def estimated_count(query):
+    """Planner row estimate for query's filters; cheap but may be off, especially after bulk writes."""
+    if db.session.get_bind().dialect.name != 'postgresql':
+        return None
+    return int(explain(query.order_by(None).statement)['Plan Rows'])
+
+def count_rows(query, strategy='exact', scope=GLOBAL_SCOPE):
+    """Return (total, is_exact) for query using the requested strategy.
+
+    estimate falls back to an exact count when the planner expects fewer than
+    COUNT_EXACT_BELOW rows (small counts are cheap and estimates are worst
+    there). cached stores exact counts per (scope, filter signature) for
+    COUNT_CACHE_TTL seconds; writers call notify('counts', scope) to evict.
+    A cached hit is reported as not exact since it may predate a write.
+    """
+    if strategy == 'estimate':
+        estimate = estimated_count(query)
+        if estimate is not None and estimate >= Config.COUNT_EXACT_BELOW:
+            return estimate, False
+        return exact_count(query), True
+    if strategy == 'cached':
+        key = (str(scope), _generation(str(scope)), _signature(query.order_by(None).statement))
+        total = count_cache.get(key)
+        if total is not None:
+            return total, False
+        total = exact_count(query)
+        count_cache.set(key, total)
+        return total, True
+    if strategy == 'exact':
+        return exact_count(query), True
+    raise ValueError(f"count must be one of {', '.join(COUNT_STRATEGIES)} or none")
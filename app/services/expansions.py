@@ -0,0 +1,59 @@
+from collections import namedtuple
+from flask import request
+from .references import resolve_references
+from .serializers import author_serializer, book_serializer, genre_serializer
+
+# id_field: the array field holding related ids; fields: what each embedded row renders;
+# library_scoped: only embed rows from the caller's library
+Expansion = namedtuple('Expansion', ['id_field', 'serializer', 'fields', 'library_scoped'])
+
+BOOK_EXPANSIONS = {
+    "authors": Expansion('author_ids', author_serializer, ['author_id', 'name', 'author_image'], False),
+    "genres": Expansion('genre_ids', genre_serializer, ['genre_id', 'name'], False)
+}
+
+AUTHOR_EXPANSIONS = {
+    "books": Expansion('book_ids', book_serializer, ['book_id', 'title', 'isbn', 'book_image', 'published_date'], True)
+}
+
+def requested_expansions():
+    """Names in the request's expand= value, unvalidated (for decorators deciding cache scope)."""
+    return {name.strip() for name in (request.args.get('expand') or '').split(',') if name.strip()}
+
+def parse_expand(value, expansions):
+    """Return the expansion names in an expand= value; raises ValueError for unknown names."""
+    names = list(dict.fromkeys(name.strip() for name in (value or '').split(',') if name.strip()))
+    unknown = [name for name in names if name not in expansions]
+    if unknown:
+        raise ValueError(f"Unknown expand: {', '.join(unknown)}. Available: {', '.join(expansions)}")
+    return names
+
+def id_fields(names, expansions):
+    """Fields that must be loaded on the parent rows for names to be expanded."""
+    return [expansions[name].id_field for name in names]
+
+def expand_related(objs, names, expansions, library_id=None):
+    """Load every related row for objs with one query per expansion.
+
+    Returns a function rendering one obj's expansions as {name: [rows]}, in the
+    order of its id array; ids that no longer resolve are left out.
+    """
+    objs = list(objs)
+    rendered = {}
+    for name in names:
+        expansion = expansions[name]
+        serializer = expansion.serializer
+        query = serializer.model.query.options(serializer.load_only(expansion.fields))
+        if expansion.library_scoped:
+            query = query.filter_by(library_id=library_id)
+        ids = [related_id for obj in objs for related_id in getattr(obj, expansion.id_field) or []]
+        related = resolve_references(serializer.model, ids, query=query).found
+        render = serializer.compile(expansion.fields)
+        rendered[name] = {related_id: render(row, {}) for related_id, row in related.items()}
+
+    def embed(obj):
+        return {
+            name: [rendered[name][related_id] for related_id in getattr(obj, expansions[name].id_field) or [] if related_id in rendered[name]]
+            for name in names
+        }
+    return embed
@@ -0,0 +1,51 @@
+from sqlalchemy.orm import make_transient_to_detached
+import time
+from .. import db
+from ..models.users import User
+from ..config import Config
+from .cache import TTLCache
+from .invalidation import invalidation_listener, subscribe
+
+# Per-process cache of active users keyed by token subject (user_id)
+identity_cache = TTLCache(maxsize=Config.IDENTITY_CACHE_SIZE, ttl=Config.IDENTITY_CACHE_TTL)
+
+def _snapshot(user):
+    return {column.key: getattr(user, column.key) for column in User.__table__.columns}
+
+def _attach(snapshot):
+    # Copy array columns so in-place edits on the request's instance never leak into the cache
+    user = User(**{key: list(value) if isinstance(value, list) else value for key, value in snapshot.items()})
+    make_transient_to_detached(user)
+    return db.session.merge(user, load=False)
+
+def _ttl():
+    # Deactivations only reach this process promptly while the invalidation listener is live
+    return Config.IDENTITY_CACHE_TTL if invalidation_listener.live() else Config.IDENTITY_CACHE_FALLBACK_TTL
+
+def load_identity(user_id):
+    """Return the active User for user_id, served from the identity cache when possible.
+
+    Entries cached while the listener was live are only trusted for the
+    fallback TTL once it stops hearing its heartbeat (thread frozen,
+    disconnected, or behind a pooler that drops notifications).
+    """
+    key = str(user_id)
+    entry = identity_cache.get(key)
+    if entry is not None:
+        cached_at, snapshot = entry
+        if time.monotonic() - cached_at < _ttl():
+            return _attach(snapshot)
+
+    user = User.query.filter_by(user_id=user_id, is_active=True).first()
+    if user:
+        identity_cache.set(key, (time.monotonic(), _snapshot(user)), ttl=_ttl())
+    return user
+
+def invalidate_identity(user_id):
+    """Drop a cached identity after the user's row was updated, deactivated or deleted."""
+    if user_id is None:
+        identity_cache.clear()
+    else:
+        identity_cache.invalidate(str(user_id))
+
+subscribe('user', invalidate_identity)
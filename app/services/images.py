@@ -0,0 +1,153 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from hashlib import sha256
+from io import BytesIO
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from .. import db
+from ..config import Config
+from ..models.image_assets import ImageAsset
+from .invalidation import notify
+from .supabase_client import get_supabase
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow is optional; without it only the original is stored
+    Image = None
+
+# variant -> bounding box; variants are always re-encoded as JPEG
+VARIANTS = {
+    'list': (480, 480),
+    'thumbnail': (160, 160),
+}
+
+CONTENT_TYPES = {'png': 'image/png', 'jpg': 'image/jpeg', 'jpeg': 'image/jpeg'}
+
+_executor = ThreadPoolExecutor(max_workers=Config.IMAGE_INGEST_WORKERS, thread_name_prefix='image-ingest')
+
+def _variant_path(content_hash, variant):
+    return f"{content_hash}_{variant}.jpg"
+
+def ingest_image(file, bucket):
+    """Register an uploaded image by content hash and return its public URL.
+
+    With IMAGE_INGEST_ASYNC, storage uploads and resizing happen in a worker
+    pool after the current transaction commits; otherwise they happen here,
+    before returning. An image whose hash is already stored in the bucket is
+    not uploaded again; one that failed, or has been pending for longer than
+    IMAGE_INGEST_RETRY_PENDING_AFTER seconds, is uploaded afresh.
+    """
+    data = file.read()
+    content_hash = sha256(data).hexdigest()
+    extension = file.filename.rsplit('.', 1)[1].lower()
+    content_type = CONTENT_TYPES.get(extension, file.content_type)
+    path = f"{content_hash}.{extension}"
+
+    storage = get_supabase().storage.from_(bucket)
+    variant_urls = {
+        variant: storage.get_public_url(_variant_path(content_hash, variant)) if Image else None
+        for variant in VARIANTS
+    }
+    original_url = storage.get_public_url(path)
+
+    # The upsert doubles as the dedupe check, so concurrent uploads of the same file store it once;
+    # it only claims an existing row whose upload failed or stalled
+    now = datetime.now(timezone.utc)
+    statement = insert(ImageAsset).values(
+        bucket=bucket,
+        content_hash=content_hash,
+        content_type=content_type,
+        original_url=original_url,
+        list_url=variant_urls['list'],
+        thumbnail_url=variant_urls['thumbnail'],
+        status='pending',
+        updated_at=now
+    )
+    claimed = db.session.execute(
+        statement.on_conflict_do_update(
+            index_elements=['bucket', 'content_hash'],
+            set_={
+                "content_type": statement.excluded.content_type,
+                "original_url": statement.excluded.original_url,
+                "list_url": statement.excluded.list_url,
+                "thumbnail_url": statement.excluded.thumbnail_url,
+                "status": 'pending',
+                "updated_at": now
+            },
+            where=(ImageAsset.status == 'failed') | (
+                (ImageAsset.status == 'pending')
+                & (ImageAsset.updated_at < now - timedelta(seconds=Config.IMAGE_INGEST_RETRY_PENDING_AFTER))
+            )
+        ).returning(ImageAsset.original_url)
+    ).scalar()
+    if claimed is None:
+        return ImageAsset.query.filter_by(bucket=bucket, content_hash=content_hash).first().original_url
+
+    if Config.IMAGE_INGEST_ASYNC:
+        db.session.info.setdefault('image_jobs', []).append((bucket, content_hash, path, data, content_type))
+    else:
+        # Upload errors propagate so the caller's request fails and rolls the row back
+        _upload(bucket, content_hash, path, data, content_type)
+        ImageAsset.query.filter_by(bucket=bucket, content_hash=content_hash).update({"status": 'ready'})
+        if bucket == 'author_images':
+            notify('responses', 'authors')
+    return original_url
+
+def _resize(data, size):
+    image = ImageOps.exif_transpose(Image.open(BytesIO(data)))
+    image.thumbnail(size)
+    output = BytesIO()
+    image.convert('RGB').save(output, format='JPEG', quality=82, optimize=True)
+    return output.getvalue()
+
+def _upload(bucket, content_hash, path, data, content_type):
+    storage = get_supabase().storage.from_(bucket)
+    uploads = [(path, data, content_type)]
+    if Image:
+        uploads += [(_variant_path(content_hash, variant), _resize(data, size), 'image/jpeg') for variant, size in VARIANTS.items()]
+    for upload_path, payload, upload_type in uploads:
+        storage.upload(path=upload_path, file=payload, file_options={"content-type": upload_type, "upsert": "true"})
+
+def _process(app, bucket, content_hash, path, data, content_type):
+    with app.app_context():
+        try:
+            _upload(bucket, content_hash, path, data, content_type)
+            status = 'ready'
+        except Exception:
+            app.logger.exception(f"Image ingestion failed for {bucket}/{path}")
+            status = 'failed'
+        ImageAsset.query.filter_by(bucket=bucket, content_hash=content_hash).update({
+            "status": status,
+            "updated_at": datetime.now(timezone.utc)
+        })
+        if bucket == 'author_images':
+            # Cached author listings carry thumbnail URLs
+            notify('responses', 'authors')
+        db.session.commit()
+
+@event.listens_for(Session, 'after_commit')
+def _dispatch_image_jobs(session):
+    jobs = session.info.pop('image_jobs', None)
+    if not jobs:
+        return
+    app = current_app._get_current_object()
+    for job in jobs:
+        _executor.submit(_process, app, *job)
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_image_jobs(session):
+    session.info.pop('image_jobs', None)
+
+def variant_urls(urls, variant='thumbnail'):
+    """Map original image URLs to a processed variant's URL in one query."""
+    urls = {url for url in urls if url}
+    if not urls:
+        return {}
+    column = ImageAsset.thumbnail_url if variant == 'thumbnail' else ImageAsset.list_url
+    rows = db.session.query(ImageAsset.original_url, column).filter(
+        ImageAsset.original_url.in_(urls),
+        ImageAsset.status == 'ready'
+    ).all()
+    return {original_url: url for original_url, url in rows if url}
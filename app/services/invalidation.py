@@ -0,0 +1,116 @@
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+from select import select
+import time
+from .. import db
+from ..config import Config
+from .workers import BackgroundWorker, register_worker
+
+# entity -> handlers called with the invalidated key, or None to flush everything
+_handlers = {}
+
+def subscribe(entity, handler):
+    _handlers.setdefault(entity, []).append(handler)
+
+def dispatch(entity, key):
+    for handler in _handlers.get(entity, []):
+        handler(key)
+
+def dispatch_all():
+    for entity in list(_handlers):
+        dispatch(entity, None)
+
+def notify(entity, key):
+    """Invalidate entity:key in every worker once the current transaction commits."""
+    db.session.info.setdefault('pending_invalidations', set()).add((entity, str(key)))
+    if db.session.get_bind().dialect.name == 'postgresql':
+        # NOTIFY is transactional: listeners only see it if the write commits
+        db.session.execute(
+            text("SELECT pg_notify(:channel, :payload)"),
+            {"channel": Config.CACHE_INVALIDATION_CHANNEL, "payload": f"{entity}:{key}"}
+        )
+
+@event.listens_for(Session, 'after_commit')
+def _dispatch_pending(session):
+    for entity, key in session.info.pop('pending_invalidations', ()):
+        dispatch(entity, key)
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_pending(session):
+    session.info.pop('pending_invalidations', None)
+
+class InvalidationListener(BackgroundWorker):
+    """Holds a dedicated LISTEN connection and evicts keys published by other workers."""
+
+    name = 'cache-invalidation-listener'
+    # Sent to ourselves every interval; a transaction-mode pooler accepts LISTEN but never delivers
+    HEARTBEAT = 'heartbeat'
+
+    def __init__(self, interval):
+        super().__init__(interval)
+        self._heard_at = None
+
+    def live(self):
+        """Whether notifications are reaching this process: our own heartbeat came back recently."""
+        heard_at = self._heard_at
+        return heard_at is not None and time.monotonic() - heard_at < 3 * self.interval \
+            and self._thread is not None and self._thread.is_alive()
+
+    def enabled(self, app):
+        with app.app_context():
+            return Config.CACHE_INVALIDATION_LISTENER and db.engine.dialect.name == 'postgresql'
+
+    def run(self, app):
+        # Reconnect with backoff instead of polling every interval
+        self._backoff = 1
+        while not self._stop.is_set():
+            try:
+                with app.app_context():
+                    self.run_once()
+            except Exception:
+                app.logger.exception("Cache invalidation listener disconnected")
+                dispatch_all()
+                time.sleep(self._backoff)
+                self._backoff = min(self._backoff * 2, 60)
+
+    def run_once(self):
+        """LISTEN on a dedicated connection and dispatch notifications until stopped or disconnected."""
+        dbapi_connection = None
+        try:
+            connection = db.engine.raw_connection()
+            # Keep this connection out of the pool for the lifetime of the listener
+            connection.detach()
+            dbapi_connection = connection.dbapi_connection
+            dbapi_connection.autocommit = True
+            channel = Config.CACHE_INVALIDATION_CHANNEL.replace('"', '""')
+            with dbapi_connection.cursor() as cursor:
+                cursor.execute(f'LISTEN "{channel}"')
+            # Anything published while we were disconnected is lost, so start from empty caches
+            dispatch_all()
+            self._backoff = 1
+            self._listen(dbapi_connection)
+        finally:
+            self._heard_at = None
+            if dbapi_connection is not None:
+                dbapi_connection.close()
+
+    def _listen(self, dbapi_connection):
+        channel = Config.CACHE_INVALIDATION_CHANNEL
+        next_heartbeat = 0
+        while not self._stop.is_set():
+            if time.monotonic() >= next_heartbeat:
+                with dbapi_connection.cursor() as cursor:
+                    cursor.execute("SELECT pg_notify(%s, %s)", (channel, f"{self.HEARTBEAT}:"))
+                next_heartbeat = time.monotonic() + self.interval
+            if select([dbapi_connection], [], [], self.interval) == ([], [], []):
+                continue
+            dbapi_connection.poll()
+            while dbapi_connection.notifies:
+                notification = dbapi_connection.notifies.pop(0)
+                entity, _, key = notification.payload.partition(':')
+                if entity == self.HEARTBEAT:
+                    self._heard_at = time.monotonic()
+                    continue
+                dispatch(entity, key or None)
+
+invalidation_listener = register_worker(InvalidationListener(interval=5))
@@ -0,0 +1,82 @@
+from collections import namedtuple
+from sqlalchemy import cast, func, update
+from sqlalchemy.dialects.postgresql import UUID
+from .. import db
+from ..models.books import Book
+from ..models.users import User
+
+# ok: whether the counters moved; available_copies / reserved_copies: the values after the
+# change (None when it failed); reason: None, 'not_found' or 'unavailable'
+InventoryResult = namedtuple('InventoryResult', ['ok', 'book_id', 'available_copies', 'reserved_copies', 'reason'])
+
+def _adjust(book_id, condition, available=0, reserved=0, library_id=None):
+    """Move a book's counters in one conditional UPDATE ... RETURNING.
+
+    The condition is checked against the row as the UPDATE sees it, so
+    concurrent callers can neither lose each other's changes nor push a
+    counter past its bounds, and no explicit row lock is taken beyond the
+    UPDATE's own.
+    """
+    statement = update(Book).where(Book.book_id == book_id, condition)
+    if library_id is not None:
+        statement = statement.where(Book.library_id == library_id)
+    changes = {}
+    if available:
+        changes[Book.available_copies] = Book.available_copies + available
+    if reserved:
+        changes[Book.reserved_copies] = Book.reserved_copies + reserved
+    statement = statement.values(changes).returning(Book.available_copies, Book.reserved_copies).execution_options(synchronize_session=False)
+
+    row = db.session.execute(statement).first()
+    if row is not None:
+        return InventoryResult(True, book_id, row.available_copies, row.reserved_copies, None)
+
+    # Only the failure path pays for telling a missing book from an exhausted one
+    exists = db.session.query(Book.book_id).filter_by(book_id=book_id)
+    if library_id is not None:
+        exists = exists.filter_by(library_id=library_id)
+    reason = 'unavailable' if exists.first() else 'not_found'
+    return InventoryResult(False, book_id, None, None, reason)
+
+def reserve_copy(book_id, library_id=None):
+    """Hold one copy for a reservation; fails when every copy on the shelf is already held."""
+    return _adjust(book_id, Book.available_copies > Book.reserved_copies, reserved=1, library_id=library_id)
+
+def release_copy(book_id):
+    """Give back a held copy (reservation rejected or expired)."""
+    return _adjust(book_id, Book.reserved_copies > 0, reserved=-1)
+
+def checkout_reserved_copy(book_id):
+    """Lend out a copy that a reservation was holding."""
+    return _adjust(book_id, (Book.available_copies > 0) & (Book.reserved_copies > 0), available=-1, reserved=-1)
+
+def return_copy(book_id):
+    """Put a lent copy back on the shelf."""
+    return _adjust(book_id, Book.available_copies < Book.total_copies, available=1)
+
+def add_book_id(user_id, column, book_id, limit=None):
+    """Append book_id to one of a user's book id arrays, optionally only while it has fewer than limit entries.
+
+    Returns whether the user row was updated.
+    """
+    array = getattr(User, column)
+    statement = update(User).where(User.user_id == user_id)
+    if limit is not None:
+        statement = statement.where(func.coalesce(func.cardinality(array), 0) < limit)
+    # array_append on a NULL array starts a new one
+    statement = statement.values({array: func.array_append(array, cast(book_id, UUID(as_uuid=True)))})
+    return db.session.execute(statement.execution_options(synchronize_session=False)).rowcount > 0
+
+def remove_book_id(user_id, column, book_id):
+    """Remove one occurrence of book_id from one of a user's book id arrays.
+
+    A member can hold two loans or holds for the same title, so only the
+    first match is dropped (array_remove would drop them all and let
+    cardinality() undercount against the borrow limit). Returns whether the
+    array held book_id.
+    """
+    array = getattr(User, column)
+    position = func.array_position(array, cast(book_id, UUID(as_uuid=True)))
+    statement = update(User).where(User.user_id == user_id, position.isnot(None)) \
+        .values({array: func.array_cat(array[1:position - 1], array[position + 1:func.cardinality(array)])})
+    return db.session.execute(statement.execution_options(synchronize_session=False)).rowcount > 0
@@ -0,0 +1,43 @@
+from datetime import date
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; without it responses use the stdlib encoder
+    orjson = None
+
+class ISOJSONProvider(DefaultJSONProvider):
+    """Stdlib JSON that writes dates and datetimes as ISO 8601 instead of HTTP dates."""
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, date):
+            return o.isoformat()
+        return DefaultJSONProvider.default(o)
+
+class ORJSONProvider(ISOJSONProvider):
+    """orjson encoder with native UUID and datetime support; keys are not sorted."""
+
+    options = orjson.OPT_NON_STR_KEYS if orjson else 0
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self.options).decode()
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        option = self.options
+        if self._app.debug:
+            option |= orjson.OPT_INDENT_2
+        return self._app.response_class(
+            orjson.dumps(obj, default=self.default, option=option) + b'\n',
+            mimetype=self.mimetype
+        )
+
+JSONProvider = ORJSONProvider if orjson else ISOJSONProvider
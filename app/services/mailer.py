@@ -0,0 +1,202 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from flask import current_app
+from queue import Empty, LifoQueue
+from threading import Lock
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+import smtplib
+import time
+from .. import db
+from ..config import Config
+from ..models.email_outbox import EmailOutbox
+from ..utils.email_utils import build_email_message
+from .workers import BackgroundWorker, register_worker
+
+# Bodies carry OTPs and temporary passwords; they are dropped once an email is sent or given up on
+REDACTED_BODY = '[redacted]'
+
+class SMTPConnectionPool:
+    """Keeps authenticated SMTP connections open between batches instead of logging in per email."""
+
+    def __init__(self, size):
+        self.size = size
+        self._idle = LifoQueue()
+
+    def _connect(self):
+        server = smtplib.SMTP(Config.SMTP_SERVER, Config.SMTP_PORT, timeout=Config.SMTP_TIMEOUT)
+        server.starttls()
+        server.login(Config.SMTP_SENDER_EMAIL, Config.SMTP_SENDER_PASSWORD)
+        return server
+
+    @staticmethod
+    def _close(server):
+        try:
+            server.quit()
+        except Exception:
+            server.close()
+
+    def _acquire(self):
+        while True:
+            try:
+                server = self._idle.get_nowait()
+            except Empty:
+                return self._connect()
+            # Servers drop idle sessions; check before reuse
+            try:
+                if server.noop()[0] == 250:
+                    return server
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._close(server)
+
+    @contextmanager
+    def connection(self):
+        server = self._acquire()
+        try:
+            yield server
+        except Exception:
+            self._close(server)
+            raise
+        if self._idle.qsize() < self.size:
+            self._idle.put(server)
+        else:
+            self._close(server)
+
+class OutboxWorker(BackgroundWorker):
+    """Drains email_outbox in batches, retrying failed sends with exponential backoff."""
+
+    name = 'email-outbox'
+
+    def __init__(self, interval, batch_size, max_attempts, connections):
+        super().__init__(interval)
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.pool = SMTPConnectionPool(connections)
+        self._executor = ThreadPoolExecutor(max_workers=connections, thread_name_prefix='smtp')
+        self._metrics_lock = Lock()
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+        self.send_seconds_total = 0.0
+        self.send_seconds_max = 0.0
+
+    def enabled(self, app):
+        return Config.EMAIL_OUTBOX_WORKER
+
+    def run_once(self):
+        """Send every due email; returns the number of rows processed."""
+        processed = 0
+        while True:
+            batch_size = self._drain_batch(db.session)
+            processed += batch_size
+            if batch_size < self.batch_size:
+                return processed
+
+    def deliver(self, email_ids):
+        """Send just-committed emails now instead of waiting for the worker; returns the number processed.
+
+        Runs on a session of its own, since it is called from the request
+        session's after_commit hook. Failed sends stay pending and are retried
+        like any other.
+        """
+        with Session(db.engine) as session:
+            return self._drain_batch(session, email_ids)
+
+    def _drain_batch(self, session, email_ids=None):
+        now = datetime.now(timezone.utc)
+        # SKIP LOCKED lets several workers drain the outbox without sending twice
+        query = session.query(EmailOutbox).filter(
+            EmailOutbox.status == 'pending',
+            EmailOutbox.next_attempt_at <= now
+        )
+        if email_ids is not None:
+            query = query.filter(EmailOutbox.email_id.in_(email_ids))
+        batch = query.order_by(EmailOutbox.next_attempt_at).limit(self.batch_size).with_for_update(skip_locked=True).all()
+        if not batch:
+            session.commit()
+            return 0
+
+        payloads = [(email.recipient, email.subject, email.body) for email in batch]
+        results = list(self._executor.map(self._send, payloads))
+
+        now = datetime.now(timezone.utc)
+        for email, error in zip(batch, results):
+            email.attempts += 1
+            if error is None:
+                email.status = 'sent'
+                email.sent_at = now
+                email.last_error = None
+                email.body = REDACTED_BODY
+            elif email.attempts >= self.max_attempts:
+                email.status = 'failed'
+                email.last_error = error
+                email.body = REDACTED_BODY
+            else:
+                email.next_attempt_at = now + timedelta(seconds=min(2 ** email.attempts * 15, 3600))
+                email.last_error = error
+        session.commit()
+
+        with self._metrics_lock:
+            for email, error in zip(batch, results):
+                if error is None:
+                    self.sent += 1
+                elif email.status == 'failed':
+                    self.failed += 1
+                else:
+                    self.retried += 1
+        return len(batch)
+
+    def _send(self, payload):
+        recipient, subject, body = payload
+        started = time.perf_counter()
+        try:
+            msg = build_email_message(recipient, subject, body)
+            with self.pool.connection() as server:
+                server.sendmail(Config.SMTP_SENDER_EMAIL, recipient, msg.as_string())
+            return None
+        except Exception as e:
+            return str(e)
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._metrics_lock:
+                self.send_seconds_total += elapsed
+                self.send_seconds_max = max(self.send_seconds_max, elapsed)
+
+    def stats(self):
+        with self._metrics_lock:
+            attempts = self.sent + self.retried + self.failed
+            return {
+                "sent": self.sent,
+                "retried": self.retried,
+                "failed": self.failed,
+                "avg_send_seconds": round(self.send_seconds_total / attempts, 4) if attempts else None,
+                "max_send_seconds": round(self.send_seconds_max, 4)
+            }
+
+outbox_worker = register_worker(OutboxWorker(
+    interval=Config.EMAIL_OUTBOX_POLL_INTERVAL,
+    batch_size=Config.EMAIL_OUTBOX_BATCH_SIZE,
+    max_attempts=Config.EMAIL_OUTBOX_MAX_ATTEMPTS,
+    connections=Config.EMAIL_OUTBOX_SMTP_CONNECTIONS
+))
+
+@event.listens_for(Session, 'after_commit')
+def _wake_outbox_worker(session):
+    email_ids = session.info.pop('outbox_pending', None)
+    if not email_ids:
+        return
+    if not Config.EMAIL_OUTBOX_INLINE:
+        # Don't wait for the next poll when a request just committed emails
+        outbox_worker.wake()
+        return
+    try:
+        outbox_worker.deliver(email_ids)
+    except Exception:
+        # The rows are committed; the worker or 'flask send-emails' picks them up later
+        current_app.logger.exception("Inline email delivery failed")
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_outbox_flag(session):
+    session.info.pop('outbox_pending', None)
@@ -0,0 +1,152 @@
+from abc import ABC, abstractmethod
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+from threading import Lock
+from sqlalchemy import delete
+import hmac
+from .. import db
+from ..config import Config
+from ..models.otp_verifications import OTPVerification
+from ..utils.email_utils import generate_otp
+from .workers import BackgroundWorker, register_worker
+
+OTPRecord = namedtuple('OTPRecord', ['user_id', 'email', 'access_token', 'refresh_token', 'expires_at'])
+
+class OTPStore(ABC):
+    """Issues and consumes one-time passwords; expired entries are removed by sweep()."""
+
+    def __init__(self, ttl=timedelta(minutes=5)):
+        self.ttl = ttl
+
+    @abstractmethod
+    def issue(self, user_id, email, access_token=None, refresh_token=None):
+        """Create an OTP for user_id and return it."""
+
+    @abstractmethod
+    def consume(self, user_id, otp):
+        """Return the OTPRecord if otp is valid and unexpired, removing it; otherwise None.
+
+        Must be atomic: of concurrent calls with the same OTP, only one gets the record.
+        """
+
+    @abstractmethod
+    def sweep(self):
+        """Remove expired OTPs and return how many were removed."""
+
+class DatabaseOTPStore(OTPStore):
+    """Stores OTPs in otp_verifications. Writes join the caller's transaction and are not committed here."""
+
+    def __init__(self, ttl=timedelta(minutes=5), sweep_batch_size=1000):
+        super().__init__(ttl)
+        self.sweep_batch_size = sweep_batch_size
+
+    def issue(self, user_id, email, access_token=None, refresh_token=None):
+        otp = generate_otp(6)
+        now = datetime.now(timezone.utc)
+        db.session.add(OTPVerification(
+            user_id=user_id,
+            email=email,
+            otp=otp,
+            access_token=access_token,
+            refresh_token=refresh_token,
+            expires_at=now + self.ttl,
+            created_at=now
+        ))
+        return otp
+
+    def consume(self, user_id, otp):
+        # One DELETE ... RETURNING: a concurrent consumer waits on the row lock, then finds it gone.
+        # Served by idx_otp_verifications_user_otp; expired rows are left for the sweeper
+        row = db.session.execute(
+            delete(OTPVerification).where(
+                OTPVerification.user_id == user_id,
+                OTPVerification.otp == otp,
+                OTPVerification.expires_at > datetime.now(timezone.utc)
+            ).returning(
+                OTPVerification.user_id,
+                OTPVerification.email,
+                OTPVerification.access_token,
+                OTPVerification.refresh_token,
+                OTPVerification.expires_at
+            ).execution_options(synchronize_session=False)
+        ).first()
+        if row is None:
+            return None
+        return OTPRecord(*row)
+
+    def sweep(self):
+        removed = 0
+        while True:
+            # Delete in small batches so the sweeper never holds a table-wide lock
+            expired_ids = db.session.query(OTPVerification.id).filter(
+                OTPVerification.expires_at < datetime.now(timezone.utc)
+            ).limit(self.sweep_batch_size).scalar_subquery()
+            deleted = OTPVerification.query.filter(OTPVerification.id.in_(expired_ids)).delete(synchronize_session=False)
+            db.session.commit()
+            removed += deleted
+            if deleted < self.sweep_batch_size:
+                return removed
+
+class MemoryOTPStore(OTPStore):
+    """Process-local OTP store for single-node deployments."""
+
+    def __init__(self, ttl=timedelta(minutes=5)):
+        super().__init__(ttl)
+        self._entries = {}
+        self._lock = Lock()
+
+    def issue(self, user_id, email, access_token=None, refresh_token=None):
+        otp = generate_otp(6)
+        record = OTPRecord(
+            user_id=str(user_id),
+            email=email,
+            access_token=access_token,
+            refresh_token=refresh_token,
+            expires_at=datetime.now(timezone.utc) + self.ttl
+        )
+        with self._lock:
+            self._entries.setdefault(str(user_id), []).append((otp, record))
+        return otp
+
+    def consume(self, user_id, otp):
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            entries = self._entries.get(str(user_id), [])
+            for index, (candidate, record) in enumerate(entries):
+                if record.expires_at > now and hmac.compare_digest(candidate, otp):
+                    del entries[index]
+                    if not entries:
+                        del self._entries[str(user_id)]
+                    return record
+        return None
+
+    def sweep(self):
+        now = datetime.now(timezone.utc)
+        removed = 0
+        with self._lock:
+            for user_id in list(self._entries):
+                live = [(otp, record) for otp, record in self._entries[user_id] if record.expires_at > now]
+                removed += len(self._entries[user_id]) - len(live)
+                if live:
+                    self._entries[user_id] = live
+                else:
+                    del self._entries[user_id]
+        return removed
+
+def create_otp_store(backend):
+    ttl = timedelta(minutes=Config.OTP_TTL_MINUTES)
+    if backend == 'database':
+        return DatabaseOTPStore(ttl)
+    if backend == 'memory':
+        return MemoryOTPStore(ttl)
+    raise ValueError(f"Unknown OTP_STORE backend: {backend}")
+
+otp_store = create_otp_store(Config.OTP_STORE)
+
+class OTPSweeper(BackgroundWorker):
+    name = 'otp-sweeper'
+
+    def run_once(self):
+        return otp_store.sweep()
+
+otp_sweeper = register_worker(OTPSweeper(interval=Config.OTP_SWEEP_INTERVAL))
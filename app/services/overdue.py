@@ -0,0 +1,129 @@
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+from threading import Lock
+import time
+from .. import db
+from ..config import Config
+from ..models.fines import Fine
+from .workers import BackgroundWorker, register_worker
+
+# The fine a loan accrues for being late; at most one per loan (partial unique index, migration 012)
+OVERDUE_FINE_REASON = 'Overdue book return'
+# Largest value fines.amount (NUMERIC(8, 2)) can hold
+MAX_FINE_AMOUNT = 999999.99
+
+LIBRARY_POLICIES = text("""
+    SELECT DISTINCT ON (libraries.library_id) libraries.library_id, policies.fine_per_day
+    FROM libraries LEFT JOIN policies ON policies.library_id = libraries.library_id
+    ORDER BY libraries.library_id, policies.updated_at DESC NULLS LAST
+""")
+
+MARK_OVERDUE = text("""
+    UPDATE borrow_transactions SET status = 'overdue'
+    WHERE library_id = :library_id AND return_date IS NULL AND status = 'borrowed' AND due_date < :now
+""")
+
+# Whole days late, as (return_date - due_date).days counts them at return time
+ACCRUE_FINES = text(f"""
+    INSERT INTO fines (borrow_id, user_id, book_id, library_id, amount, reason, is_paid, fine_date, updated_at)
+    SELECT borrow_id, user_id, book_id, library_id,
+           LEAST(floor(extract(epoch FROM :now - due_date) / 86400)::NUMERIC * CAST(:fine_per_day AS NUMERIC), {MAX_FINE_AMOUNT}),
+           '{OVERDUE_FINE_REASON}', FALSE, :now, :now
+    FROM borrow_transactions
+    WHERE library_id = :library_id AND return_date IS NULL AND due_date <= :now - interval '1 day'
+    ON CONFLICT (borrow_id) WHERE reason = '{OVERDUE_FINE_REASON}' DO UPDATE
+    SET amount = EXCLUDED.amount
+    WHERE fines.is_paid IS NOT TRUE AND fines.amount < EXCLUDED.amount
+""")
+
+def accrue_overdue_fine(borrow, amount):
+    """Create or raise the overdue fine for a loan; used when a late book is returned.
+
+    Amounts only ever go up and paid fines are left alone, so this and the
+    sweep can run concurrently in either order.
+    """
+    amount = min(amount, MAX_FINE_AMOUNT)
+    statement = insert(Fine).values(
+        borrow_id=borrow.borrow_id,
+        user_id=borrow.user_id,
+        book_id=borrow.book_id,
+        library_id=borrow.library_id,
+        amount=amount,
+        reason=OVERDUE_FINE_REASON,
+        is_paid=False,
+        fine_date=datetime.now()
+    )
+    db.session.execute(statement.on_conflict_do_update(
+        index_elements=['borrow_id'],
+        index_where=text(f"reason = '{OVERDUE_FINE_REASON}'"),
+        set_={"amount": statement.excluded.amount},
+        where=Fine.is_paid.isnot(True) & (Fine.amount < statement.excluded.amount)
+    ))
+
+def sweep_library(library_id, fine_per_day, now):
+    """Mark a library's open loans past due_date overdue and accrue their fines.
+
+    Two set-based statements; the caller commits. Re-running with the same now
+    changes nothing. Returns (loans marked overdue, fines created or raised).
+    """
+    params = {"library_id": library_id, "now": now, "fine_per_day": fine_per_day}
+    marked = db.session.execute(MARK_OVERDUE, params).rowcount
+    fined = db.session.execute(ACCRUE_FINES, params).rowcount if fine_per_day else 0
+    return marked, fined
+
+class OverdueSweeper(BackgroundWorker):
+    """Marks overdue loans and accrues their fines, one transaction per library."""
+
+    name = 'overdue-sweep'
+
+    def __init__(self, interval):
+        super().__init__(interval)
+        self._metrics_lock = Lock()
+        self.runs = 0
+        self.marked = 0
+        self.fined = 0
+        self.last_run = None
+
+    def enabled(self, app):
+        return Config.OVERDUE_SWEEP_WORKER
+
+    def run_once(self, now=None):
+        """Sweep every library; returns counts and timings for the run."""
+        now = now or datetime.now()
+        started = time.perf_counter()
+        report = {"libraries": 0, "marked_overdue": 0, "fines_accrued": 0, "slowest_library_seconds": 0.0}
+        libraries = db.session.execute(LIBRARY_POLICIES).all()
+        db.session.commit()
+        for library_id, fine_per_day in libraries:
+            library_started = time.perf_counter()
+            marked, fined = sweep_library(library_id, fine_per_day, now)
+            db.session.commit()
+            report["libraries"] += 1
+            report["marked_overdue"] += marked
+            report["fines_accrued"] += fined
+            report["slowest_library_seconds"] = round(max(report["slowest_library_seconds"], time.perf_counter() - library_started), 3)
+        report["elapsed_seconds"] = round(time.perf_counter() - started, 3)
+
+        with self._metrics_lock:
+            self.runs += 1
+            self.marked += report["marked_overdue"]
+            self.fined += report["fines_accrued"]
+            self.last_run = dict(report, swept_at=now.isoformat())
+        current_app.logger.info(
+            f"{self.name}: {report['marked_overdue']} loans marked overdue, {report['fines_accrued']} fines accrued "
+            f"across {report['libraries']} libraries in {report['elapsed_seconds']}s"
+        )
+        return report
+
+    def stats(self):
+        with self._metrics_lock:
+            return {
+                "runs": self.runs,
+                "marked_overdue": self.marked,
+                "fines_accrued": self.fined,
+                "last_run": self.last_run
+            }
+
+overdue_sweeper = register_worker(OverdueSweeper(interval=Config.OVERDUE_SWEEP_INTERVAL))
@@ -0,0 +1,104 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+from uuid import UUID
+import json
+from flask import request
+from sqlalchemy import and_, literal, or_, tuple_
+import math
+from .counts import GLOBAL_SCOPE, count_rows
+
+def encode_cursor(values):
+    """Opaque token for the sort-key values of the last row on a page."""
+    payload = json.dumps([value.isoformat() if isinstance(value, datetime) else str(value) if isinstance(value, UUID) else value for value in values])
+    return urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+def decode_cursor(token, sort):
+    """Turn a cursor back into typed values for sort; raises ValueError if it doesn't fit."""
+    try:
+        values = json.loads(urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list) or len(values) != len(sort):
+        raise ValueError("Invalid cursor")
+    try:
+        return [_decode_value(value, expression.type.python_type) for value, (expression, _) in zip(values, sort)]
+    except (TypeError, AttributeError, ValueError):
+        raise ValueError("Invalid cursor")
+
+def _decode_value(value, python_type):
+    # encode_cursor writes numbers as JSON numbers and everything else as strings
+    if python_type in (int, float):
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise TypeError(f"Expected a number, got {type(value).__name__}")
+        return python_type(value)
+    if not isinstance(value, str):
+        raise TypeError(f"Expected a string, got {type(value).__name__}")
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    return python_type(value)
+
+def _after(sort, values):
+    # Rows strictly after the cursor in sort order; a row comparison when every key sorts the same way
+    bound = [literal(value, type_=expression.type) for value, (expression, _) in zip(values, sort)]
+    directions = {descending for _, descending in sort}
+    if len(directions) == 1:
+        left, right = tuple_(*[expression for expression, _ in sort]), tuple_(*bound)
+        return left < right if directions.pop() else left > right
+    clauses = []
+    for index, (expression, descending) in enumerate(sort):
+        equal = [sort[i][0] == bound[i] for i in range(index)]
+        clauses.append(and_(*equal, expression < bound[index] if descending else expression > bound[index]))
+    return or_(*clauses)
+
+def keyset_page(query, sort, per_page, cursor=None):
+    """Fetch the page after cursor; returns (items, next_cursor or None).
+
+    sort is a list of (expression, descending) ending in a unique column, so
+    the order is total and no row is skipped or repeated between pages. The
+    sort keys are selected alongside the query's own columns to build the
+    next cursor, then stripped from the returned items.
+    """
+    if cursor:
+        query = query.filter(_after(sort, decode_cursor(cursor, sort)))
+    query = query.order_by(None).order_by(*[expression.desc() if descending else expression.asc() for expression, descending in sort])
+    query = query.add_columns(*[expression.label(f'sort_key_{index}') for index, (expression, _) in enumerate(sort)])
+    rows = query.limit(per_page + 1).all()
+
+    keys = len(sort)
+    items = [row[0] if len(row) == keys + 1 else tuple(row)[:-keys] for row in rows[:per_page]]
+    if len(rows) <= per_page:
+        return items, None
+    return items, encode_cursor(tuple(rows[per_page - 1])[-keys:])
+
+def paginate(query, sort, default_per_page=10, count_scope=GLOBAL_SCOPE):
+    """Paginate query per the request: page/per_page (OFFSET) by default, or keyset when cursor= is given.
+
+    Returns (items, meta). count=exact|estimate|cached|none picks how the
+    total is computed (see services.counts); offset pages default to exact
+    and cursor pages to none. count_scope is the library the rows belong to,
+    used to key and invalidate cached counts.
+    """
+    per_page = request.args.get('per_page', default_per_page, type=int)
+    if per_page < 1:
+        raise ValueError("per_page must be at least 1")
+    cursor = request.args.get('cursor')
+    keyset = cursor is not None or request.args.get('pagination') == 'cursor'
+    strategy = request.args.get('count', 'none' if keyset else 'exact')
+
+    meta = {}
+    if strategy != 'none':
+        meta["total"], meta["total_is_exact"] = count_rows(query, strategy, count_scope)
+
+    if not keyset:
+        page = request.args.get('page', 1, type=int)
+        ordered = query.order_by(None).order_by(*[expression.desc() if descending else expression.asc() for expression, descending in sort])
+        result = ordered.paginate(page=page, per_page=per_page, error_out=False, count=False)
+        if "total" in meta:
+            meta["pages"] = math.ceil(meta["total"] / per_page)
+        meta["page"] = page
+        return result.items, meta
+
+    meta["per_page"] = per_page
+    items, next_cursor = keyset_page(query, sort, per_page, cursor)
+    meta.update(next_cursor=next_cursor, has_more=next_cursor is not None)
+    return items, meta
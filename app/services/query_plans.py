@@ -0,0 +1,59 @@
+from uuid import uuid4
+from sqlalchemy import text
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+from .. import db
+from ..models.authors import Author
+from ..models.books import Book
+from ..models.users import User
+
+class Explain(Executable, ClauseElement):
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+@compiles(Explain, 'postgresql')
+def _compile_explain(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+def explain(statement):
+    """The planner's JSON plan (the top 'Plan' node) for statement."""
+    return db.session.execute(Explain(statement)).scalar()[0]['Plan']
+
+def _nodes(plan):
+    yield plan
+    for child in plan.get('Plans', []):
+        yield from _nodes(child)
+
+def seq_scans(plan):
+    """Relations the plan reads with a sequential scan."""
+    return [node.get('Relation Name') for node in _nodes(plan) if node['Node Type'] == 'Seq Scan']
+
+# Array-membership filters the app issues; each must be answerable from a GIN index
+ARRAY_FILTERS = {
+    "books.author_ids": lambda key: Book.query.filter(Book.author_ids.contains([key])),
+    "books.genre_ids": lambda key: Book.query.filter(Book.genre_ids.contains([key])),
+    "authors.book_ids": lambda key: Author.query.filter(Author.book_ids.contains([key])),
+    "users.preferred_genre_ids": lambda key: User.query.filter(User.preferred_genre_ids.contains([key])),
+    "users.borrowed_book_ids": lambda key: User.query.filter(User.borrowed_book_ids.contains([key])),
+    "users.reserved_book_ids": lambda key: User.query.filter(User.reserved_book_ids.contains([key])),
+    "users.wishlist_book_ids": lambda key: User.query.filter(User.wishlist_book_ids.contains([key]))
+}
+
+def check_array_filters():
+    """EXPLAIN every ARRAY_FILTERS query with sequential scans disabled.
+
+    With enable_seqscan off the planner only falls back to a Seq Scan when no
+    index can answer the predicate, so the result does not depend on table
+    size or statistics. Returns {name: relations still seq-scanned}; an empty
+    list means the filter is index-backed.
+    """
+    results = {}
+    try:
+        db.session.execute(text("SET LOCAL enable_seqscan = off"))
+        for name, build in ARRAY_FILTERS.items():
+            results[name] = seq_scans(explain(build(uuid4()).statement))
+    finally:
+        db.session.rollback()
+    return results
@@ -0,0 +1,44 @@
+from collections import namedtuple
+from uuid import UUID
+from .. import db
+
+ResolvedReferences = namedtuple('ResolvedReferences', ['found', 'missing'])
+
+def _as_uuid(value):
+    if isinstance(value, UUID):
+        return value
+    try:
+        return UUID(str(value))
+    except ValueError:
+        return None
+
+def resolve_references(model, ids, load=True, query=None):
+    """Check a list of primary keys against model in a single IN query.
+
+    Returns ResolvedReferences(found, missing): found maps each existing UUID to
+    its instance (or to the UUID itself when load=False, which only selects the
+    key column), and missing lists the requested ids that do not exist or are
+    not valid UUIDs, in request order. query replaces model.query as the base
+    for loaded instances, e.g. to add loader options or a library filter.
+    """
+    primary_key = model.__mapper__.primary_key[0]
+    requested = []
+    missing = []
+    for value in ids or []:
+        key = _as_uuid(value)
+        if key is None:
+            missing.append(str(value))
+        elif key not in requested:
+            requested.append(key)
+
+    if not requested:
+        return ResolvedReferences(found={}, missing=missing)
+
+    if load:
+        query = query if query is not None else model.query
+        found = {getattr(row, primary_key.key): row for row in query.filter(primary_key.in_(requested)).all()}
+    else:
+        found = {key: key for key, in db.session.query(primary_key).filter(primary_key.in_(requested)).all()}
+
+    missing.extend(str(key) for key in requested if key not in found)
+    return ResolvedReferences(found=found, missing=missing)
@@ -0,0 +1,126 @@
+from datetime import datetime
+from flask import current_app
+from threading import Lock
+from sqlalchemy import text
+import time
+from .. import db
+from ..config import Config
+from .invalidation import notify
+from .waitlist import promote_next
+from .workers import BackgroundWorker, register_worker
+
+# One batch in one statement: claim due holds (SKIP LOCKED, so several workers can run), mark them
+# expired, give their copies back to books and drop them from users.reserved_book_ids (one entry per
+# expired hold, earliest first, since a member can hold the same title more than once)
+EXPIRE_BATCH = text("""
+    WITH due AS (
+        SELECT reservation_id FROM reservations
+        WHERE status IN ('pending', 'confirmed') AND expires_at <= :now
+        ORDER BY expires_at
+        LIMIT :batch_size
+        FOR UPDATE SKIP LOCKED
+    ), expired AS (
+        UPDATE reservations SET status = 'expired'
+        FROM due WHERE reservations.reservation_id = due.reservation_id
+        RETURNING reservations.user_id, reservations.book_id
+    ), freed AS (
+        SELECT book_id, count(*) AS copies FROM expired GROUP BY book_id
+    ), released_copies AS (
+        UPDATE books SET reserved_copies = GREATEST(books.reserved_copies - freed.copies, 0)
+        FROM freed WHERE books.book_id = freed.book_id
+        RETURNING books.book_id
+    ), released_holds AS (
+        UPDATE users SET reserved_book_ids = ARRAY(
+            SELECT kept.id FROM (
+                SELECT id, position, row_number() OVER (PARTITION BY id ORDER BY position) AS occurrence
+                FROM unnest(users.reserved_book_ids) WITH ORDINALITY AS element(id, position)
+            ) AS kept
+            WHERE kept.occurrence > (
+                SELECT count(*) FROM expired WHERE expired.user_id = users.user_id AND expired.book_id = kept.id
+            )
+            ORDER BY kept.position
+        )
+        FROM (SELECT DISTINCT user_id FROM expired) AS held
+        WHERE users.user_id = held.user_id
+        RETURNING users.user_id
+    )
+    SELECT 'book' AS kind, book_id AS id, copies FROM freed
+    UNION ALL
+    SELECT 'user', user_id, NULL FROM released_holds
+""")
+
+class ReservationExpiryWorker(BackgroundWorker):
+    """Expires reservations past expires_at in batches and hands their copies to the waitlist."""
+
+    name = 'reservation-expiry'
+
+    def __init__(self, interval, batch_size):
+        super().__init__(interval)
+        self.batch_size = batch_size
+        self._metrics_lock = Lock()
+        self.runs = 0
+        self.expired = 0
+        self.promoted = 0
+        self.last_run = None
+
+    def enabled(self, app):
+        return Config.RESERVATION_EXPIRY_WORKER
+
+    def run_once(self, batch_size=None):
+        """Expire every due reservation; returns counts and timings for the run."""
+        batch_size = batch_size or self.batch_size
+        started = time.perf_counter()
+        report = {"expired": 0, "promoted": 0, "batches": 0, "slowest_batch_seconds": 0.0}
+        while True:
+            batch_started = time.perf_counter()
+            expired, promoted = self._expire_batch(batch_size)
+            report["batches"] += 1
+            report["expired"] += expired
+            report["promoted"] += promoted
+            report["slowest_batch_seconds"] = round(max(report["slowest_batch_seconds"], time.perf_counter() - batch_started), 3)
+            if expired < batch_size:
+                break
+        report["elapsed_seconds"] = round(time.perf_counter() - started, 3)
+
+        with self._metrics_lock:
+            self.runs += 1
+            self.expired += report["expired"]
+            self.promoted += report["promoted"]
+            self.last_run = dict(report, finished_at=datetime.now().isoformat())
+        if report["expired"]:
+            current_app.logger.info(
+                f"{self.name}: expired {report['expired']} reservations, promoted {report['promoted']} "
+                f"in {report['batches']} batches, {report['elapsed_seconds']}s"
+            )
+        return report
+
+    def _expire_batch(self, batch_size):
+        rows = db.session.execute(EXPIRE_BATCH, {"now": datetime.now(), "batch_size": batch_size}).all()
+        freed = {row.id: row.copies for row in rows if row.kind == 'book'}
+
+        # Each freed copy goes to the next member waiting for that title, in the same transaction
+        promoted = 0
+        for book_id, copies in freed.items():
+            for _ in range(copies):
+                if promote_next(book_id) is None:
+                    break
+                promoted += 1
+        for row in rows:
+            if row.kind == 'user':
+                notify('user', row.id)
+        db.session.commit()
+        return sum(freed.values()), promoted
+
+    def stats(self):
+        with self._metrics_lock:
+            return {
+                "runs": self.runs,
+                "expired": self.expired,
+                "promoted": self.promoted,
+                "last_run": self.last_run
+            }
+
+reservation_expiry_worker = register_worker(ReservationExpiryWorker(
+    interval=Config.RESERVATION_EXPIRY_INTERVAL,
+    batch_size=Config.RESERVATION_EXPIRY_BATCH_SIZE
+))
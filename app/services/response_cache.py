@@ -0,0 +1,255 @@
+from functools import wraps
+from hashlib import sha1
+from threading import Lock
+from flask import request, current_app
+import os
+import shutil
+import struct
+import tempfile
+import time
+from ..config import Config
+from .cache import TTLCache
+from .invalidation import subscribe
+
+# Header layout of a file entry: expiry (unix time, double), mimetype length, then mimetype and body
+_ENTRY_HEADER = struct.Struct('>dH')
+
+class MemoryBackend:
+    """Per-process LRU + TTL store; other workers are evicted through notify('responses', ...)."""
+
+    def __init__(self, maxsize, ttl):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._generations = {}
+        self._lock = Lock()
+
+    def generation(self, namespace):
+        with self._lock:
+            return self._generations.get(namespace, 0)
+
+    def get(self, namespace, generation, key):
+        return self._cache.get((namespace, generation, key))
+
+    def set(self, namespace, generation, key, value):
+        self._cache.set((namespace, generation, key), value)
+
+    def invalidate(self, namespace):
+        # Entries under the old generation can no longer be looked up; the LRU ages them out
+        with self._lock:
+            self._generations[namespace] = self._generations.get(namespace, 0) + 1
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self):
+        return {"backend": "memory", **self._cache.stats()}
+
+class FileBackend:
+    """Entries as files under directory/<namespace>/<generation>/ shared by every worker on the host.
+
+    Point directory at a tmpfs (e.g. /dev/shm) to keep entries in memory.
+    Reads touch the file's mtime, so pruning by mtime evicts least recently
+    used entries first. Invalidation bumps the namespace generation, which
+    every worker sees on its next lookup, and removes the old entries.
+    """
+
+    def __init__(self, directory, maxsize, ttl, prune_every=100):
+        self.directory = directory
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._prune_every = prune_every
+        self._lock = Lock()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _namespace_dir(self, namespace):
+        return os.path.join(self.directory, namespace)
+
+    def generation(self, namespace):
+        try:
+            with open(os.path.join(self._namespace_dir(namespace), 'generation')) as handle:
+                return int(handle.read() or 0)
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def _path(self, namespace, generation, key):
+        return os.path.join(self._namespace_dir(namespace), str(generation), sha1(key.encode()).hexdigest())
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, namespace, generation, key):
+        path = self._path(namespace, generation, key)
+        try:
+            with open(path, 'rb') as handle:
+                data = handle.read()
+        except FileNotFoundError:
+            self._count(False)
+            return None
+        expires_at, mimetype_length = _ENTRY_HEADER.unpack_from(data)
+        if expires_at <= time.time():
+            self._remove(path)
+            self._count(False)
+            return None
+        os.utime(path)
+        self._count(True)
+        offset = _ENTRY_HEADER.size
+        return data[offset:offset + mimetype_length].decode(), data[offset + mimetype_length:]
+
+    def set(self, namespace, generation, key, value):
+        mimetype, body = value
+        mimetype = mimetype.encode()
+        path = self._path(namespace, generation, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename so readers never see a partial entry
+        descriptor, temporary = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp')
+        with os.fdopen(descriptor, 'wb') as handle:
+            handle.write(_ENTRY_HEADER.pack(time.time() + self.ttl, len(mimetype)) + mimetype + body)
+        os.replace(temporary, path)
+
+        with self._lock:
+            self._writes += 1
+            prune = self._writes % self._prune_every == 0
+        if prune:
+            self.prune()
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def _entries(self):
+        for namespace in os.listdir(self.directory) if os.path.isdir(self.directory) else ():
+            current = str(self.generation(namespace))
+            for generation in os.listdir(self._namespace_dir(namespace)):
+                directory = os.path.join(self._namespace_dir(namespace), generation)
+                if not os.path.isdir(directory):
+                    continue
+                if generation != current:
+                    shutil.rmtree(directory, ignore_errors=True)
+                    continue
+                for name in os.listdir(directory):
+                    if not name.startswith('.tmp'):
+                        yield os.path.join(directory, name)
+
+    def prune(self):
+        """Drop expired entries, then the least recently used ones beyond maxsize."""
+        entries = []
+        for path in self._entries():
+            try:
+                entries.append((os.stat(path).st_mtime, path))
+            except FileNotFoundError:
+                continue
+        cutoff = time.time() - self.ttl
+        entries.sort()
+        overflow = len(entries) - self.maxsize
+        for index, (mtime, path) in enumerate(entries):
+            if (index < overflow or mtime <= cutoff) and self._remove(path):
+                with self._lock:
+                    self.evictions += 1
+
+    def invalidate(self, namespace):
+        directory = self._namespace_dir(namespace)
+        os.makedirs(directory, exist_ok=True)
+        old = self.generation(namespace)
+        descriptor, temporary = tempfile.mkstemp(dir=directory, prefix='.tmp')
+        with os.fdopen(descriptor, 'w') as handle:
+            handle.write(str(old + 1))
+        os.replace(temporary, os.path.join(directory, 'generation'))
+        shutil.rmtree(os.path.join(directory, str(old)), ignore_errors=True)
+
+    def clear(self):
+        for namespace in os.listdir(self.directory) if os.path.isdir(self.directory) else ():
+            self.invalidate(namespace)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": "file",
+                "directory": self.directory,
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None
+            }
+
+def create_response_cache(backend):
+    if backend == 'none':
+        return None
+    if backend == 'memory':
+        return MemoryBackend(Config.RESPONSE_CACHE_SIZE, Config.RESPONSE_CACHE_TTL)
+    if backend == 'file':
+        return FileBackend(Config.RESPONSE_CACHE_DIR, Config.RESPONSE_CACHE_SIZE, Config.RESPONSE_CACHE_TTL)
+    raise ValueError(f"Unknown RESPONSE_CACHE_BACKEND: {backend}")
+
+response_cache = create_response_cache(Config.RESPONSE_CACHE_BACKEND)
+
+def invalidate_responses(namespace):
+    """Drop cached responses for a namespace ('genres', 'authors'), or all of them (None)."""
+    if response_cache is None:
+        return
+    if namespace is None:
+        response_cache.clear()
+    else:
+        response_cache.invalidate(namespace)
+
+subscribe('responses', invalidate_responses)
+
+def response_cache_stats():
+    return response_cache.stats() if response_cache is not None else {"backend": "none"}
+
+def request_key():
+    """Endpoint, path arguments and query arguments, sorted and without blank values."""
+    args = sorted((name, value.strip()) for name, value in request.args.items(multi=True) if value.strip())
+    return repr((request.endpoint, sorted((request.view_args or {}).items()), args))
+
+def cached_response(namespace, per_library=False):
+    """Serve a route's 200 responses from the response cache until notify('responses', namespace).
+
+    Only for responses that are the same for every caller, or for every caller
+    in a library when per_library is set (a bool, or a function deciding per
+    request). Must sit below role_required (and conditional_get, so 304s skip
+    the cache entirely).
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if response_cache is None:
+                return f(*args, **kwargs)
+
+            key = request_key()
+            if per_library() if callable(per_library) else per_library:
+                key += f"|library:{request.current_user.library_id}"
+            try:
+                # Read the generation first so a response built from pre-invalidation rows is stored under the old one
+                generation = response_cache.generation(namespace)
+                cached = response_cache.get(namespace, generation, key)
+            except Exception:
+                current_app.logger.exception("Response cache unavailable")
+                return f(*args, **kwargs)
+            if cached is not None:
+                mimetype, body = cached
+                response = current_app.response_class(body, mimetype=mimetype)
+                response.headers['X-Cache'] = 'HIT'
+                return response
+
+            response = current_app.make_response(f(*args, **kwargs))
+            if response.status_code == 200 and not response.is_streamed:
+                try:
+                    response_cache.set(namespace, generation, key, (response.mimetype, response.get_data()))
+                except Exception:
+                    current_app.logger.exception("Failed to store cached response")
+            response.headers['X-Cache'] = 'MISS'
+            return response
+        return decorated_function
+    return decorator
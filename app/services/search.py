@@ -0,0 +1,47 @@
+from sqlalchemy import Float, func, literal, or_, text
+from .. import db
+from ..config import Config
+from ..models.books import Book
+
+# Text search configuration used by book_search_vector() in update_trigger.sql
+SEARCH_CONFIG = 'english'
+
+HEADLINE_OPTIONS = 'StartSel=<mark>, StopSel=</mark>, MaxFragments=2, MaxWords=20, MinWords=8'
+
+def book_tsquery(q):
+    """Parse user input with web-search syntax ("quoted phrases", OR, -exclusions)."""
+    return func.websearch_to_tsquery(SEARCH_CONFIG, q)
+
+def match_books(q):
+    """Filter condition served by the idx_books_search_vector GIN index."""
+    return Book.search_vector.op('@@')(book_tsquery(q))
+
+def book_rank(q):
+    return func.ts_rank_cd(Book.search_vector, book_tsquery(q), type_=Float)
+
+def book_headline(q):
+    document = func.concat_ws(' ', Book.title, Book.description)
+    return func.ts_headline(SEARCH_CONFIG, document, book_tsquery(q), HEADLINE_OPTIONS)
+
+def fuzzy_match(q, *columns, threshold=None):
+    """Return (condition, score) for rows where q approximately matches part of any column.
+
+    Uses pg_trgm word similarity, so partial and misspelled input ("tolkein")
+    still matches ("J.R.R. Tolkien"); the <% operator is served by the
+    gin_trgm_ops indexes. Order by score descending for closest first. The
+    threshold only applies to the current transaction.
+    """
+    threshold = Config.FUZZY_MATCH_THRESHOLD if threshold is None else threshold
+    db.session.execute(text("SELECT set_config('pg_trgm.word_similarity_threshold', :threshold, true)"), {"threshold": str(threshold)})
+    term = literal(q)
+    score = func.greatest(*[func.word_similarity(term, column) for column in columns], type_=Float)
+    return or_(*[term.op('<%')(column) for column in columns]), score
+
+def match_threshold(value):
+    """Parse an optional ?threshold= value; raises ValueError outside (0, 1]."""
+    if value is None:
+        return None
+    threshold = float(value)
+    if not 0 < threshold <= 1:
+        raise ValueError("threshold must be between 0 and 1")
+    return threshold
@@ -0,0 +1,41 @@
+from threading import Lock
+from ..config import Config
+
+# One shared client per key type, used for storage and admin calls. Nothing may sign in through
+# these: supabase-py copies a signed-in session's JWT into the client's headers for every later call
+_CLIENT_KEYS = {
+    'anon': 'SUPABASE_ANON_PUBLIC_KEY',
+    'service': 'SUPABASE_SERVICE_KEY',
+}
+_clients = {}
+_lock = Lock()
+
+def get_supabase(key_type='anon'):
+    """Return the shared Supabase client for key_type, creating it on first use."""
+    client = _clients.get(key_type)
+    if client is None:
+        with _lock:
+            client = _clients.get(key_type)
+            if client is None:
+                # Deferred import: the supabase package is slow to import and /health never needs it
+                from supabase import create_client
+                client = create_client(Config.SUPABASE_PROJECT_URL, getattr(Config, _CLIENT_KEYS[key_type]))
+                _clients[key_type] = client
+    return client
+
+def create_auth_client():
+    """Return a new anon client for one request's sign-up, sign-in or token refresh.
+
+    The session is kept neither on the client nor across requests, so no
+    user's token can reach another request.
+    """
+    from supabase import ClientOptions, create_client
+    return create_client(
+        Config.SUPABASE_PROJECT_URL,
+        Config.SUPABASE_ANON_PUBLIC_KEY,
+        options=ClientOptions(persist_session=False, auto_refresh_token=False)
+    )
+
+def get_supabase_admin():
+    """Return the shared service-role client used for admin operations."""
+    return get_supabase('service')
@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta
+from sqlalchemy import func, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from .. import db
+from ..models.policies import Policy
+from ..models.reservation_queue import ReservationQueueEntry
+from ..models.reservations import Reservation
+from .inventory import reserve_copy, add_book_id
+from .invalidation import notify
+
+def enqueue(user_id, book_id, library_id):
+    """Put user on book's waitlist (a no-op if already there) and return their 1-based position."""
+    db.session.execute(
+        insert(ReservationQueueEntry)
+        .values(book_id=book_id, user_id=user_id, library_id=library_id, reserved_at=func.now())
+        .on_conflict_do_nothing(index_elements=['book_id', 'user_id'])
+    )
+    return queue_position(user_id, book_id)
+
+def leave_queue(user_id, book_id):
+    """Take user off book's waitlist; returns whether they were on it."""
+    return ReservationQueueEntry.query.filter_by(book_id=book_id, user_id=user_id).delete(synchronize_session=False) > 0
+
+def queue_position(user_id, book_id):
+    """1-based position of user on book's waitlist, or None.
+
+    Counts only the entries ahead of the user's, a range scan on
+    (book_id, reserved_at, queue_id), rather than ranking the whole queue.
+    """
+    entry = db.session.query(ReservationQueueEntry.reserved_at, ReservationQueueEntry.queue_id) \
+        .filter_by(book_id=book_id, user_id=user_id).first()
+    if entry is None:
+        return None
+    ahead = db.session.query(func.count()).select_from(ReservationQueueEntry).filter(
+        ReservationQueueEntry.book_id == book_id,
+        tuple_(ReservationQueueEntry.reserved_at, ReservationQueueEntry.queue_id) < tuple_(entry.reserved_at, entry.queue_id)
+    ).scalar()
+    return ahead + 1
+
+def others_waiting(user_id, book_id):
+    """Whether anyone is ahead of user on book's waitlist (anyone at all if user isn't on it)."""
+    position = queue_position(user_id, book_id)
+    if position is not None:
+        return position > 1
+    return db.session.query(ReservationQueueEntry.queue_id).filter_by(book_id=book_id).first() is not None
+
+def promote_next(book_id):
+    """Give a free copy of book to the head of its waitlist as a pending reservation.
+
+    Runs in the caller's transaction, so the copy being freed and the hold
+    being handed on commit together. The head is locked with SKIP LOCKED, so
+    concurrent returns of the same title promote different users. Returns the
+    new Reservation, or None when nobody is waiting or no copy is free.
+    """
+    head = ReservationQueueEntry.query.filter_by(book_id=book_id) \
+        .order_by(ReservationQueueEntry.reserved_at, ReservationQueueEntry.queue_id) \
+        .with_for_update(skip_locked=True).first()
+    if head is None:
+        return None
+    if not reserve_copy(book_id).ok:
+        return None
+
+    policy = Policy.query.filter_by(library_id=head.library_id).first()
+    now = datetime.now()
+    reservation = Reservation(
+        user_id=head.user_id,
+        book_id=book_id,
+        library_id=head.library_id,
+        reserved_at=now,
+        expires_at=now + timedelta(hours=(policy.reservation_expiry_hours if policy else None) or 24),
+        status='pending'
+    )
+    db.session.add(reservation)
+    db.session.delete(head)
+    add_book_id(head.user_id, 'reserved_book_ids', book_id)
+    notify('user', head.user_id)
+    return reservation
@@ -0,0 +1,73 @@
+from abc import ABC, abstractmethod
+from threading import Event, Lock, Thread
+import os
+
+_workers = []
+_started_pid = None
+_start_lock = Lock()
+
+class BackgroundWorker(ABC):
+    """Daemon thread that calls run_once() every `interval` seconds inside an app context."""
+
+    name = 'background-worker'
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._thread = None
+        self._wake = Event()
+        self._stop = Event()
+
+    def enabled(self, app):
+        return True
+
+    def start(self, app):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = Thread(target=self.run, args=(app,), name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def wake(self):
+        """Run the next iteration now instead of waiting for the interval."""
+        self._wake.set()
+
+    def run(self, app):
+        while not self._stop.is_set():
+            try:
+                with app.app_context():
+                    self.run_once()
+            except Exception:
+                app.logger.exception(f"{self.name} iteration failed")
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    @abstractmethod
+    def run_once(self):
+        """One iteration of the worker's job."""
+
+def register_worker(worker):
+    _workers.append(worker)
+    return worker
+
+def start_workers(app):
+    """Start registered workers once per process (gunicorn forks after the app is imported)."""
+    global _started_pid
+    pid = os.getpid()
+    if _started_pid == pid:
+        return
+    with _start_lock:
+        if _started_pid == pid:
+            return
+        for worker in _workers:
+            if worker.enabled(app):
+                worker.start(app)
+        _started_pid = pid
+
+def init_workers(app):
+    @app.before_request
+    def _ensure_workers_started():
+        start_workers(app)
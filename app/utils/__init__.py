@@ -1,2 +1 @@
-from .email_utils import send_otp_email
 from .random_password_utils import generate_random_password
\ No newline at end of file
@@ -1,36 +1,37 @@
-import smtplib
+from .. import db
 from ..config import Config
-from email.message import EmailMessage
+from ..models.email_outbox import EmailOutbox
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import secrets
 import string
+from uuid import uuid4
 
 def generate_otp(length=6):
     """Generate a random OTP of specified length."""
     return ''.join(secrets.choice(string.digits) for _ in range(length))
 
-def send_otp_email(recipient, body, subject="Your OTP for Library Management System", is_otp=True):
-    """Send an email with OTP or custom body to the recipient."""
-    try:
-        msg = MIMEMultipart()
-        msg['From'] = Config.SMTP_SENDER_EMAIL
-        msg['To'] = recipient
-        msg['Subject'] = subject
+def compose_email_body(body, is_otp=True):
+    """Wrap an OTP in the standard message, or return a custom body unchanged."""
+    if is_otp:
+        return f"Your OTP is: {body}\n\nThis OTP is valid for 5 minutes."
+    return body
 
-        # If it's an OTP, wrap it in a simple message
-        if is_otp:
-            email_body = f"Your OTP is: {body}\n\nThis OTP is valid for 5 minutes."
-        else:
-            email_body = body  # Use the provided body directly
+def build_email_message(recipient, subject, email_body):
+    msg = MIMEMultipart()
+    msg['From'] = Config.SMTP_SENDER_EMAIL
+    msg['To'] = recipient
+    msg['Subject'] = subject
+    msg.attach(MIMEText(email_body, 'plain'))
+    return msg
 
-        msg.attach(MIMEText(email_body, 'plain'))
-
-        with smtplib.SMTP(Config.SMTP_SERVER, Config.SMTP_PORT) as server:
-            server.starttls()
-            server.login(Config.SMTP_SENDER_EMAIL, Config.SMTP_SENDER_PASSWORD)
-            server.sendmail(Config.SMTP_SENDER_EMAIL, recipient, msg.as_string())
-        return True
-    except Exception as e:
-        print(f"Failed to send email: {str(e)}")
-        return False
\ No newline at end of file
+def queue_email(recipient, body, subject="Your OTP for Library Management System", is_otp=True):
+    """Stage an email in the outbox; the mailer sends it once the current transaction commits."""
+    email = EmailOutbox(
+        email_id=uuid4(),
+        recipient=recipient,
+        subject=subject,
+        body=compose_email_body(body, is_otp)
+    )
+    db.session.add(email)
+    db.session.info.setdefault('outbox_pending', []).append(email.email_id)
\ No newline at end of file
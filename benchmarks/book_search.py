@@ -0,0 +1,155 @@
+"""Compare the ILIKE title filter with tsvector full-text search on a large catalog.
+
+Builds a scratch schema in the database at BENCH_DATABASE_URI, loads synthetic
+authors and books, applies migrations/005_books_search_vector.sql and times
+what list_books runs per page (COUNT plus the first page of 20) for both
+search modes. The schema is dropped afterwards unless --keep is given.
+
+    BENCH_DATABASE_URI=postgresql://... python benchmarks/book_search.py [--sizes 100000 1000000] [--runs 5]
+"""
+import argparse
+import os
+import random
+import statistics
+import string
+import time
+from sqlalchemy import create_engine, text
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MIGRATION = os.path.join(ROOT, 'app', 'database', 'migrations', '005_books_search_vector.sql')
+SCHEMA = 'bench_book_search'
+LIBRARIES = 4
+AUTHORS = 5000
+
+SCHEMA_SQL = """
+CREATE TABLE authors (
+    author_id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    name TEXT NOT NULL,
+    book_ids UUID[] DEFAULT '{}',
+    updated_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE books (
+    book_id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    library_id UUID NOT NULL,
+    title TEXT NOT NULL,
+    description TEXT,
+    publisher_name TEXT,
+    author_ids UUID[] DEFAULT '{}',
+    updated_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX idx_books_library_id ON books(library_id);
+CREATE OR REPLACE FUNCTION update_updated_at_column()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.updated_at = CURRENT_TIMESTAMP;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+CREATE TRIGGER update_books_updated_at BEFORE UPDATE ON books FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+"""
+
+# Random pick per row; the outer column reference stops Postgres from evaluating it once
+LOAD_BOOKS_SQL = """
+INSERT INTO books (library_id, title, description, publisher_name, author_ids)
+SELECT libraries[1 + (g % :libraries)],
+       (SELECT string_agg(words[1 + floor(random() * array_length(words, 1))::int], ' ') FROM generate_series(1, 3 + g % 4)),
+       (SELECT string_agg(words[1 + floor(random() * array_length(words, 1))::int], ' ') FROM generate_series(1, 25 + g % 10)),
+       publishers[1 + (g % array_length(publishers, 1))],
+       ARRAY[authors[1 + floor(random() * array_length(authors, 1))::int]]
+FROM generate_series(1, :size) AS g,
+     (SELECT CAST(:words AS TEXT[]) AS words,
+             CAST(:publishers AS TEXT[]) AS publishers,
+             CAST(:libraries_ids AS UUID[]) AS libraries,
+             (SELECT array_agg(author_id) FROM authors) AS authors) AS params
+"""
+
+ILIKE_QUERIES = (
+    "SELECT count(*) FROM books WHERE library_id = :library_id AND title ILIKE :pattern",
+    "SELECT book_id, title FROM books WHERE library_id = :library_id AND title ILIKE :pattern LIMIT 20",
+)
+
+FTS_QUERIES = (
+    "SELECT count(*) FROM books WHERE library_id = :library_id AND search_vector @@ websearch_to_tsquery('english', :q)",
+    """SELECT book_id, title, ts_headline('english', concat_ws(' ', title, description), websearch_to_tsquery('english', :q))
+       FROM books WHERE library_id = :library_id AND search_vector @@ websearch_to_tsquery('english', :q)
+       ORDER BY ts_rank_cd(search_vector, websearch_to_tsquery('english', :q)) DESC, book_id LIMIT 20""",
+)
+
+def vocabulary(size, seed=7):
+    rng = random.Random(seed)
+    return sorted({''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 9))) for _ in range(size)})
+
+def timed(connection, queries, params, runs):
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        for query in queries:
+            connection.execute(text(query), params).all()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+def run_size(engine, size, runs, words):
+    with engine.begin() as connection:
+        connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        connection.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        connection.execute(text(f"SET search_path TO {SCHEMA}, public"))
+        connection.execute(text(SCHEMA_SQL))
+        connection.execute(text("""
+            INSERT INTO authors (name)
+            SELECT initcap(w1) || ' ' || initcap(w2)
+            FROM (SELECT CAST(:words AS TEXT[]) AS words) AS v,
+                 LATERAL (SELECT words[1 + floor(random() * array_length(words, 1))::int] AS w1,
+                                 words[1 + floor(random() * array_length(words, 1))::int] AS w2
+                          FROM generate_series(1, :authors)) AS names
+        """), {"words": words, "authors": AUTHORS})
+        library_ids = [row[0] for row in connection.execute(text("SELECT gen_random_uuid() FROM generate_series(1, :n)"), {"n": LIBRARIES})]
+
+        started = time.perf_counter()
+        connection.execute(text(LOAD_BOOKS_SQL), {
+            "size": size,
+            "libraries": LIBRARIES,
+            "libraries_ids": [str(library_id) for library_id in library_ids],
+            "words": words,
+            "publishers": [f"{word.title()} Press" for word in words[:50]]
+        })
+        load_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        with open(MIGRATION) as migration:
+            connection.exec_driver_sql(migration.read())
+        migrate_seconds = time.perf_counter() - started
+        connection.execute(text("ANALYZE authors; ANALYZE books"))
+
+    print(f"\n{size:,} books: loaded in {load_seconds:.1f}s, migration (backfill + GIN index) {migrate_seconds:.1f}s")
+    print(f"{'term':<12} {'ILIKE ms':>10} {'FTS ms':>10} {'speedup':>8}")
+    rng = random.Random(size)
+    with engine.connect() as connection:
+        connection.execute(text(f"SET search_path TO {SCHEMA}, public"))
+        for term in rng.sample(words, 5):
+            params = {"library_id": library_ids[0], "pattern": f"%{term}%", "q": term}
+            ilike = timed(connection, ILIKE_QUERIES, params, runs)
+            fts = timed(connection, FTS_QUERIES, params, runs)
+            print(f"{term:<12} {ilike * 1000:>10.1f} {fts * 1000:>10.1f} {ilike / fts:>7.1f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--keep", action="store_true", help=f"keep the {SCHEMA} schema for inspection")
+    args = parser.parse_args()
+
+    uri = os.environ.get("BENCH_DATABASE_URI")
+    if not uri:
+        parser.error("BENCH_DATABASE_URI must point at a scratch Postgres database")
+    engine = create_engine(uri)
+    words = vocabulary(20_000)
+    try:
+        for size in args.sizes:
+            run_size(engine, size, args.runs, words)
+    finally:
+        if not args.keep:
+            with engine.begin() as connection:
+                connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+
+if __name__ == "__main__":
+    main()
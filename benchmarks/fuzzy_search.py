@@ -0,0 +1,146 @@
+"""Time trigram fuzzy name lookups against the ILIKE filter they replace.
+
+Builds a scratch schema in the database at BENCH_DATABASE_URI with synthetic
+authors, genres and members, then times the list query for exact substrings
+and for misspelled input. ILIKE runs before migrations/006_trigram_name_indexes.sql
+is applied, and fuzzy matching after. The schema is dropped afterwards unless
+--keep is given.
+
+    BENCH_DATABASE_URI=postgresql://... python benchmarks/fuzzy_search.py [--sizes 100000 1000000] [--runs 5]
+"""
+import argparse
+import os
+import random
+import statistics
+import time
+from sqlalchemy import create_engine, text
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MIGRATION = os.path.join(ROOT, 'app', 'database', 'migrations', '006_trigram_name_indexes.sql')
+SCHEMA = 'bench_fuzzy_search'
+THRESHOLD = 0.4
+
+SCHEMA_SQL = """
+CREATE TABLE authors (author_id UUID PRIMARY KEY DEFAULT gen_random_uuid(), name TEXT NOT NULL);
+CREATE TABLE genres (genre_id UUID PRIMARY KEY DEFAULT gen_random_uuid(), name TEXT NOT NULL UNIQUE);
+CREATE TABLE users (
+    user_id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    library_id UUID NOT NULL,
+    name TEXT NOT NULL,
+    email TEXT NOT NULL UNIQUE,
+    role TEXT NOT NULL
+);
+CREATE INDEX idx_users_library_id ON users(library_id);
+"""
+
+ILIKE_AUTHORS = "SELECT author_id, name FROM authors WHERE name ILIKE :pattern LIMIT 10"
+FUZZY_AUTHORS = """
+    SELECT author_id, name FROM authors WHERE :q <% name
+    ORDER BY word_similarity(:q, name) DESC, name LIMIT 10
+"""
+ILIKE_MEMBERS = """
+    SELECT user_id, name FROM users
+    WHERE library_id = :library_id AND role = 'Member' AND (name ILIKE :pattern OR email ILIKE :pattern) LIMIT 10
+"""
+FUZZY_MEMBERS = """
+    SELECT user_id, name FROM users
+    WHERE library_id = :library_id AND role = 'Member' AND (:q <% name OR :q <% email)
+    ORDER BY greatest(word_similarity(:q, name), word_similarity(:q, email)) DESC, name LIMIT 10
+"""
+
+def names(count, seed):
+    rng = random.Random(seed)
+    syllables = [a + b for a in 'bcdfghjklmnprstvwz' for b in 'aeiou']
+    word = lambda: ''.join(rng.choice(syllables) for _ in range(rng.randint(2, 4))).title()
+    return [f"{word()} {word()}" for _ in range(count)]
+
+def misspell(name, rng):
+    # One dropped, doubled or swapped letter in the surname, as typed at a desk
+    surname = name.split()[-1].lower()
+    position = rng.randrange(1, len(surname) - 1)
+    edit = rng.choice(('drop', 'double', 'swap'))
+    if edit == 'drop':
+        return surname[:position] + surname[position + 1:]
+    if edit == 'double':
+        return surname[:position] + surname[position] + surname[position:]
+    return surname[:position - 1] + surname[position] + surname[position - 1] + surname[position + 1:]
+
+def timed(connection, query, params, runs):
+    samples, rows = [], 0
+    for _ in range(runs):
+        started = time.perf_counter()
+        rows = len(connection.execute(text(query), params).all())
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples), rows
+
+def run_size(engine, size, runs):
+    author_names = names(size, seed=size)
+    member_names = names(size, seed=size + 1)
+    with engine.begin() as connection:
+        connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        connection.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        connection.execute(text(f"SET search_path TO {SCHEMA}, public"))
+        connection.execute(text(SCHEMA_SQL))
+        connection.execute(text("INSERT INTO authors (name) SELECT unnest(CAST(:names AS TEXT[]))"), {"names": author_names})
+        connection.execute(text("""
+            INSERT INTO users (library_id, name, email, role)
+            SELECT CAST(:library_id AS UUID), name, lower(replace(name, ' ', '.')) || n || '@example.com', 'Member'
+            FROM unnest(CAST(:names AS TEXT[])) WITH ORDINALITY AS m(name, n)
+        """), {"names": member_names, "library_id": "00000000-0000-0000-0000-000000000001"})
+        connection.execute(text("ANALYZE authors; ANALYZE users"))
+
+    rng = random.Random(size)
+    samples = rng.sample(range(size), 5)
+    cases = []
+    for index in samples:
+        cases.append(("authors", author_names[index].split()[-1].lower(), misspell(author_names[index], rng)))
+        cases.append(("members", member_names[index].split()[-1].lower(), misspell(member_names[index], rng)))
+
+    def params(term):
+        return {"pattern": f"%{term}%", "q": term, "library_id": "00000000-0000-0000-0000-000000000001"}
+
+    with engine.connect() as connection:
+        connection.execute(text(f"SET search_path TO {SCHEMA}, public"))
+        ilike = [
+            timed(connection, ILIKE_AUTHORS if table == "authors" else ILIKE_MEMBERS, params(typo), runs)
+            for table, _, typo in cases
+        ]
+
+    started = time.perf_counter()
+    with engine.begin() as connection:
+        connection.execute(text(f"SET search_path TO {SCHEMA}, public"))
+        with open(MIGRATION) as migration:
+            connection.exec_driver_sql(migration.read())
+        connection.execute(text("ANALYZE authors; ANALYZE users"))
+    index_seconds = time.perf_counter() - started
+
+    print(f"\n{size:,} authors and members: trigram indexes built in {index_seconds:.1f}s")
+    print(f"{'table':<8} {'typed':<14} {'ILIKE ms':>9} {'hits':>5} {'fuzzy ms':>9} {'hits':>5}")
+    with engine.connect() as connection:
+        connection.execute(text(f"SET search_path TO {SCHEMA}, public"))
+        connection.execute(text("SELECT set_config('pg_trgm.word_similarity_threshold', :t, false)"), {"t": str(THRESHOLD)})
+        for (table, _, typo), (ilike_seconds, ilike_rows) in zip(cases, ilike):
+            fuzzy_seconds, fuzzy_rows = timed(connection, FUZZY_AUTHORS if table == "authors" else FUZZY_MEMBERS, params(typo), runs)
+            print(f"{table:<8} {typo:<14} {ilike_seconds * 1000:>9.1f} {ilike_rows:>5} {fuzzy_seconds * 1000:>9.1f} {fuzzy_rows:>5}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--keep", action="store_true", help=f"keep the {SCHEMA} schema for inspection")
+    args = parser.parse_args()
+
+    uri = os.environ.get("BENCH_DATABASE_URI")
+    if not uri:
+        parser.error("BENCH_DATABASE_URI must point at a scratch Postgres database")
+    engine = create_engine(uri)
+    try:
+        for size in args.sizes:
+            run_size(engine, size, args.runs)
+    finally:
+        if not args.keep:
+            with engine.begin() as connection:
+                connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+
+if __name__ == "__main__":
+    main()